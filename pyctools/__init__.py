@@ -1,7 +1,14 @@
 from .common import get_pyc_type
-from .indicator import PycIndicator, PycFunIndicator, PycVarIndicator
+from .indicator import PycIndicator, PycFunIndicator, PycVarIndicator, PycExprIndicator
 from .automaton import PycAutomaton, PycTransition
 from .system import PycSystem
+from .scheduler import PycSimulationScheduler
+from .fingerprint import PycResultCache
+from .executor import PycLocalExecutor, PycFileQueueExecutor
 #from .kb import PycKB
-#from .study import PycStudy
+from .study import PycStudy, run_studies
 from .interactive_session import PycInteractiveSession
+from .serialization import dump_system, load_system
+from .monitor import PycMonitorPublisher, PycMonitorReader, watch_terminal, watch_html
+from .optimizer import PycOptimizer, PycDecisionVariable
+from .comparison import PycResultDiff, result_diff
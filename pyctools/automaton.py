@@ -1,6 +1,7 @@
 import pkg_resources
 import pydantic
 import typing
+import numpy as np
 import Pycatshoo as pyc
 from .core import BaseModel
 
@@ -126,41 +127,316 @@ class AutomatonModel(BaseModel):
         raise ValueError(f"Transition {name} is not part of automaton {self.name}")
 
 
+def get_transitions_bkd(aut_bkd):
+    """ Backend transitions of an automaton """
+    return [trans
+            for state in aut_bkd.states()
+            for trans in state.transitions()]
+
+
+def get_targets_bkd(trans_bkd):
+    """ Backend target states of a transition """
+    return [trans_bkd.getTarget(idx)
+            for idx in range(trans_bkd.targetCount())]
+
+
+def erf(x):
+    """ Vectorized error function (Abramowitz and Stegun 7.1.26,
+    absolute error below 1.5e-7) """
+    x = np.asarray(x, dtype=float)
+    sign = np.sign(x)
+    x = np.abs(x)
+    t = 1/(1 + 0.3275911*x)
+    poly = t*(0.254829592 + t*(-0.284496736 + t*(1.421413741 +
+                                              t*(-1.453152027 +
+                                                 t*1.061405429))))
+    return sign*(1 - poly*np.exp(-x**2))
+
+
 class PycOccurrenceDistribution(OccurrenceDistributionModel):
-    
+    """ Occurrence distribution with vectorized sampling and evaluation
+    (parameters must be numbers, not variables, for these methods) """
+
+    bkd_law_type: typing.ClassVar[str] = None
+
     @classmethod
     def from_bkd(basecls, pyc_occ_law):
-        if pyc_occ_law.name() == "delay":
+        law_name = pyc_occ_law.name()
+        if law_name == "delay":
             return DelayOccDistribution(time=pyc_occ_law.parameter(0),
                                         bkd=pyc_occ_law)
-        elif pyc_occ_law.name() == "exp":
+        elif law_name == "exp":
             return ExpOccDistribution(rate=pyc_occ_law.parameter(0),
                                       bkd=pyc_occ_law)
+        elif law_name == "weibull":
+            return WeibullOccDistribution(scale=pyc_occ_law.parameter(0),
+                                          shape=pyc_occ_law.parameter(1),
+                                          bkd=pyc_occ_law)
+        elif law_name == "lognormal":
+            return LognormalOccDistribution(mu=pyc_occ_law.parameter(0),
+                                            sigma=pyc_occ_law.parameter(1),
+                                            bkd=pyc_occ_law)
+        elif law_name == "uniform":
+            return UniformOccDistribution(low=pyc_occ_law.parameter(0),
+                                          high=pyc_occ_law.parameter(1),
+                                          bkd=pyc_occ_law)
         else:
             raise ValueError(f"Pycatshoo distribution {pyc_occ_law.name()} is not supported by COD3S")
 
+    def get_bkd_params(self):
+        raise NotImplementedError("method get_bkd_params must be overloaded")
+
+    def to_bkd(self, comp_bkd):
+        law_type = getattr(pyc.TLawType, self.bkd_law_type, None) \
+            if self.bkd_law_type else None
+        if law_type is None:
+            raise NotImplementedError(f"Distribution {type(self).__name__} has no Pycatshoo counterpart")
+        return pyc.IDistLaw.newLaw(comp_bkd, law_type,
+                                   *self.get_bkd_params())
+
+    def sample(self, size, rng=None):
+        raise NotImplementedError("method sample must be overloaded")
+
+    def cdf(self, t):
+        raise NotImplementedError("method cdf must be overloaded")
+
+    def pdf(self, t):
+        raise NotImplementedError("method pdf must be overloaded")
+
+    def survival(self, t):
+        return 1 - self.cdf(t)
+
+    def hazard(self, t):
+        """ Occurrence rate given no occurrence before t, infinite once
+        the occurrence is certain (null survival) """
+        survival = self.survival(t)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(survival > 0, self.pdf(t)/survival, np.inf)
+
 
 class DelayOccDistribution(PycOccurrenceDistribution):
     time: typing.Any = pydantic.Field(0, description="Delay duration (could be a variable)")
 
-    def to_bkd(self, comp_bkd):
-        return pyc.IDistLaw.newLaw(
-            comp_bkd, pyc.TLawType.defer, self.time)
+    bkd_law_type: typing.ClassVar[str] = "defer"
+
+    def get_bkd_params(self):
+        return [self.time]
+
+    def sample(self, size, rng=None):
+        return np.full(size, float(self.time))
 
+    def cdf(self, t):
+        return (np.asarray(t, dtype=float) >= self.time).astype(float)
+
+    def pdf(self, t):
+        # Dirac distribution: no density
+        return np.zeros_like(np.asarray(t, dtype=float))
+
+    def hazard(self, t):
+        return np.where(np.asarray(t, dtype=float) >= self.time, np.inf, 0.)
 
     def __str__(self):
         return f"delay({self.time})"
-    
+
+
 class ExpOccDistribution(PycOccurrenceDistribution):
     rate: typing.Any = pydantic.Field(0, description="Occurrence rate (could be a variable)")
 
-    def to_bkd(self, comp_bkd):
-        return pyc.IDistLaw.newLaw(
-            comp_bkd, pyc.TLawType.expo, self.rate)
+    bkd_law_type: typing.ClassVar[str] = "expo"
+
+    def get_bkd_params(self):
+        return [self.rate]
+
+    def sample(self, size, rng=None):
+        rng = np.random.default_rng() if rng is None else rng
+        return rng.exponential(1/self.rate, size)
+
+    def cdf(self, t):
+        t = np.maximum(np.asarray(t, dtype=float), 0)
+        return -np.expm1(-self.rate*t)
+
+    def pdf(self, t):
+        t = np.asarray(t, dtype=float)
+        return np.where(t >= 0, self.rate*np.exp(-self.rate*t), 0.)
+
+    def hazard(self, t):
+        return np.full_like(np.asarray(t, dtype=float), self.rate)
 
     def __str__(self):
         return f"exp({self.rate})"
 
+
+class WeibullOccDistribution(PycOccurrenceDistribution):
+    scale: float = pydantic.Field(1, description="Scale parameter")
+    shape: float = pydantic.Field(1, description="Shape parameter (>1 for ageing)")
+
+    bkd_law_type: typing.ClassVar[str] = "weibull"
+
+    def get_bkd_params(self):
+        return [self.scale, self.shape]
+
+    def sample(self, size, rng=None):
+        rng = np.random.default_rng() if rng is None else rng
+        return self.scale*rng.weibull(self.shape, size)
+
+    def cdf(self, t):
+        t = np.maximum(np.asarray(t, dtype=float), 0)
+        return -np.expm1(-(t/self.scale)**self.shape)
+
+    def pdf(self, t):
+        t = np.maximum(np.asarray(t, dtype=float), 0)
+        z = t/self.scale
+        return self.shape/self.scale*z**(self.shape - 1)*np.exp(-z**self.shape)
+
+    def hazard(self, t):
+        t = np.maximum(np.asarray(t, dtype=float), 0)
+        return self.shape/self.scale*(t/self.scale)**(self.shape - 1)
+
+    def __str__(self):
+        return f"weibull({self.scale}, {self.shape})"
+
+
+class LognormalOccDistribution(PycOccurrenceDistribution):
+    mu: float = pydantic.Field(0, description="Mean of the log of durations")
+    sigma: float = pydantic.Field(1, description="Standard deviation of the log of durations")
+
+    bkd_law_type: typing.ClassVar[str] = "lognormal"
+
+    def get_bkd_params(self):
+        return [self.mu, self.sigma]
+
+    def sample(self, size, rng=None):
+        rng = np.random.default_rng() if rng is None else rng
+        return rng.lognormal(self.mu, self.sigma, size)
+
+    def cdf(self, t):
+        t = np.asarray(t, dtype=float)
+        with np.errstate(divide="ignore"):
+            z = (np.log(np.maximum(t, 0)) - self.mu)/(self.sigma*np.sqrt(2))
+        return 0.5*(1 + erf(z))
+
+    def pdf(self, t):
+        t = np.asarray(t, dtype=float)
+        t_pos = np.where(t > 0, t, 1)
+        dens = np.exp(-(np.log(t_pos) - self.mu)**2/(2*self.sigma**2)) / \
+            (t_pos*self.sigma*np.sqrt(2*np.pi))
+        return np.where(t > 0, dens, 0.)
+
+    def __str__(self):
+        return f"lognormal({self.mu}, {self.sigma})"
+
+
+class UniformOccDistribution(PycOccurrenceDistribution):
+    low: float = pydantic.Field(0, description="Lower bound")
+    high: float = pydantic.Field(1, description="Upper bound")
+
+    bkd_law_type: typing.ClassVar[str] = "uniform"
+
+    def get_bkd_params(self):
+        return [self.low, self.high]
+
+    def sample(self, size, rng=None):
+        rng = np.random.default_rng() if rng is None else rng
+        return rng.uniform(self.low, self.high, size)
+
+    def cdf(self, t):
+        t = np.asarray(t, dtype=float)
+        return np.clip((t - self.low)/(self.high - self.low), 0, 1)
+
+    def pdf(self, t):
+        t = np.asarray(t, dtype=float)
+        return np.where((t >= self.low) & (t <= self.high),
+                        1/(self.high - self.low), 0.)
+
+    def __str__(self):
+        return f"uniform({self.low}, {self.high})"
+
+
+class EmpiricalOccDistribution(PycOccurrenceDistribution):
+    """ Tabulated distribution over observed durations """
+    values: typing.List[float] = pydantic.Field(..., description="Durations")
+    weights: typing.List[float] = pydantic.Field(
+        None, description="Durations weights (uniform if None)")
+
+    @pydantic.validator('weights', always=True)
+    def check_weights(cls, value, values, **kwargs):
+        if value is None:
+            return None
+        if len(value) != len(values.get("values", [])):
+            raise ValueError("Weights and values must have the same length")
+        return value
+
+    def get_table(self):
+        values = np.asarray(self.values, dtype=float)
+        weights = np.ones(len(values)) if self.weights is None \
+            else np.asarray(self.weights, dtype=float)
+        order = np.argsort(values)
+        return values[order], weights[order]/weights.sum()
+
+    def sample(self, size, rng=None):
+        rng = np.random.default_rng() if rng is None else rng
+        values, probs = self.get_table()
+        return rng.choice(values, size=size, p=probs)
+
+    def cdf(self, t):
+        values, probs = self.get_table()
+        cum_probs = np.concatenate([[0.], np.cumsum(probs)])
+        idx = np.searchsorted(values, np.asarray(t, dtype=float),
+                              side="right")
+        return cum_probs[idx]
+
+    def pdf(self, t):
+        # Discrete distribution: no density
+        return np.zeros_like(np.asarray(t, dtype=float))
+
+    def hazard(self, t):
+        raise NotImplementedError("Hazard of a discrete distribution is not defined")
+
+    def __str__(self):
+        return f"empirical({len(self.values)} values)"
+
+
+class MixedOccDistribution(PycOccurrenceDistribution):
+    """ Mixture of distributions """
+    components: typing.List[PycOccurrenceDistribution] = \
+        pydantic.Field(..., description="Mixture components")
+    weights: typing.List[float] = pydantic.Field(..., description="Components weights")
+
+    @pydantic.validator('components', pre=True)
+    def check_components(cls, value, values, **kwargs):
+        return [comp if isinstance(comp, OccurrenceDistributionModel)
+                else OccurrenceDistributionModel.from_dict(**comp)
+                for comp in value]
+
+    def get_probs(self):
+        weights = np.asarray(self.weights, dtype=float)
+        return weights/weights.sum()
+
+    def sample(self, size, rng=None):
+        rng = np.random.default_rng() if rng is None else rng
+        comp_idx = rng.choice(len(self.components), size=size,
+                              p=self.get_probs())
+        samples = np.empty(size)
+        for idx, comp in enumerate(self.components):
+            sel = comp_idx == idx
+            samples[sel] = comp.sample(int(sel.sum()), rng=rng)
+        return samples
+
+    def cdf(self, t):
+        return sum(prob*comp.cdf(t)
+                   for prob, comp in zip(self.get_probs(), self.components))
+
+    def pdf(self, t):
+        return sum(prob*comp.pdf(t)
+                   for prob, comp in zip(self.get_probs(), self.components))
+
+    def __str__(self):
+        comp_str = ", ".join(f"{weight}*{comp}"
+                             for weight, comp in zip(self.weights,
+                                                     self.components))
+        return f"mixed({comp_str})"
+
+
 class PycTransition(TransitionModel):
 
     is_interruptible: bool = \
@@ -219,7 +495,8 @@ class PycAutomaton(AutomatonModel):
     
     @pydantic.validator('transitions', pre=True)
     def check_transitions(cls, value, values, **kwargs):
-        value = [PycTransition(**v) for v in value]
+        value = [v if isinstance(v, PycTransition) else PycTransition(**v)
+                 for v in value]
         return value
 
     def update_bkd(self, comp):
@@ -237,7 +514,7 @@ class PycAutomaton(AutomatonModel):
          for trans in self.transitions]
 
     @classmethod
-    def from_bkd(basecls, bkd):
+    def from_bkd(basecls, bkd, with_transitions=False):
         aut = basecls(
             id=bkd.name(),
             name=bkd.basename(),
@@ -245,14 +522,10 @@ class PycAutomaton(AutomatonModel):
             states=[PycState.from_bkd(state)
                     for state in bkd.states()],
             init_state=bkd.initState().basename(),
+            transitions=[PycTransition.from_bkd(trans)
+                         for trans in get_transitions_bkd(bkd)]
+            if with_transitions else [],
             bkd=bkd)
-        # aut.states = [PycState.from_bkd(state)
-        #               for state in bkd.states()]
-        
-        
-        # ipdb.set_trace()
-        # aut.transitions = [PycTransition.from_bkd(trans)
-        #                    for trans in trans_list_bkd]
         
         return aut
     
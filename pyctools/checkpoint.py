@@ -0,0 +1,67 @@
+import typing
+import pydantic
+import pickle
+import os
+import pkg_resources
+from .core import BaseModel
+from .indicator import PycIndicatorAccumulator
+
+installed_pkg = {pkg.key for pkg in pkg_resources.working_set}
+if 'ipdb' in installed_pkg:
+    import ipdb  # noqa: 401
+
+
+class PycCheckpoint(BaseModel):
+    """ State of a batched Monte Carlo campaign """
+    simu_params: dict = pydantic.Field(
+        {}, description="Simulation parameters of the campaign")
+    batch_next: int = pydantic.Field(
+        0, description="Index of the next batch to be simulated")
+    fingerprint: str = pydantic.Field(
+        None, description="Fingerprint of the simulated system")
+    accumulators: typing.Dict[str, PycIndicatorAccumulator] = pydantic.Field(
+        {}, description="Partial estimates indexed by indicator name")
+
+    @classmethod
+    def from_system(basecls, system, batch_next, fingerprint=None):
+        return basecls(
+            simu_params=system.simu_params.dict(),
+            batch_next=batch_next,
+            fingerprint=fingerprint,
+            accumulators={name: indic.accumulator
+                          for name, indic in system.indicators.items()
+                          if indic.accumulator is not None})
+
+    def nb_runs_done(self):
+        """ Number of sequences simulated so far """
+        counts = {acc.count for acc in self.accumulators.values()}
+        if len(counts) > 1:
+            raise ValueError("Checkpoint accumulators have different numbers of sequences")
+        return counts.pop() if counts else 0
+
+    def save(self, filename):
+        """ Atomic write: a simulation killed while saving leaves
+        the previous checkpoint untouched """
+        data = {
+            "simu_params": self.simu_params,
+            "batch_next": self.batch_next,
+            "fingerprint": self.fingerprint,
+            "accumulators": {name: acc.to_dict()
+                             for name, acc in self.accumulators.items()},
+        }
+        filename_tmp = f"{filename}.tmp"
+        with open(filename_tmp, "wb") as file:
+            pickle.dump(data, file)
+        os.replace(filename_tmp, filename)
+
+    @classmethod
+    def load(basecls, filename):
+        with open(filename, "rb") as file:
+            data = pickle.load(file)
+
+        return basecls(
+            simu_params=data["simu_params"],
+            batch_next=data["batch_next"],
+            fingerprint=data.get("fingerprint"),
+            accumulators={name: PycIndicatorAccumulator(**acc)
+                          for name, acc in data["accumulators"].items()})
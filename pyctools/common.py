@@ -1,4 +1,6 @@
 import Pycatshoo as pyc
+import hashlib
+import json
 
 
 def get_pyc_type(var_type):
@@ -11,3 +13,34 @@ def get_pyc_type(var_type):
     else:
         raise ValueError(
             f"Type {var_type} not supported by PyCATSHOO")
+
+
+def get_obj_ref(obj):
+    """ Returns an importable "module:name" reference of obj
+    (strings are assumed to be references already)"""
+    if isinstance(obj, str):
+        return obj
+    module_name = getattr(obj, "__module__", None)
+    obj_name = getattr(obj, "__qualname__", None)
+    if module_name is None or obj_name is None or "<" in obj_name:
+        # Lambdas, local functions, partials, etc. cannot be imported
+        raise ValueError(f"{obj!r} has no importable reference, use a module level function or class")
+    return f"{module_name}:{obj_name}"
+
+
+def load_obj_ref(ref):
+    """ Loads the object referenced by a "module:name" string
+    (non string objects are returned as is)"""
+    if not isinstance(ref, str):
+        return ref
+    module_name, obj_name = ref.split(":")
+    obj = __import__(module_name, fromlist=[obj_name])
+    for attr in obj_name.split("."):
+        obj = getattr(obj, attr)
+    return obj
+
+
+def spec_hash(specs):
+    """ Canonical hash of a JSON-like specification """
+    specs_str = json.dumps(specs, sort_keys=True, default=str)
+    return hashlib.sha1(specs_str.encode("utf-8")).hexdigest()
@@ -0,0 +1,259 @@
+import math
+import typing
+import pydantic
+import numpy as np
+import pandas as pd
+import pkg_resources
+from .core import BaseModel
+installed_pkg = {pkg.key for pkg in pkg_resources.working_set}
+if 'ipdb' in installed_pkg:
+    import ipdb  # noqa: F401
+
+
+PandasDataFrame = typing.TypeVar('pd.core.dataframe')
+
+DIFF_COLUMNS = ["name", "instant", "mean_a", "mean_b", "stddev_a", "stddev_b",
+                "diff", "z", "p_value", "p_adjusted"]
+
+erfc = np.frompyfunc(math.erfc, 1, 1)
+
+
+def hash_keys(names, instants):
+    """ 64 bits join keys of (indicator name, instant) points """
+    return pd.util.hash_pandas_object(
+        pd.DataFrame({"name": np.asarray(names, dtype=object),
+                      "instant": np.asarray(instants, dtype=float)}),
+        index=False).to_numpy()
+
+
+def iter_result_chunks(results):
+    """ Result frames (name, stat, instant, values columns) of a
+    DataFrame, an iterable of DataFrames (e.g. read_csv with chunksize)
+    or a simulated system (one frame per indicator, the stddev is
+    read from the backend if it is not a computed stat) """
+    if isinstance(results, pd.DataFrame):
+        yield results
+    elif hasattr(results, "indicators"):
+        for indic in results.indicators.values():
+            instants = np.asarray(indic.instants, dtype=float)
+            stddevs = indic.get_stat_values("stddev") \
+                if "stddev" in indic.stats \
+                else np.asarray(indic.to_pyc_stats("stddev")(), dtype=float)
+            yield pd.DataFrame({
+                "name": indic.name,
+                "stat": np.repeat(["mean", "stddev"], len(instants)),
+                "instant": np.tile(instants, 2),
+                "values": np.concatenate([indic.get_stat_values("mean"),
+                                          stddevs])})
+    else:
+        yield from results
+
+
+def pair_stats(chunk):
+    """ (keys, names, instants, means, stddevs) of the points whose
+    mean and stddev are both in chunk, and the other rows """
+    chunk = chunk[chunk["stat"].isin(["mean", "stddev"])]
+    is_mean = (chunk["stat"] == "mean").to_numpy()
+    keys = hash_keys(chunk["name"], chunk["instant"])
+
+    keys_std = keys[~is_mean]
+    order = np.argsort(keys_std, kind="stable")
+    keys_std_sorted = keys_std[order]
+    values_std = chunk["values"].to_numpy(dtype=float)[~is_mean][order]
+
+    keys_mean = keys[is_mean]
+    pos = np.minimum(np.searchsorted(keys_std_sorted, keys_mean),
+                     max(len(keys_std_sorted) - 1, 0))
+    paired = keys_std_sorted[pos] == keys_mean \
+        if len(keys_std_sorted) else np.zeros(len(keys_mean), dtype=bool)
+
+    mean_df = chunk[is_mean]
+    points = (keys_mean[paired],
+              mean_df["name"].to_numpy()[paired],
+              mean_df["instant"].to_numpy(dtype=float)[paired],
+              mean_df["values"].to_numpy(dtype=float)[paired],
+              values_std[pos[paired]])
+
+    std_paired = np.zeros(len(keys_std), dtype=bool)
+    std_paired[order[np.isin(keys_std_sorted, keys_mean[paired])]] = True
+    rest = pd.concat([mean_df[~paired], chunk[~is_mean][~std_paired]],
+                     axis=0, ignore_index=True)
+
+    return points, rest
+
+
+def iter_points(results):
+    """ Streams paired (mean, stddev) points, rows of a point may be
+    split over consecutive chunks """
+    rest = None
+    for chunk in iter_result_chunks(results):
+        if rest is not None and len(rest) > 0:
+            chunk = pd.concat([rest, chunk], axis=0, ignore_index=True)
+        points, rest = pair_stats(chunk)
+        yield points
+    if rest is not None:
+        # Points without stddev cannot be tested
+        yield (rest["stat"] == "mean").sum()
+
+
+class PycResultIndex:
+    """ Points of a result set sorted by join key """
+
+    def __init__(self, results):
+        keys_list, means_list, stddevs_list = [], [], []
+        self.nb_untestable = 0
+        for points in iter_points(results):
+            if not isinstance(points, tuple):
+                self.nb_untestable += int(points)
+                continue
+            keys_list.append(points[0])
+            means_list.append(points[3])
+            stddevs_list.append(points[4])
+
+        keys = np.concatenate(keys_list + [np.array([], dtype=np.uint64)])
+        order = np.argsort(keys, kind="stable")
+        self.keys = keys[order]
+        self.means = np.concatenate(means_list + [np.array([])])[order]
+        self.stddevs = np.concatenate(stddevs_list + [np.array([])])[order]
+
+    def __len__(self):
+        return len(self.keys)
+
+    def lookup(self, keys):
+        """ Positions of keys and found mask """
+        if len(self.keys) == 0:
+            return np.zeros(len(keys), dtype=int), \
+                np.zeros(len(keys), dtype=bool)
+        pos = np.minimum(np.searchsorted(self.keys, keys), len(self.keys) - 1)
+        return pos, self.keys[pos] == keys
+
+
+def z_test(mean_a, stddev_a, nb_runs_a, mean_b, stddev_b, nb_runs_b):
+    """ Two-sided z-test of equal means (z, p-value), exact equality
+    without noise gives p = 1 and a difference without noise p = 0 """
+    diff = mean_a - mean_b
+    stderr = np.sqrt(stddev_a**2/nb_runs_a + stddev_b**2/nb_runs_b)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        z = np.where(stderr > 0, diff/stderr,
+                     np.where(diff == 0, 0., np.sign(diff)*np.inf))
+    p_value = erfc(np.abs(z)/math.sqrt(2)).astype(float)
+    return z, p_value
+
+
+def adjust_p_values(p_values, p_all, method):
+    """ Adjusted p-values of p_values among the p_all tested ones """
+    nb_tests = len(p_all)
+    if method == "bonferroni":
+        return np.minimum(p_values*nb_tests, 1)
+    elif method == "bh":
+        # Benjamini-Hochberg: min over j >= i of p_(j)*m/j
+        p_sorted = np.sort(p_all)
+        adjusted = p_sorted*nb_tests/np.arange(1, nb_tests + 1)
+        adjusted = np.minimum.accumulate(adjusted[::-1])[::-1]
+        rank = np.searchsorted(p_sorted, p_values, side="right") - 1
+        return np.minimum(adjusted[rank], 1)
+    else:
+        raise ValueError(f"Correction {method} not supported")
+
+
+class PycResultDiff(BaseModel):
+    """ Significant indicator changes between two result sets """
+    alpha: float = pydantic.Field(0.05, description="Significance level")
+    correction: str = pydantic.Field(
+        "bh", description="Multiple testing correction: bh (Benjamini-Hochberg, false discovery rate) or bonferroni (family-wise error rate)")
+    nb_tests: int = pydantic.Field(0, description="Number of tested points")
+    nb_only_a: int = pydantic.Field(0, description="Points of A not in B")
+    nb_only_b: int = pydantic.Field(0, description="Points of B not in A")
+    nb_untestable: int = pydantic.Field(
+        0, description="Points without stddev")
+    changes: PandasDataFrame = pydantic.Field(
+        None, description="Significant changes sorted by p-value")
+
+    def changed_indicators(self):
+        return list(self.changes["name"].unique())
+
+
+def get_nb_runs(results, param_name):
+    simu_params = getattr(results, "simu_params", None)
+    if simu_params is None:
+        raise ValueError(f"Number of runs unknown for DataFrame results, set {param_name}")
+    return simu_params.nb_runs
+
+
+def result_diff(results_a, results_b, nb_runs_a=None, nb_runs_b=None,
+                alpha=0.05, correction="bh"):
+    """ Points (indicator, instant) whose mean changed significantly
+    from results B (reference) to results A.
+
+    Results are DataFrames, iterables of DataFrame chunks (see
+    iter_result_chunks) or simulated systems, with mean and stddev
+    stats. B is indexed by hashed (name, instant) keys, A is streamed:
+    only the p-values of all points and the rows of the points below
+    alpha are kept. Numbers of runs default to the systems ones and
+    are required for DataFrame results.
+    """
+    if not (correction in ["bh", "bonferroni"]):
+        raise ValueError(f"Correction {correction} not supported")
+
+    if nb_runs_a is None:
+        nb_runs_a = get_nb_runs(results_a, "nb_runs_a")
+    if nb_runs_b is None:
+        nb_runs_b = get_nb_runs(results_b, "nb_runs_b")
+
+    index_b = PycResultIndex(results_b)
+    found_b = np.zeros(len(index_b), dtype=bool)
+
+    p_list = []
+    candidates_list = []
+    nb_only_a = 0
+    nb_untestable = index_b.nb_untestable
+    for points in iter_points(results_a):
+        if not isinstance(points, tuple):
+            nb_untestable += int(points)
+            continue
+        keys, names, instants, means, stddevs = points
+        pos, found = index_b.lookup(keys)
+        nb_only_a += int((~found).sum())
+        pos = pos[found]
+        found_b[pos] = True
+
+        z, p_value = z_test(means[found], stddevs[found], nb_runs_a,
+                            index_b.means[pos], index_b.stddevs[pos],
+                            nb_runs_b)
+        p_list.append(p_value)
+
+        # Adjusted p-values are never below raw ones
+        cand = p_value <= alpha
+        candidates_list.append(pd.DataFrame({
+            "name": names[found][cand],
+            "instant": instants[found][cand],
+            "mean_a": means[found][cand],
+            "mean_b": index_b.means[pos][cand],
+            "stddev_a": stddevs[found][cand],
+            "stddev_b": index_b.stddevs[pos][cand],
+            "diff": means[found][cand] - index_b.means[pos][cand],
+            "z": z[cand],
+            "p_value": p_value[cand]}))
+
+    p_all = np.concatenate(p_list + [np.array([])])
+    if candidates_list:
+        changes = pd.concat(candidates_list, axis=0, ignore_index=True)
+    else:
+        changes = pd.DataFrame({col: pd.Series(dtype=float)
+                                for col in DIFF_COLUMNS[:-1]})
+    # Same name dtype whatever the chunks (empty ones are not strings)
+    changes = changes.astype({"name": object})
+    changes["p_adjusted"] = \
+        adjust_p_values(changes["p_value"].to_numpy(dtype=float), p_all,
+                        correction)
+    changes = changes[changes["p_adjusted"] <= alpha]\
+        .sort_values("p_value", kind="stable")\
+        .reset_index(drop=True)[DIFF_COLUMNS]
+
+    return PycResultDiff(alpha=alpha,
+                         correction=correction,
+                         nb_tests=len(p_all),
+                         nb_only_a=nb_only_a,
+                         nb_only_b=int((~found_b).sum()),
+                         nb_untestable=nb_untestable,
+                         changes=changes)
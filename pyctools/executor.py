@@ -0,0 +1,340 @@
+import concurrent.futures
+import os
+import multiprocessing
+import pickle
+import subprocess
+import sys
+import threading
+import time
+import uuid
+import pydantic
+import typing
+import pkg_resources
+from .core import BaseModel
+from .indicator import PycIndicatorAccumulator
+installed_pkg = {pkg.key for pkg in pkg_resources.working_set}
+if 'ipdb' in installed_pkg:
+    import ipdb  # noqa: F401
+
+
+class PycBatchTask(BaseModel):
+    """ Simulation of one batch of a campaign on a worker """
+    study: typing.Any = pydantic.Field(
+        ..., description="Model specification (PycStudy)")
+    simu_params: dict = pydantic.Field(
+        ..., description="Campaign simulation parameters")
+    batch_idx: int = pydantic.Field(..., description="Batch index")
+
+
+def run_batch_task(task):
+    """ Worker entry point: partial indicator accumulators of a batch """
+    from .system import PycMCSimulationParam
+
+    simu_params = PycMCSimulationParam(**task.simu_params)
+    nb_runs_batch = simu_params.get_batch_nb_runs(task.batch_idx)
+
+    study = task.study.copy(update={"simu_params": simu_params})
+    system = study.get_system()
+    system.simulate(**dict(task.simu_params,
+                           nb_runs=nb_runs_batch,
+                           seed=simu_params.get_batch_seed(task.batch_idx),
+                           batch_size=None,
+                           checkpoint_path=None))
+
+    accumulators = {}
+    for indic_name, indic in system.indicators.items():
+        indic.accumulate(nb_runs_batch)
+        accumulators[indic_name] = indic.accumulator.to_dict()
+        indic.accumulator = None
+
+    return accumulators
+
+
+def merge_batch_results(results):
+    """ Merges batch accumulators in batch order so that the result
+    does not depend on completion order """
+    accumulators = {}
+    for batch_idx in sorted(results):
+        for indic_name, acc in results[batch_idx].items():
+            accumulators.setdefault(indic_name, PycIndicatorAccumulator())\
+                        .merge(PycIndicatorAccumulator(**acc))
+    return accumulators
+
+
+class PycExecutor:
+    """ Executes batch tasks, failed tasks are retried up to
+    max_retries times """
+    nb_tasks_hint = 16
+
+    def map_tasks(self, fun, tasks):
+        """ Yields (task index, result) in completion order """
+        raise NotImplementedError("method map_tasks must be overloaded")
+
+
+class PycLocalExecutor(PycExecutor):
+    """ Process pool on the local host
+
+    A worker lost during a task breaks the whole pool and all its
+    running tasks fail: they are rerun one at a time in a single
+    worker pool and only a task breaking the pool on its own is
+    charged a retry.
+    """
+
+    def __init__(self, max_workers=None, max_retries=3):
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.nb_tasks_hint = 4*(max_workers or os.cpu_count() or 1)
+        self.nb_retries = []
+
+    def map_tasks(self, fun, tasks):
+
+        self.nb_retries = [0]*len(tasks)
+        pending = set(range(len(tasks)))
+        # Tasks running when a pool broke
+        suspects = set()
+
+        while pending:
+            # A lost worker breaks the pool: a new pool is created
+            # for the remaining tasks
+            isolate = bool(suspects)
+            # Synchronous queue: a start is reported before the task runs
+            started_queue = multiprocessing.get_context().SimpleQueue()
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=1 if isolate else self.max_workers,
+                    initializer=set_started_queue,
+                    initargs=(started_queue,)) as pool:
+                futures = {pool.submit(run_started, fun, tasks[idx], idx): idx
+                           for idx in (sorted(suspects)[:1] if isolate
+                                       else sorted(pending))}
+                while futures:
+                    done, _ = concurrent.futures.wait(
+                        futures,
+                        return_when=concurrent.futures.FIRST_COMPLETED)
+                    pool_broken = False
+                    for future in done:
+                        idx = futures.pop(future)
+                        try:
+                            result = future.result()
+                        except concurrent.futures.process.BrokenProcessPool:
+                            pool_broken = True
+                            continue
+                        except Exception:
+                            self.check_retry(idx)
+                            futures[pool.submit(run_started, fun,
+                                                tasks[idx], idx)] = idx
+                            continue
+                        pending.discard(idx)
+                        suspects.discard(idx)
+                        yield idx, result
+                    if pool_broken:
+                        if not isolate:
+                            suspects = drain_queue(started_queue) & pending \
+                                or set(pending)
+                        if isolate or len(suspects) == 1:
+                            self.check_retry(min(suspects))
+                        break
+            started_queue.close()
+
+    def check_retry(self, idx):
+        self.nb_retries[idx] += 1
+        if self.nb_retries[idx] > self.max_retries:
+            raise RuntimeError(f"Task {idx} failed {self.nb_retries[idx]} times")
+
+
+STARTED_QUEUE = [None]
+
+
+def set_started_queue(queue):
+    """ Pool worker initializer """
+    STARTED_QUEUE[0] = queue
+
+
+def run_started(fun, task, idx):
+    """ Pool worker entry point reporting the start of task idx """
+    STARTED_QUEUE[0].put(idx)
+    return fun(task)
+
+
+def drain_queue(queue):
+    items = set()
+    while not queue.empty():
+        items.add(queue.get())
+    return items
+
+
+class PycFileQueueExecutor(PycExecutor):
+    """ Task queue in a directory shared by the nodes (e.g. NFS)
+
+    Workers (run_worker, e.g. started on each node with
+    `python -c "from pyctools.executor import run_worker; run_worker('<path>')"`) claim
+    tasks by atomic rename from tasks/ to running/ under a name unique
+    to the claim and write results in results/. Claims whose heartbeat
+    is older than timeout are requeued, so a lost worker only delays
+    its task. Without any worker alive, tasks are never claimed:
+    map_tasks raises TimeoutError after global_timeout seconds.
+    """
+
+    def __init__(self, path, timeout=60, max_retries=3, poll_period=0.2,
+                 nb_tasks_hint=64, global_timeout=None):
+        self.path = path
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.poll_period = poll_period
+        self.nb_tasks_hint = nb_tasks_hint
+        self.global_timeout = global_timeout
+        for dirname in ["tasks", "running", "results"]:
+            os.makedirs(os.path.join(path, dirname), exist_ok=True)
+
+    def get_filename(self, dirname, task_name, ext="pkl"):
+        return os.path.join(self.path, dirname, f"{task_name}.{ext}")
+
+    def submit(self, task_name, fun, task):
+        write_pickle(self.get_filename("tasks", task_name), (fun, task))
+
+    def get_claims(self):
+        """ Running claim filenames indexed by task name """
+        claims = {}
+        for filename in os.listdir(os.path.join(self.path, "running")):
+            claims.setdefault(filename.split(".")[0], []).append(
+                os.path.join(self.path, "running", filename))
+        return claims
+
+    def map_tasks(self, fun, tasks):
+
+        run_id = uuid.uuid4().hex
+        task_names = [f"{run_id}-{idx}" for idx in range(len(tasks))]
+        nb_retries = [0]*len(tasks)
+
+        for task_name, task in zip(task_names, tasks):
+            self.submit(task_name, fun, task)
+
+        time_start = time.time()
+        pending = set(range(len(tasks)))
+        try:
+            while pending:
+                claims = self.get_claims()
+                for idx in sorted(pending):
+                    task_name = task_names[idx]
+                    result_filename = self.get_filename("results", task_name)
+                    error_filename = self.get_filename("results", task_name,
+                                                       "err")
+
+                    if os.path.exists(result_filename):
+                        result = read_pickle(result_filename)
+                        os.remove(result_filename)
+                        pending.discard(idx)
+                        yield idx, result
+                    elif os.path.exists(error_filename):
+                        os.remove(error_filename)
+                        self.retry(idx, task_names, fun, tasks, nb_retries)
+                    else:
+                        for claim_filename in claims.get(task_name, []):
+                            try:
+                                heartbeat = os.path.getmtime(claim_filename)
+                            except FileNotFoundError:
+                                continue
+                            if time.time() - heartbeat > self.timeout:
+                                # Only this claim is dropped, a late
+                                # worker cannot remove a newer claim
+                                os.remove(claim_filename)
+                                self.retry(idx, task_names, fun, tasks,
+                                           nb_retries)
+
+                if pending and self.global_timeout is not None and \
+                   time.time() - time_start > self.global_timeout:
+                    raise TimeoutError(f"{len(pending)} tasks not completed after {self.global_timeout} s (no worker alive?)")
+                if pending:
+                    time.sleep(self.poll_period)
+        finally:
+            # Tasks requeued while their first worker completed them
+            # or left after an error
+            for dirname in ["tasks", "results"]:
+                for filename in os.listdir(os.path.join(self.path, dirname)):
+                    if filename.startswith(run_id):
+                        os.remove(os.path.join(self.path, dirname, filename))
+
+    def retry(self, idx, task_names, fun, tasks, nb_retries):
+        nb_retries[idx] += 1
+        if nb_retries[idx] > self.max_retries:
+            raise RuntimeError(f"Task {idx} failed {nb_retries[idx]} times")
+        self.submit(task_names[idx], fun, tasks[idx])
+
+    def start_local_workers(self, nb_workers):
+        """ Starts workers on the local host (e.g. for testing) """
+        cmd = "from pyctools.executor import run_worker; " \
+            f"run_worker({self.path!r}, timeout={self.timeout!r})"
+        return [subprocess.Popen([sys.executable, "-c", cmd])
+                for _ in range(nb_workers)]
+
+    def stop_workers(self):
+        open(os.path.join(self.path, "stop"), "w").close()
+
+
+def write_pickle(filename, obj):
+    filename_tmp = f"{filename}.{uuid.uuid4().hex}.tmp"
+    with open(filename_tmp, "wb") as file:
+        pickle.dump(obj, file)
+    os.replace(filename_tmp, filename)
+
+
+def read_pickle(filename):
+    with open(filename, "rb") as file:
+        return pickle.load(file)
+
+
+def run_worker(path, timeout=60, poll_period=0.2):
+    """ File queue worker loop, stops when a stop file is created in
+    path """
+    tasks_dir = os.path.join(path, "tasks")
+    running_dir = os.path.join(path, "running")
+    results_dir = os.path.join(path, "results")
+
+    while not os.path.exists(os.path.join(path, "stop")):
+        task_files = sorted(filename for filename in os.listdir(tasks_dir)
+                            if filename.endswith(".pkl"))
+        if not task_files:
+            time.sleep(poll_period)
+            continue
+
+        for task_file in task_files:
+            # Claim name is unique: a requeued task claimed again by
+            # another worker does not share its running file
+            running_filename = os.path.join(
+                running_dir,
+                f"{task_file[:-len('.pkl')]}.{uuid.uuid4().hex}.pkl")
+            try:
+                os.rename(os.path.join(tasks_dir, task_file),
+                          running_filename)
+            except FileNotFoundError:
+                # Claimed by another worker
+                continue
+
+            stop_heartbeat = threading.Event()
+            heartbeat = threading.Thread(
+                target=touch_until, args=(running_filename,
+                                          stop_heartbeat, timeout/4),
+                daemon=True)
+            heartbeat.start()
+
+            result_filename = os.path.join(results_dir, task_file)
+            try:
+                fun, task = read_pickle(running_filename)
+                write_pickle(result_filename, fun(task))
+            except Exception as error:
+                write_pickle(result_filename[:-len(".pkl")] + ".err",
+                             repr(error))
+            finally:
+                stop_heartbeat.set()
+                heartbeat.join()
+                if os.path.exists(running_filename):
+                    os.remove(running_filename)
+            break
+
+
+def touch_until(filename, stop_event, period):
+    while not stop_event.wait(period):
+        try:
+            os.utime(filename)
+        except FileNotFoundError:
+            return
+
@@ -0,0 +1,291 @@
+import ast
+import sys
+import numpy as np
+import pkg_resources
+from .state import PycVarSelection
+installed_pkg = {pkg.key for pkg in pkg_resources.working_set}
+if 'ipdb' in installed_pkg:
+    import ipdb  # noqa: F401
+
+
+AGGREGATIONS = {
+    "sum": "sum",
+    "mean": "mean",
+    "min": "min",
+    "max": "max",
+    "any": "any",
+    "all": "all",
+}
+
+COMPARISONS = {
+    ast.Eq: "equal",
+    ast.NotEq: "not_equal",
+    ast.Lt: "less",
+    ast.LtE: "less_equal",
+    ast.Gt: "greater",
+    ast.GtE: "greater_equal",
+}
+
+BINARY_OPERATORS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv,
+                    ast.Mod, ast.Pow, ast.BitAnd, ast.BitOr, ast.BitXor)
+
+
+def np_call(fun_name, *args, **kwargs):
+    return ast.Call(
+        func=ast.Attribute(value=ast.Name(id="_np", ctx=ast.Load()),
+                           attr=fun_name, ctx=ast.Load()),
+        args=list(args),
+        keywords=[ast.keyword(arg=key, value=ast.Constant(value=val))
+                  for key, val in kwargs.items()])
+
+
+class ExpressionCompiler(ast.NodeTransformer):
+    """ Rewrites an indicator expression into a NumPy expression over
+    the array _v of variable values and the array _s of automaton
+    state indices (last axis) """
+
+    def __init__(self, resolver, state_resolver=None):
+        """ resolver(comp_pat, var_pat, exact) returns the list of
+        (comp_name, var_name) matching the patterns (exact: patterns
+        are names, not regex), state_resolver(comp_name, aut_name, state_name) returns the list
+        of ((comp_name, aut_name), state index) of automata having the
+        state (aut_name None: any automaton of the component) """
+        self.resolver = resolver
+        self.state_resolver = state_resolver
+        self.variables = []
+        self.automata = []
+
+    def get_var_idx(self, comp, var):
+        if not ((comp, var) in self.variables):
+            self.variables.append((comp, var))
+        return self.variables.index((comp, var))
+
+    def get_aut_idx(self, aut_key):
+        if not (aut_key in self.automata):
+            self.automata.append(aut_key)
+        return self.automata.index(aut_key)
+
+    def values_node(self, idx_list, array_name="_v"):
+        if isinstance(idx_list, int):
+            idx_node = ast.Constant(value=idx_list)
+        else:
+            idx_node = ast.List(elts=[ast.Constant(value=idx)
+                                      for idx in idx_list],
+                                ctx=ast.Load())
+        slice_node = ast.Tuple(elts=[ast.Constant(value=Ellipsis), idx_node],
+                               ctx=ast.Load())
+        if sys.version_info < (3, 9):
+            slice_node = ast.Index(value=slice_node)
+        return ast.Subscript(
+            value=ast.Name(id=array_name, ctx=ast.Load()),
+            slice=slice_node,
+            ctx=ast.Load())
+
+    def resolve_idx(self, comp_pat, var_pat, exact=False):
+        var_list = self.resolver(comp_pat, var_pat, exact)
+        if len(var_list) == 0:
+            raise ValueError(f"No variable matches {comp_pat}.{var_pat}")
+        if exact and len(var_list) > 1:
+            raise ValueError(f"Variable {comp_pat}.{var_pat} is not unique")
+        return [self.get_var_idx(comp, var) for comp, var in var_list]
+
+    def generic_visit(self, node):
+        raise ValueError(
+            f"Expression element {type(node).__name__} not supported")
+
+    def visit_Expression(self, node):
+        node.body = self.visit(node.body)
+        return node
+
+    def visit_Constant(self, node):
+        return node
+
+    def visit_Attribute(self, node):
+        if not isinstance(node.value, ast.Name):
+            raise ValueError(
+                "Variables must be referenced as component.variable")
+        idx = self.resolve_idx(node.value.id, node.attr, exact=True)
+        return self.values_node(idx[0])
+
+    def visit_BinOp(self, node):
+        if not isinstance(node.op, BINARY_OPERATORS):
+            raise ValueError(
+                f"Operator {type(node.op).__name__} not supported")
+        node.left = self.visit(node.left)
+        node.right = self.visit(node.right)
+        return node
+
+    def visit_UnaryOp(self, node):
+        operand = self.visit(node.operand)
+        if isinstance(node.op, ast.Not):
+            return np_call("logical_not", operand)
+        elif isinstance(node.op, ast.Invert):
+            return np_call("logical_not", operand)
+        elif isinstance(node.op, (ast.USub, ast.UAdd)):
+            node.operand = operand
+            return node
+        raise ValueError(f"Operator {type(node.op).__name__} not supported")
+
+    def visit_BoolOp(self, node):
+        fun_name = "logical_and" if isinstance(node.op, ast.And) \
+            else "logical_or"
+        values = [self.visit(val) for val in node.values]
+        result = values[0]
+        for val in values[1:]:
+            result = np_call(fun_name, result, val)
+        return result
+
+    def visit_Compare(self, node):
+        operands = [self.visit(node.left)] + \
+            [self.visit(comp) for comp in node.comparators]
+        result = None
+        for op, left, right in zip(node.ops, operands[:-1], operands[1:]):
+            if not (type(op) in COMPARISONS):
+                raise ValueError(
+                    f"Comparison {type(op).__name__} not supported")
+            comp_node = np_call(COMPARISONS[type(op)], left, right)
+            result = comp_node if result is None \
+                else np_call("logical_and", result, comp_node)
+        return result
+
+    def get_str_args(self, args):
+        if not all(isinstance(arg, ast.Constant) and
+                   isinstance(arg.value, str) for arg in args):
+            return None
+        return [arg.value for arg in args]
+
+    def visit_Call(self, node):
+        if not isinstance(node.func, ast.Name) or node.keywords:
+            raise ValueError("Only positional calls of expression functions are supported")
+        fun_name = node.func.id
+
+        if fun_name == "var":
+            str_args = self.get_str_args(node.args)
+            if str_args is None or len(str_args) != 2:
+                raise ValueError("var function expects component and variable names")
+            idx = self.resolve_idx(*str_args, exact=True)
+            return self.values_node(idx[0])
+
+        if fun_name == "in_state":
+            return self.in_state_node(node.args)
+
+        if fun_name in AGGREGATIONS or fun_name == "count":
+            members = self.get_members(node.args)
+            if fun_name == "count":
+                return np_call("count_nonzero", members, axis=-1)
+            return np_call(AGGREGATIONS[fun_name], members, axis=-1)
+
+        if fun_name == "kofn":
+            if len(node.args) < 2:
+                raise ValueError("kofn function expects k and members")
+            k_node = self.visit(node.args[0])
+            members = self.get_members(node.args[1:])
+            return np_call("greater_equal",
+                           np_call("count_nonzero", members, axis=-1),
+                           k_node)
+
+        raise ValueError(f"Function {fun_name} not supported")
+
+    def in_state_node(self, args):
+        str_args = self.get_str_args(args)
+        if str_args is None or not (len(str_args) in [2, 3]):
+            raise ValueError("in_state function expects component, optional automaton and state names")
+        if self.state_resolver is None:
+            raise ValueError("Automaton states are not available in this expression context")
+
+        comp_name, state_name = str_args[0], str_args[-1]
+        aut_name = str_args[1] if len(str_args) == 3 else None
+        aut_list = self.state_resolver(comp_name, aut_name, state_name)
+        if len(aut_list) == 0:
+            raise ValueError(f"No automaton of {comp_name} has state {state_name}")
+
+        result = None
+        for aut_key, state_idx in aut_list:
+            comp_node = np_call(
+                "equal",
+                self.values_node(self.get_aut_idx(aut_key), "_s"),
+                ast.Constant(value=state_idx))
+            result = comp_node if result is None \
+                else np_call("logical_or", result, comp_node)
+        return result
+
+    def get_members(self, args):
+        """ Members of an aggregation: either (component regex,
+        variable regex) or a list of expressions """
+        str_args = self.get_str_args(args)
+        if str_args is not None and len(str_args) in [1, 2]:
+            comp_pat = str_args[0]
+            var_pat = str_args[1] if len(str_args) == 2 else ".*"
+            return self.values_node(self.resolve_idx(comp_pat, var_pat))
+
+        members = [self.visit(arg) for arg in args]
+        if len(members) == 0:
+            raise ValueError("Aggregation without members")
+        return np_call("stack",
+                       ast.List(elts=members, ctx=ast.Load()),
+                       axis=-1)
+
+
+class PycExpression:
+    """ Indicator expression compiled once into a vectorized evaluator
+
+    Expressions use Python syntax over component variables:
+    - Variables: Comp.var or var("Comp", "var")
+    - Boolean/arithmetic operators and comparisons
+    - Aggregations over regex-selected variables or expression lists:
+      sum, mean, min, max, any, all, count (number of non zero
+      members) e.g. mean("Pump.*", "available")
+    - k-out-of-n: kofn(2, "Pump.*", "available") or
+      kofn(2, P1.available, P2.available, P3.available)
+    - Automaton states: in_state("Pump1", "failed") (any automaton of
+      the component) or in_state("Pump1", "aut", "failed")
+
+    The evaluator accepts values arrays whose last axis follows
+    the variables list, e.g. a single snapshot or a batch of snapshots,
+    and states arrays (current state index) following the automata list.
+    """
+
+    def __init__(self, expr, resolver, var_bkd_dict=None,
+                 state_resolver=None, aut_bkd_dict=None):
+        self.expr = expr
+
+        compiler = ExpressionCompiler(resolver, state_resolver)
+        tree = compiler.visit(ast.parse(expr, mode="eval"))
+        tree = ast.fix_missing_locations(
+            ast.Expression(
+                body=ast.Lambda(
+                    args=ast.arguments(
+                        posonlyargs=[],
+                        args=[ast.arg(arg="_v"), ast.arg(arg="_s")],
+                        kwonlyargs=[], kw_defaults=[],
+                        defaults=[ast.Constant(value=None)]),
+                    body=tree.body)))
+
+        self.variables = compiler.variables
+        self.automata = compiler.automata
+        self.fun = eval(compile(tree, f"<{expr}>", "eval"),
+                        {"_np": np, "__builtins__": {}})
+
+        # Backend variables in evaluator order
+        self.var_selection = PycVarSelection(
+            [var_bkd_dict[var] for var in self.variables]
+            if var_bkd_dict else [])
+        # (backend automaton, state index by name) in evaluator order
+        self.aut_selection = [aut_bkd_dict[aut] for aut in self.automata] \
+            if aut_bkd_dict else []
+
+    def evaluate(self, values, states=None):
+        return self.fun(np.asarray(values, dtype=float),
+                        None if states is None
+                        else np.asarray(states, dtype=float))
+
+    def get_states_bkd(self):
+        """ Current state index of the expression automata """
+        return np.array([states_idx[aut.currentState().basename()]
+                         for aut, states_idx in self.aut_selection],
+                        dtype=float)
+
+    def evaluate_bkd(self):
+        """ Evaluates the expression on current backend values """
+        return float(self.evaluate(self.var_selection.get_values(),
+                                   self.get_states_bkd()))
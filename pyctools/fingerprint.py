@@ -0,0 +1,185 @@
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+import pkg_resources
+from .common import get_obj_ref, spec_hash
+from .automaton import get_transitions_bkd, get_targets_bkd, \
+    PycOccurrenceDistribution
+installed_pkg = {pkg.key for pkg in pkg_resources.working_set}
+if 'ipdb' in installed_pkg:
+    import ipdb  # noqa: F401
+
+
+FINGERPRINT_MODULUS = 2**160
+
+
+def occ_law_specs(occ_law_bkd):
+    try:
+        return str(PycOccurrenceDistribution.from_bkd(occ_law_bkd))
+    except ValueError:
+        return occ_law_bkd.name()
+
+
+def code_specs(code):
+    """ Bytecode, constants (nested code included) and names of a code
+    object, independent of the process """
+    return [code.co_code.hex(),
+            [code_specs(const) if inspect.iscode(const) else repr(const)
+             for const in code.co_consts],
+            list(code.co_names)]
+
+
+@functools.lru_cache(maxsize=None)
+def class_specs(cls):
+    """ Reference and methods code of a component class, the Python
+    behaviour (conditions, effects, etc.) of components """
+    methods = []
+    for cls_cur in cls.__mro__:
+        if cls_cur.__module__ in ["Pycatshoo", "builtins"]:
+            continue
+        for name, attr in sorted(vars(cls_cur).items()):
+            code = getattr(attr, "__code__", None)
+            if code is not None:
+                methods.append([cls_cur.__qualname__, name,
+                                code_specs(code)])
+    return [f"{cls.__module__}:{cls.__qualname__}", methods]
+
+
+def component_specs(comp_bkd):
+    """ Structural description of a backend component """
+    return {
+        "name": comp_bkd.name(),
+        "class": class_specs(type(comp_bkd)),
+        "variables": sorted(
+            [(var.basename(),
+              type(var.initValue()).__name__,
+              var.initValue())
+             for var in comp_bkd.getVariables()], key=str),
+        "automata": sorted(
+            [{"name": aut.basename(),
+              "states": [state.basename() for state in aut.states()],
+              "init_state": aut.initState().basename(),
+              "transitions": sorted(
+                  [(trans.basename(),
+                    trans.startState().basename(),
+                    [state.basename() for state in get_targets_bkd(trans)],
+                    occ_law_specs(trans.distLaw()),
+                    trans.interruptible())
+                   for trans in get_transitions_bkd(aut)], key=str)}
+             for aut in comp_bkd.getAutomata()], key=lambda aut: aut["name"]),
+    }
+
+
+def fun_specs(fun):
+    """ Reference of an importable function, code of the others
+    (lambdas, local functions) whose reference would be ambiguous """
+    try:
+        return get_obj_ref(fun)
+    except ValueError:
+        code = getattr(fun, "__code__", None)
+        if code is None:
+            return repr(fun)
+        return [getattr(fun, "__module__", None), code_specs(code)]
+
+
+def indicator_specs(indic):
+    specs = indic.dict(exclude={"bkd", "values", "compact_values",
+                                "accumulator", "evaluator", "instants",
+                                "bkd_instants_idx", "fun"})
+    specs["cls"] = type(indic).__name__
+    if getattr(indic, "fun", None) is not None:
+        specs["fun"] = fun_specs(indic.fun)
+    return specs
+
+
+class PycFingerprint:
+    """ Order independent structural hash of a system
+
+    Each part (component, indicator) is hashed once and the
+    fingerprint is the sum of parts digests, so adding, replacing or
+    removing a part only costs the hash of that part.
+    """
+
+    def __init__(self):
+        self.parts = {}
+        self.value = 0
+
+    def set_part(self, key, specs):
+        self.remove_part(key)
+        digest = int(spec_hash([key, specs]), 16)
+        self.parts[key] = digest
+        self.value = (self.value + digest) % FINGERPRINT_MODULUS
+
+    def remove_part(self, key):
+        digest = self.parts.pop(key, None)
+        if digest is not None:
+            self.value = (self.value - digest) % FINGERPRINT_MODULUS
+
+    def sync(self, kind, objects, get_specs):
+        """ Hashes objects (dict key: object) of a kind not yet hashed
+        and forgets the removed ones """
+        for key in [key for key in self.parts
+                    if key[0] == kind and not (key[1] in objects)]:
+            self.remove_part(key)
+        for name, obj in objects.items():
+            if not ((kind, name) in self.parts):
+                self.set_part((kind, name), get_specs(obj))
+
+    def hexdigest(self):
+        return f"{self.value:040x}"
+
+
+class PycResultCache:
+    """ On-disk LRU cache of simulation results with size based
+    eviction """
+
+    def __init__(self, path, max_size=1e9):
+        self.path = path
+        self.max_size = max_size
+        os.makedirs(path, exist_ok=True)
+
+    def get_key(self, fingerprint, simu_params):
+        return hashlib.sha1(
+            f"{fingerprint}-{spec_hash(simu_params)}".encode("utf-8"))\
+            .hexdigest()
+
+    def get_filename(self, key):
+        return os.path.join(self.path, f"{key}.pkl")
+
+    def get(self, key):
+        filename = self.get_filename(key)
+        if not os.path.exists(filename):
+            return None
+        with open(filename, "rb") as file:
+            data = pickle.load(file)
+        # Last access time is kept as modification time
+        os.utime(filename)
+        return data
+
+    def put(self, key, data):
+        filename = self.get_filename(key)
+        filename_tmp = f"{filename}.tmp"
+        with open(filename_tmp, "wb") as file:
+            pickle.dump(data, file)
+        os.replace(filename_tmp, filename)
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for entry in os.scandir(self.path):
+            if entry.name.endswith(".pkl"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        size = sum(entry[1] for entry in entries)
+        for mtime, entry_size, filename in sorted(entries):
+            if size <= self.max_size:
+                break
+            os.remove(filename)
+            size -= entry_size
+
+    def size(self):
+        return sum(entry.stat().st_size for entry in os.scandir(self.path)
+                   if entry.name.endswith(".pkl"))
@@ -13,6 +13,93 @@ if 'ipdb' in installed_pkg:
 
 
 PandasDataFrame = typing.TypeVar('pd.core.dataframe')
+NumpyArray = typing.TypeVar('np.ndarray')
+
+
+class PycIndicatorAccumulator(BaseModel):
+    """ Partial indicator estimates over a set of simulated sequences
+
+    Sums are kept per instant so that accumulators computed on
+    disjoint sets of sequences can be merged exactly.
+    """
+    count: int = pydantic.Field(0, description="Number of sequences")
+    sums: NumpyArray = pydantic.Field(
+        None, description="Sum of values per instant")
+    sums_sq: NumpyArray = pydantic.Field(
+        None, description="Sum of squared values per instant")
+
+    def update_stats(self, means, stddevs, count):
+        """ Adds the results of a backend simulation of count sequences
+        (stddevs are assumed to be unbiased estimates) """
+        means = np.asarray(means, dtype=float)
+        stddevs = np.asarray(stddevs, dtype=float)
+
+        sums = count*means
+        sums_sq = (count - 1)*stddevs**2 + count*means**2
+
+        self.merge(PycIndicatorAccumulator(count=count,
+                                           sums=sums,
+                                           sums_sq=sums_sq))
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.sums = other.sums.copy()
+            self.sums_sq = other.sums_sq.copy()
+        else:
+            self.sums = self.sums + other.sums
+            self.sums_sq = self.sums_sq + other.sums_sq
+        self.count += other.count
+        return self
+
+    def mean(self):
+        return self.sums/self.count
+
+    def stddev(self):
+        if self.count <= 1:
+            return np.zeros_like(self.sums)
+        var = (self.sums_sq - self.sums**2/self.count)/(self.count - 1)
+        return np.sqrt(np.maximum(var, 0))
+
+    def to_dict(self):
+        return {"count": self.count,
+                "sums": self.sums,
+                "sums_sq": self.sums_sq}
+
+
+class PycCompactSeries(BaseModel):
+    """ Float32 series, run-length encoded when it has few value
+    changes (e.g. boolean indicators constant over long periods) """
+    length: int = pydantic.Field(..., description="Series length")
+    values: NumpyArray = pydantic.Field(
+        ..., description="Values (of each run if run-length encoded)")
+    run_ends: NumpyArray = pydantic.Field(
+        None, description="End index (excluded) of each run, None if dense")
+
+    @classmethod
+    def from_array(basecls, values):
+        values = np.asarray(values, dtype=np.float32)
+        change_idx = np.flatnonzero(values[1:] != values[:-1]) + 1
+        nb_runs = len(change_idx) + 1
+        # Run-length encoding costs 8 bytes per run against 4 per value
+        if 2*nb_runs < len(values):
+            run_ends = np.append(change_idx, len(values)).astype(np.int32)
+            return basecls(length=len(values),
+                           values=values[run_ends - 1],
+                           run_ends=run_ends)
+        return basecls(length=len(values), values=values)
+
+    def to_array(self):
+        if self.run_ends is None:
+            return self.values
+        run_lengths = np.diff(self.run_ends, prepend=0)
+        return np.repeat(self.values, run_lengths)
+
+    def nbytes(self):
+        return self.values.nbytes + \
+            (self.run_ends.nbytes if self.run_ends is not None else 0)
+
 
 class IndicatorModel(BaseModel):
     name: str = pydantic.Field(None, description="Indicator short name")
@@ -27,7 +114,13 @@ class IndicatorModel(BaseModel):
         None, description="Indicator estimates")
     metadata: dict = pydantic.Field(
         {}, description="Dictionary of metadata")
+    accumulator: PycIndicatorAccumulator = pydantic.Field(
+        None, description="Partial estimates of batched simulations")
+    compact_values: dict = pydantic.Field(
+        None, description="Compact estimates indexed by stat (compact result mode)")
     bkd: typing.Any = pydantic.Field(None, description="Indicator backend handler")
+    bkd_instants_idx: NumpyArray = pydantic.Field(
+        None, description="Positions of the instants among the backend ones (None: same instants)")
 
 
     @pydantic.root_validator()
@@ -53,6 +146,64 @@ class PycIndicator(IndicatorModel):
     def create_bkd(self, system_bkd):
         """ Create indicator backend"""
         raise NotImplementedError("methode create_bkd must be overloaded")
+
+    def get_data_header(self):
+        """ Indicator description columns of the values frame """
+        raise NotImplementedError("methode get_data_header must be overloaded")
+
+    def update_values(self, system_bkd=None, compact=False):
+
+        if not (self.instants) and system_bkd:
+            self.instants = list(system_bkd.instants())
+
+        if compact:
+            self.values = None
+            self.compact_values = {
+                stat: PycCompactSeries.from_array(self.to_pyc_stats(stat)())
+                for stat in self.stats}
+            return
+
+        self.compact_values = None
+
+        data_list = []
+        for stat in self.stats:
+
+            data_core = dict(
+                self.get_data_header(),
+                **{
+                    "measure": self.measure,
+                    "stat": stat,
+                    "instant": self.instants,
+                    "values": self.to_pyc_stats(stat)(),
+                    "unit": self.unit,
+                })
+
+            data_list.append(
+                pd.DataFrame(dict(data_core,
+                                  **self.metadata)))
+
+        self.values = pd.concat(data_list, axis=0, ignore_index=True)
+
+    def get_rows_header(self, stats=None):
+        """ Non value columns of the values frame, one dict per stat
+        (default: indicator stats) """
+        return [dict(self.get_data_header(),
+                     **{"measure": self.measure,
+                        "stat": stat,
+                        "instant": None,
+                        "values": None,
+                        "unit": self.unit},
+                     **self.metadata)
+                for stat in (self.stats if stats is None else stats)]
+
+    def memory_usage(self):
+        """ Size in bytes of the indicator results """
+        if self.compact_values is not None:
+            return sum(series.nbytes()
+                       for series in self.compact_values.values())
+        elif self.values is not None:
+            return int(self.values.memory_usage(deep=True).sum())
+        return 0
     
     def set_indicator(self, system_bkd):
 
@@ -63,15 +214,15 @@ class PycIndicator(IndicatorModel):
     
     def update_restitution(self):
 
-        restitution = 0
         for stat in self.stats:
-            if stat == "mean":
-                restitution |= pyc.TIndicatorType.mean_values
-            elif stat == "stddev":
-                restitution |= pyc.TIndicatorType.std_dev
-            else:
+            if not (stat in ["mean", "stddev"]):
                 raise ValueError(f"Stat {stat} not supported for Pycatshoo indicator restitution")
 
+        # Both stats are always restituted: they are needed to
+        # accumulate batched simulation results
+        restitution = pyc.TIndicatorType.mean_values | \
+            pyc.TIndicatorType.std_dev
+
         self.bkd.setRestitutions(restitution)
 
     def update_computation(self):
@@ -90,12 +241,61 @@ class PycIndicator(IndicatorModel):
         self.bkd.setComputation(computation)
 
         
+    def accumulate(self, count):
+        """ Accumulates the backend results of count sequences """
+        if self.accumulator is None:
+            self.accumulator = PycIndicatorAccumulator()
+        self.accumulator.update_stats(self.bkd_means(),
+                                      self.bkd_stddevs(),
+                                      count)
+
+    def bkd_means(self):
+        """ Backend means at the indicator instants (the backend keeps
+        the instants of previous simulations) """
+        means = self.bkd.means()
+        if self.bkd_instants_idx is None:
+            return means
+        return np.asarray(means, dtype=float)[self.bkd_instants_idx]
+
+    def bkd_stddevs(self):
+        stddevs = self.bkd.stdDevs()
+        if self.bkd_instants_idx is None:
+            return stddevs
+        return np.asarray(stddevs, dtype=float)[self.bkd_instants_idx]
+
+    def get_stat_values(self, stat_name):
+        """ Estimates of a statistic over the indicator instants, read
+        from the simulation results if the stat is not stored (e.g.
+        stddev of an indicator with mean stat only) """
+        if self.compact_values is not None and \
+           stat_name in self.compact_values:
+            return self.compact_values[stat_name].to_array()
+
+        if self.values is not None:
+            idx_stat = self.values["stat"] == stat_name
+            if idx_stat.any():
+                return self.values.loc[idx_stat, "values"]\
+                           .to_numpy(dtype=float)
+
+        if self.accumulator is None and self.bkd is None:
+            raise ValueError(f"Statistic {stat_name} of indicator {self.name} is not available")
+
+        return np.asarray(self.to_pyc_stats(stat_name)(), dtype=float)
+
     def to_pyc_stats(self, stat_name):
 
+        if self.accumulator is not None:
+            if stat_name == "mean":
+                return self.accumulator.mean
+            elif stat_name == "stddev":
+                return self.accumulator.stddev
+            else:
+                raise ValueError(f"Statistic {stat_name} not supported")
+
         if stat_name == "mean":
-            return self.bkd.means
+            return self.bkd_means
         elif stat_name == "stddev":
-            return self.bkd.stdDevs
+            return self.bkd_stddevs
         else:
             raise ValueError(f"Statistic {stat_name} not supported")
         
@@ -103,36 +303,22 @@ class PycIndicator(IndicatorModel):
 class PycFunIndicator(PycIndicator):
     fun: typing.Any = pydantic.Field(..., description="Indicator function")
 
+    def get_type(self):
+        return "FUN"
+
+    def get_data_header(self):
+        return {
+            "name": self.name,
+            "label": self.label,
+            "description": self.description,
+            "type": self.get_type(),
+        }
+
     def create_bkd(self, system_bkd):
         self.bkd = system_bkd.addIndicator(
             self.name,
             self.fun)
 
-    def update_values(self, system_bkd=None):
-
-        if not(self.instants) and system_bkd:
-            self.instants = list(system_bkd.instants())
-
-        data_list = []
-        for stat in self.stats:
-
-            data_core = {
-                "name": self.name,
-                "label": self.label,
-                "description": self.description,
-                "type": "FUN",
-                "measure": self.measure,
-                "stat": stat,
-                "instant": self.instants,
-                "values": self.to_pyc_stats(stat)(),
-                "unit": self.unit,
-                }
-            
-            data_list.append(
-                pd.DataFrame(dict(data_core,
-                                  **self.metadata)))
-            
-        self.values = pd.concat(data_list, axis=0, ignore_index=True)
 
 
 class PycVarIndicator(PycIndicator):
@@ -168,6 +354,23 @@ class PycVarIndicator(PycIndicator):
 
         return obj
 
+    def get_data_header(self):
+        return {
+            "name": self.name,
+            "label": self.label,
+            "description": self.description,
+            "comp": self.get_comp_name(),
+            "attr": self.get_attr_name(),
+            "operator": self.operator,
+            "value_test": self.value_test,
+            "type": self.get_type(),
+        }
+
+    def to_expr(self):
+        """ Equivalent expression (see expression.PycExpression) """
+        return f"var({self.component!r}, {self.var!r}) " \
+            f"{self.operator} {self.value_test!r}"
+
     def create_bkd(self, system_bkd):
         self.bkd = system_bkd.addIndicator(
             self.name,
@@ -177,34 +380,65 @@ class PycVarIndicator(PycIndicator):
             self.value_test)
 
 
-    def update_values(self, system_bkd=None):
 
-        if not (self.instants) and system_bkd:
-            self.instants = list(system_bkd.instants())
 
-        data_list = []
-        for stat in self.stats:
 
-            data_core = {
-                "name": self.name,
-                "label": self.label,
-                "description": self.description,
-                "comp": self.get_comp_name(),
-                "attr": self.get_attr_name(),
-                "operator": self.operator,
-                "value_test": self.value_test,
-                "type": self.get_type(),
-                "measure": self.measure,
-                "stat": stat,
-                "instant": self.instants,
-                "values": self.to_pyc_stats(stat)(),
-                "unit": self.unit,
-                }
-            
-            data_list.append(
-                pd.DataFrame(dict(data_core,
-                                  **self.metadata)))
-            
-        self.values = pd.concat(data_list, axis=0, ignore_index=True)
 
+class PycExprIndicator(PycIndicator):
+    expr: str = pydantic.Field(..., description="Indicator expression (see expression.PycExpression)")
+    evaluator: typing.Any = pydantic.Field(None, description="Compiled expression")
+
+    def get_type(self):
+        return "EXPR"
+
+    def get_expr(self):
+        return self.expr
+
+    def to_expr(self):
+        return self.expr
+
+    def get_data_header(self):
+        return {
+            "name": self.name,
+            "label": self.label,
+            "description": self.description,
+            "expr": self.expr,
+            "type": self.get_type(),
+        }
+
+    def create_bkd(self, system_bkd):
+        self.evaluator = system_bkd.compile_expr(self.expr)
+        self.bkd = system_bkd.addIndicator(
+            self.name,
+            self.evaluator.evaluate_bkd)
+
+
+def compact_to_frame(indic_list):
+    """ Values frame of compact indicators with float32 values and
+    categorical description columns (codes are repeated per row, strings
+    are stored once) """
+    header_list = []
+    instants_list = []
+    values_list = []
+    for indic in indic_list:
+        for header, stat in zip(indic.get_rows_header(), indic.stats):
+            header_list.append(header)
+            instants_list.append(np.asarray(indic.instants, dtype=float))
+            values_list.append(indic.compact_values[stat].to_array())
+
+    header_df = pd.DataFrame(header_list)
+    row_header = np.repeat(np.arange(len(header_list)),
+                           [len(values) for values in values_list])
+
+    data = {}
+    for col in header_df.columns:
+        if col == "instant":
+            data[col] = np.concatenate(instants_list)
+        elif col == "values":
+            data[col] = np.concatenate(values_list)
+        else:
+            header_cat = pd.Categorical(header_df[col])
+            data[col] = pd.Categorical.from_codes(
+                header_cat.codes[row_header], header_cat.categories)
 
+    return pd.DataFrame(data)
@@ -8,12 +8,13 @@ import os
 import pathlib
 import sys
 import math
+import numpy as np
 import colored 
 
 from .core import BaseModel
 from .automaton import PycTransition
-from .component import PycComponent
 from .system import PycSystem
+from .status import PycStatusView
 
 installed_pkg = {pkg.key for pkg in pkg_resources.working_set}
 if 'ipdb' in installed_pkg:
@@ -22,11 +23,58 @@ if 'ipdb' in installed_pkg:
 PandasDataFrame = typing.TypeVar('pd.core.dataframe')
 
 PycSystemType = typing.TypeVar('PycSystem')
+NumpyArray = typing.TypeVar('np.ndarray')
+
+
+class PycStepTrace(BaseModel):
+    """ Steps of a run_until call restricted to the predicate
+    variables and automata (row 0: state before the first step) """
+    expr: str = pydantic.Field(..., description="Stop condition")
+    stop_reason: str = pydantic.Field(
+        None, description="predicate, max-steps or max-time")
+    times: NumpyArray = pydantic.Field(None, description="Time of each step")
+    values: NumpyArray = pydantic.Field(
+        None, description="Condition value after each step")
+    variables: list = pydantic.Field(
+        [], description="(component, variable) of var_values columns")
+    var_values: NumpyArray = pydantic.Field(
+        None, description="Variable values after each step")
+    automata: list = pydantic.Field(
+        [], description="(component, automaton) of aut_states columns")
+    aut_states: NumpyArray = pydantic.Field(
+        None, description="State index of each automaton after each step")
+
+    @property
+    def nb_steps(self):
+        return len(self.times) - 1
+
+    def to_df(self):
+        trace_df = pd.DataFrame({"time": self.times, "value": self.values})
+        for pos, (comp_name, var_name) in enumerate(self.variables):
+            trace_df[f"{comp_name}.{var_name}"] = self.var_values[:, pos]
+        for pos, (comp_name, aut_name) in enumerate(self.automata):
+            trace_df[f"{comp_name}.{aut_name}"] = self.aut_states[:, pos]
+        return trace_df
+
 
 class PycInteractiveSession(BaseModel):
 
     system: PycSystemType = pydantic.Field(
         None, description="System model")
+    expr_cache: dict = pydantic.Field(
+        {}, description="Compiled expressions indexed by expression")
+    keep_history: bool = pydantic.Field(
+        False, description="Snapshot the system before each step to allow back-stepping")
+    history: list = pydantic.Field(
+        [], description="System states before each step")
+    snapshots: dict = pydantic.Field(
+        {}, description="Saved system states indexed by name")
+    track_changes: bool = pydantic.Field(
+        False, description="Read the tracked elements before each step to report changed elements")
+    track_specs: dict = pydantic.Field(
+        {}, description="PycStatusView specifications (comp_pat, name_pat, types) of the tracked elements (default: all)")
+    values_prev: dict = pydantic.Field(
+        None, description="Values of the tracked elements before the last step (see PycStatusView.read_values)")
 
 
     def report_system_name(self):
@@ -72,14 +120,16 @@ class PycInteractiveSession(BaseModel):
 
         return report
 
-    def report_components_status(self):
+    def report_components_status(self, **view_specs):
+
+        view = PycStatusView(**view_specs)
+        comp_df = self.components_status_df(view=view)
 
         header = \
-            colored.stylize("Components status",
+            colored.stylize(f"Components status ({view.page_info()})",
                             colored.fg("dark_orange")
                             )
 
-        comp_df = self.components_status_df()
         content = comp_df.to_string() if len(comp_df) > 0 else "No component"
 
         report = f"{header} :\n{content}"
@@ -130,9 +180,38 @@ class PycInteractiveSession(BaseModel):
         self.system.stepForward()
 
     def step_forward(self, **kwargs):
+        if self.track_changes:
+            self.values_prev = PycStatusView(**self.track_specs)\
+                .read_values(self.system.get_state_index())
+        if self.keep_history:
+            self.history.append(self.system.snapshot())
         self.system.updatePlanningInt()
         self.system.stepForward()
 
+    def step_backward(self, **kwargs):
+        """ Restores the state before the last step (keep_history must
+        be set), the backend stepBackward is used if it cannot restore
+        states """
+        if not self.history:
+            raise ValueError("No step to go back to (keep_history must be set)")
+        state = self.history.pop()
+        try:
+            self.system.restore(state)
+        except NotImplementedError:
+            if not hasattr(self.system, "stepBackward"):
+                raise
+            self.system.stepBackward()
+
+    def save_snapshot(self, name):
+        self.snapshots[name] = self.system.snapshot()
+
+    def restore_snapshot(self, name):
+        """ Branches back to a saved state, the history after the
+        snapshot is dropped """
+        state = self.snapshots[name]
+        self.history = [st for st in self.history if st.time <= state.time]
+        self.system.restore(state)
+
     def get_active_transitions(self, **kwargs):
 
         trans_list_bkd = self.system.getActiveTransitions()
@@ -163,28 +242,63 @@ class PycInteractiveSession(BaseModel):
 
         return trans_df
 
-    def components_status_df(self, **kwargs):
-
-        var_renaming = {
-            "comp_name": "Component",
-            "name": "Name",
-            "type": "Type",
-            "value_init": "Init. value",
-            "value_current": "Current value",
-        }
-        
-        comp_list = \
-            [PycComponent.from_bkd(comp)
-             for comp in self.system.getComponents("#.*", "#.*")]
-
-        comp_df_list = []
-        for comp in comp_list:
-            comp_df_list.append(comp.to_df())
-
-        if comp_df_list:
-            comp_df = \
-                pd.concat(comp_df_list, axis=0, ignore_index=True)
-        else:
-            comp_df = pd.DataFrame(columns=var_renaming.values())
-
-        return comp_df.rename(columns=var_renaming)[var_renaming.values()]
+    def components_status_df(self, view=None, **view_specs):
+        """ Components status restricted by a PycStatusView (or its
+        specifications: comp_pat, name_pat, changed_only,
+        differs_from_init, sort_by, page, page_size, etc.) """
+        if view is None:
+            view = PycStatusView(**view_specs)
+
+        return view.to_df(self.system, values_ref=self.values_prev)
+
+    def get_expr(self, expr):
+        if not (expr in self.expr_cache):
+            self.expr_cache[expr] = self.system.compile_expr(expr)
+        return self.expr_cache[expr]
+
+    def eval_expr(self, expr):
+        """ Evaluates an indicator expression on the current state """
+        return self.get_expr(expr).evaluate_bkd()
+
+    def run_until(self, predicate, max_steps=1000, max_time=None):
+        """ Steps forward until the predicate expression (see
+        expression.PycExpression, e.g. 'in_state("Pump1", "failed")')
+        holds, max_steps steps are done or time reaches max_time.
+
+        Only the predicate variables and automata are read at each
+        step, the trace records them (see PycStepTrace).
+        """
+        expr = self.get_expr(predicate)
+        var_selection = expr.var_selection
+
+        times = np.empty(max_steps + 1)
+        values = np.empty(max_steps + 1)
+        var_values = np.empty((max_steps + 1, len(var_selection)))
+        aut_states = np.empty((max_steps + 1, len(expr.aut_selection)),
+                              dtype=np.int32)
+
+        stop_reason = "max-steps"
+        for step in range(max_steps + 1):
+            if step > 0:
+                self.step_forward()
+            times[step] = self.system.currentTime()
+            var_values[step] = var_selection.get_values()
+            aut_states[step] = expr.get_states_bkd()
+            values[step] = expr.evaluate(var_values[step], aut_states[step])
+
+            if values[step]:
+                stop_reason = "predicate"
+                break
+            if max_time is not None and times[step] >= max_time:
+                stop_reason = "max-time"
+                break
+
+        nb_rows = step + 1
+        return PycStepTrace(expr=predicate,
+                            stop_reason=stop_reason,
+                            times=times[:nb_rows],
+                            values=values[:nb_rows],
+                            variables=list(expr.variables),
+                            var_values=var_values[:nb_rows],
+                            automata=list(expr.automata),
+                            aut_states=aut_states[:nb_rows])
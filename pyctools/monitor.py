@@ -0,0 +1,297 @@
+import json
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import colored
+from multiprocessing import shared_memory, resource_tracker
+import pkg_resources
+from .steady_state import t_quantile
+installed_pkg = {pkg.key for pkg in pkg_resources.working_set}
+if 'ipdb' in installed_pkg:
+    import ipdb  # noqa: F401
+
+
+# Header fields (int64)
+HEADER_FIELDS = ["seq", "nb_records", "capacity", "nb_indics", "nb_instants",
+                 "meta_size", "nb_runs_total", "finished"]
+HEADER_SIZE = 8*len(HEADER_FIELDS)
+
+# Segments created by the publishers of the current process
+PUBLISHED_NAMES = set()
+
+
+def get_layout(capacity, nb_indics, nb_instants, meta_size):
+    """ Offsets of the segment parts: header, metadata (JSON),
+    latest estimates (means and half widths per instant) and ring
+    buffer of records (wall time, number of runs, then means and half
+    widths at the last instant) """
+    meta_offset = HEADER_SIZE
+    latest_offset = meta_offset + -(-meta_size//8)*8
+    ring_offset = latest_offset + 8*2*nb_indics*nb_instants
+    size = ring_offset + 8*capacity*(2 + 2*nb_indics)
+    return meta_offset, latest_offset, ring_offset, size
+
+
+class PycMonitorPublisher:
+    """ Publishes partial indicator estimates of a running simulation
+    in a shared memory segment read by PycMonitorReader.
+
+    Estimates are published at most every interval seconds, so a
+    publication costs one time check per batch otherwise. Writes are
+    protected by a sequence counter (odd while writing): readers retry
+    instead of locking the simulation.
+    """
+
+    def __init__(self, indic_names, instants, nb_runs_total,
+                 capacity=256, interval=1.0, confidence=0.95, name=None):
+        self.indic_names = list(indic_names)
+        self.instants = [float(instant) for instant in instants]
+        self.capacity = capacity
+        self.interval = interval
+        self.confidence = confidence
+        self.time_last = None
+        self.nb_runs_last = None
+
+        meta = json.dumps({"names": self.indic_names,
+                           "instants": self.instants,
+                           "confidence": confidence}).encode("utf-8")
+        nb_indics, nb_instants = len(self.indic_names), len(self.instants)
+        meta_offset, latest_offset, ring_offset, size = \
+            get_layout(capacity, nb_indics, nb_instants, len(meta))
+
+        self.shm = shared_memory.SharedMemory(name=name, create=True,
+                                              size=size)
+        PUBLISHED_NAMES.add(self.shm.name)
+        self.header = np.ndarray(len(HEADER_FIELDS), dtype=np.int64,
+                                 buffer=self.shm.buf)
+        self.header[:] = [0, 0, capacity, nb_indics, nb_instants,
+                          len(meta), nb_runs_total, 0]
+        self.shm.buf[meta_offset:meta_offset + len(meta)] = meta
+        self.latest = np.ndarray((2, nb_indics, nb_instants), dtype=float,
+                                 buffer=self.shm.buf, offset=latest_offset)
+        self.ring = np.ndarray((capacity, 2 + 2*nb_indics), dtype=float,
+                               buffer=self.shm.buf, offset=ring_offset)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def publish(self, accumulators, nb_runs, force=False):
+        """ Publishes estimates from indicator accumulators (dict
+        indexed by indicator name, missing ones are published as NaN) """
+        time_cur = time.time()
+        if not force and self.time_last is not None and \
+           time_cur - self.time_last < self.interval:
+            return False
+        self.time_last = time_cur
+        self.nb_runs_last = nb_runs
+
+        self.header[0] += 1
+        self.latest[:] = np.nan
+        for idx, indic_name in enumerate(self.indic_names):
+            acc = accumulators.get(indic_name)
+            if acc is None or acc.count == 0:
+                continue
+            self.latest[0, idx] = acc.mean()
+            if acc.count > 1:
+                quantile = t_quantile((1 + self.confidence)/2, acc.count - 1)
+                self.latest[1, idx] = \
+                    quantile*acc.stddev()/np.sqrt(acc.count)
+
+        record = self.ring[self.header[1] % self.capacity]
+        record[0] = time_cur
+        record[1] = nb_runs
+        record[2:] = self.latest[:, :, -1].ravel()
+        self.header[1] += 1
+        self.header[0] += 1
+        return True
+
+    def finish(self):
+        self.header[7] = 1
+
+    def close(self, unlink=True):
+        self.finish()
+        self.header = self.latest = self.ring = None
+        self.shm.close()
+        if unlink:
+            self.shm.unlink()
+            PUBLISHED_NAMES.discard(self.shm.name)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+class PycMonitorReader:
+    """ Reads the estimates published in a monitoring segment """
+
+    def __init__(self, name):
+        if sys.version_info >= (3, 13):
+            # Not tracked: the segment is owned by the publisher
+            self.shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            self.shm = shared_memory.SharedMemory(name=name)
+        if sys.version_info < (3, 13) and name not in PUBLISHED_NAMES:
+            # The resource tracker would unlink the segment when the
+            # reader exits, it is owned by the publisher
+            resource_tracker.unregister(self.shm._name, "shared_memory")
+        header = np.ndarray(len(HEADER_FIELDS), dtype=np.int64,
+                            buffer=self.shm.buf)
+        self.header = header
+        capacity, nb_indics, nb_instants, meta_size = header[2:6]
+        meta_offset, latest_offset, ring_offset, _ = \
+            get_layout(capacity, nb_indics, nb_instants, meta_size)
+
+        meta = json.loads(bytes(
+            self.shm.buf[meta_offset:meta_offset + meta_size]))
+        self.indic_names = meta["names"]
+        self.instants = meta["instants"]
+        self.confidence = meta["confidence"]
+        self.capacity = int(capacity)
+        self.latest = np.ndarray((2, nb_indics, nb_instants), dtype=float,
+                                 buffer=self.shm.buf, offset=latest_offset)
+        self.ring = np.ndarray((capacity, 2 + 2*nb_indics), dtype=float,
+                               buffer=self.shm.buf, offset=ring_offset)
+
+    def read(self, nb_tries=100):
+        """ Consistent copy of the published data: dict with nb_runs,
+        nb_runs_total, finished, means and half_widths (indicator x
+        instant arrays) and records (ring buffer rows, oldest first) """
+        for _ in range(nb_tries):
+            seq = self.header[0]
+            if seq % 2 == 0:
+                nb_records = int(self.header[1])
+                latest = self.latest.copy()
+                ring = self.ring.copy()
+                finished = bool(self.header[7])
+                if self.header[0] == seq:
+                    break
+            time.sleep(0.001)
+        else:
+            raise RuntimeError("Monitoring segment is not readable")
+
+        nb_kept = min(nb_records, self.capacity)
+        positions = np.arange(nb_records - nb_kept, nb_records) % self.capacity
+        records = ring[positions]
+
+        return {"nb_runs": int(records[-1, 1]) if nb_kept else 0,
+                "nb_runs_total": int(self.header[6]),
+                "finished": finished,
+                "means": latest[0],
+                "half_widths": latest[1],
+                "records": records}
+
+    def history(self, data=None):
+        """ Estimates at the last instant of the kept records """
+        if data is None:
+            data = self.read()
+        records = data["records"]
+        nb_indics = len(self.indic_names)
+        return pd.DataFrame({
+            "time": np.repeat(records[:, 0], nb_indics),
+            "nb_runs": np.repeat(records[:, 1], nb_indics).astype(int),
+            "name": np.tile(self.indic_names, len(records)),
+            "mean": records[:, 2:2 + nb_indics].ravel(),
+            "half_width": records[:, 2 + nb_indics:].ravel()})
+
+    def close(self):
+        self.header = self.latest = self.ring = None
+        self.shm.close()
+
+
+def monitor_report(reader, data, max_rows=20):
+    """ Terminal report: progress and estimates at the last instant
+    of the indicators with the widest relative confidence intervals """
+    nb_runs, nb_runs_total = data["nb_runs"], data["nb_runs_total"]
+    progress = nb_runs/nb_runs_total if nb_runs_total else 0
+    bar_width = 40
+    bar = "#"*int(progress*bar_width) + "-"*(bar_width - int(progress*bar_width))
+
+    lines = [
+        colored.stylize("Runs", colored.fg("dodger_blue_2") +
+                        colored.attr("bold")) +
+        f" [{bar}] {nb_runs}/{nb_runs_total}" +
+        (colored.stylize(" done", colored.fg("green"))
+         if data["finished"] else "")]
+
+    means = data["means"][:, -1]
+    half_widths = data["half_widths"][:, -1]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rel_widths = np.nan_to_num(half_widths/np.abs(means), nan=np.inf)
+    order = np.argsort(-rel_widths, kind="stable")[:max_rows]
+
+    name_width = max([len(reader.indic_names[idx]) for idx in order] + [4])
+    lines.append(colored.stylize(
+        f"{'Name':<{name_width}}  {'Mean':>12}  {'Half width':>12}",
+        colored.fg("deep_sky_blue_4b")))
+    for idx in order:
+        lines.append(f"{reader.indic_names[idx]:<{name_width}}  "
+                     f"{means[idx]:>12.6g}  {half_widths[idx]:>12.6g}")
+
+    return "\n".join(lines)
+
+
+def watch_terminal(name, refresh=1.0, max_rows=20, file=sys.stdout):
+    """ Terminal viewer, returns when the simulation is finished """
+    reader = PycMonitorReader(name)
+    try:
+        while True:
+            data = reader.read()
+            # Clear screen and move cursor home
+            file.write("\033[2J\033[H" +
+                       monitor_report(reader, data, max_rows=max_rows) + "\n")
+            file.flush()
+            if data["finished"]:
+                return data
+            time.sleep(refresh)
+    finally:
+        reader.close()
+
+
+def monitor_fig(reader, data, max_curves=20):
+    """ Convergence of estimates at the last instant with their
+    confidence intervals """
+    history_df = reader.history(data)
+    fig = go.Figure()
+    for indic_name in reader.indic_names[:max_curves]:
+        indic_df = history_df[history_df["name"] == indic_name]
+        fig.add_trace(go.Scattergl(
+            x=indic_df["nb_runs"], y=indic_df["mean"],
+            error_y=dict(type="data", array=indic_df["half_width"]),
+            mode="lines+markers", name=indic_name))
+    fig.update_layout(
+        title=f"{data['nb_runs']}/{data['nb_runs_total']} runs"
+        + (" (done)" if data["finished"] else ""),
+        xaxis_title="Number of runs",
+        yaxis_title=f"Estimate at t={reader.instants[-1]:g}")
+    return fig
+
+
+def watch_html(name, filename, refresh=2.0, max_curves=20):
+    """ Writes a self-refreshing plotly HTML file until the simulation
+    is finished (the browser reloads it every refresh seconds) """
+    reader = PycMonitorReader(name)
+    try:
+        while True:
+            data = reader.read()
+            html = monitor_fig(reader, data, max_curves=max_curves)\
+                .to_html(include_plotlyjs="cdn")
+            if not data["finished"]:
+                html = html.replace(
+                    "<head>",
+                    f'<head><meta http-equiv="refresh" content="{refresh}">',
+                    1)
+            filename_tmp = f"{filename}.tmp"
+            with open(filename_tmp, "w") as file:
+                file.write(html)
+            os.replace(filename_tmp, filename)
+            if data["finished"]:
+                return data
+            time.sleep(refresh)
+    finally:
+        reader.close()
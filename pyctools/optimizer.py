@@ -0,0 +1,236 @@
+import concurrent.futures
+import itertools
+import statistics
+import typing
+import pydantic
+import numpy as np
+import pandas as pd
+import pkg_resources
+from .core import BaseModel
+from .common import load_obj_ref, spec_hash
+from .indicator import PycIndicatorAccumulator
+from .sensitivity import set_law_param
+installed_pkg = {pkg.key for pkg in pkg_resources.working_set}
+if 'ipdb' in installed_pkg:
+    import ipdb  # noqa: F401
+
+
+class PycDecisionVariable(BaseModel):
+    name: str = pydantic.Field(..., description="Variable name")
+    values: list = pydantic.Field(..., description="Candidate values")
+    transition: str = pydantic.Field(
+        None, description="Transition id whose occurrence law parameter (exp rate or delay time) is set, None: system factory parameter named name")
+
+
+def eval_candidate(study, candidate, law_variables, indicator, nb_runs, seed):
+    """ Process pool entry point: accumulator of the objective
+    indicator at the last instant for nb_runs sequences of a candidate """
+    structural = {name: value for name, value in candidate.items()
+                  if not (name in law_variables)}
+    if structural:
+        study = study.copy(
+            update={"system_params": dict(study.system_params,
+                                          **structural)})
+    system = study.get_system()
+
+    if law_variables:
+        occ_laws_ref = system.get_occ_laws()
+        system.set_occ_laws(
+            {trans_id: set_law_param(occ_laws_ref[trans_id],
+                                     candidate[name])
+             for name, trans_id in law_variables.items()})
+
+    system.simulate(**dict(study.simu_params.dict(),
+                           nb_runs=nb_runs,
+                           seed=seed,
+                           batch_size=None,
+                           checkpoint_path=None))
+
+    indic = system.indicators[indicator]
+    indic.accumulate(nb_runs)
+    acc = indic.accumulator
+    indic.accumulator = None
+
+    return {"count": acc.count,
+            "sums": acc.sums[-1:],
+            "sums_sq": acc.sums_sq[-1:]}
+
+
+def dominates(obj_a, cost_a, obj_b, cost_b):
+    """ dominates[i, j]: candidate i dominates candidate j (objective
+    maximized, cost minimized) """
+    better_eq = (obj_a[:, None] >= obj_b[None, :]) & \
+        (cost_a[:, None] <= cost_b[None, :])
+    better = (obj_a[:, None] > obj_b[None, :]) | \
+        (cost_a[:, None] < cost_b[None, :])
+    return better_eq & better
+
+
+def pareto_ranks(obj, cost):
+    """ Non-dominated sorting: 0 for the Pareto front, 1 for the
+    front of the remaining candidates, etc. """
+    dom = dominates(obj, cost, obj, cost)
+    ranks = np.full(len(obj), -1)
+    rank = 0
+    while (ranks < 0).any():
+        remaining = np.flatnonzero(ranks < 0)
+        front = remaining[~dom[np.ix_(remaining, remaining)].any(axis=0)]
+        ranks[front] = rank
+        rank += 1
+    return ranks
+
+
+class PycOptimizer(BaseModel):
+    """ Multi-objective search of the candidates (combinations of
+    decision variable values) maximizing (or minimizing) an indicator
+    mean at the last instant while minimizing a cost.
+
+    Candidates are raced: each round simulates nb_runs_min*eta**round
+    new sequences for every remaining candidate and only candidates
+    dominated with confidence (pessimistic estimate of another
+    candidate at most as costly better than their optimistic estimate)
+    are eliminated. The Pareto front is computed over all the remaining
+    candidates. Evaluations are cached by study, objective indicator,
+    candidate, number of runs and seed so that repeated runs reuse
+    them.
+    """
+    study: typing.Any = pydantic.Field(
+        ..., description="Study defining the system (see PycStudy)")
+    variables: typing.List[PycDecisionVariable] = pydantic.Field(
+        ..., description="Decision variables")
+    indicator: str = pydantic.Field(..., description="Objective indicator name")
+    sense: str = pydantic.Field("max", description="max or min")
+    cost: typing.Any = pydantic.Field(
+        ..., description="Function (or 'module:function' reference) giving the cost of a candidate dict")
+    nb_candidates: int = pydantic.Field(
+        None, description="Number of candidates sampled among the combinations (None: all)")
+    nb_runs_min: int = pydantic.Field(
+        100, description="Number of sequences per candidate of the first round")
+    eta: int = pydantic.Field(
+        3, description="Growth factor of the number of sequences per round")
+    nb_rounds: int = pydantic.Field(4, description="Maximum number of rounds")
+    confidence: float = pydantic.Field(
+        0.95, description="Confidence level of the racing eliminations")
+    seed: int = pydantic.Field(0, description="Random seed")
+    max_workers: int = pydantic.Field(None, description="Process pool size")
+    evaluations: dict = pydantic.Field(
+        {}, description="Evaluation cache indexed by study, indicator, candidate, number of runs and seed hash")
+
+    @pydantic.validator("sense")
+    def check_sense(cls, value):
+        if not (value in ["max", "min"]):
+            raise ValueError(f"Sense {value} not supported")
+        return value
+
+    def get_candidates(self):
+        names = [var.name for var in self.variables]
+        combinations = list(itertools.product(
+            *[var.values for var in self.variables]))
+        if self.nb_candidates is not None and \
+           self.nb_candidates < len(combinations):
+            rng = np.random.default_rng(self.seed)
+            idx = rng.choice(len(combinations), self.nb_candidates,
+                             replace=False)
+            combinations = [combinations[pos] for pos in sorted(idx)]
+        return [dict(zip(names, values)) for values in combinations]
+
+    def get_seed(self, candidate, round_idx):
+        seed_seq = np.random.SeedSequence(
+            [self.seed, int(spec_hash(candidate)[:8], 16), round_idx])
+        return int(seed_seq.generate_state(1)[0])
+
+    def evaluate(self, candidates, nb_runs, round_idx):
+        """ Objective accumulators of the candidates for a round,
+        missing evaluations are simulated in a process pool """
+        law_variables = {var.name: var.transition for var in self.variables
+                         if var.transition is not None}
+        # Candidates are evaluated on the study model and simulation
+        # parameters, decision variables may set occurrence laws
+        study_specs = [self.study.model_specs(),
+                       self.study.simu_params.dict(),
+                       self.indicator, law_variables]
+        keys = [spec_hash([study_specs, candidate, nb_runs,
+                           self.get_seed(candidate, round_idx)])
+                for candidate in candidates]
+        missing = [pos for pos, key in enumerate(keys)
+                   if not (key in self.evaluations)]
+
+        if missing:
+            with concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.max_workers) as executor:
+                results = executor.map(
+                    eval_candidate,
+                    [self.study]*len(missing),
+                    [candidates[pos] for pos in missing],
+                    [law_variables]*len(missing),
+                    [self.indicator]*len(missing),
+                    [nb_runs]*len(missing),
+                    [self.get_seed(candidates[pos], round_idx)
+                     for pos in missing])
+                for pos, result in zip(missing, results):
+                    self.evaluations[keys[pos]] = result
+
+        return [PycIndicatorAccumulator(**self.evaluations[key])
+                for key in keys]
+
+    def run(self):
+        """ Estimates of all candidates with the round they reached,
+        pareto is set for the front of the candidates not eliminated """
+        candidates = self.get_candidates()
+        cost_fun = load_obj_ref(self.cost)
+        costs = np.array([cost_fun(candidate) for candidate in candidates],
+                         dtype=float)
+        sign = 1 if self.sense == "max" else -1
+        quantile = statistics.NormalDist().inv_cdf((1 + self.confidence)/2)
+
+        accumulators = [PycIndicatorAccumulator()
+                        for _ in candidates]
+        rounds = np.zeros(len(candidates), dtype=int)
+        active = np.arange(len(candidates))
+
+        for round_idx in range(self.nb_rounds):
+            rounds[active] = round_idx
+            nb_runs = self.nb_runs_min*self.eta**round_idx
+            results = self.evaluate([candidates[pos] for pos in active],
+                                    nb_runs, round_idx)
+            for pos, acc in zip(active, results):
+                accumulators[pos].merge(acc)
+
+            if len(active) <= 1 or round_idx + 1 == self.nb_rounds:
+                break
+
+            obj = sign*np.array([accumulators[pos].mean()[0]
+                                 for pos in active])
+            half_width = quantile*np.array(
+                [accumulators[pos].stddev()[0] /
+                 np.sqrt(accumulators[pos].count) for pos in active])
+            cost = costs[active]
+
+            # Racing: eliminated when dominated with confidence
+            dominated = dominates(obj - half_width, cost,
+                                  obj + half_width, cost).any(axis=0)
+            active = active[~dominated]
+
+        means = np.array([acc.mean()[0] for acc in accumulators])
+        stddevs = np.array([acc.stddev()[0] for acc in accumulators])
+        counts = np.array([acc.count for acc in accumulators])
+
+        pareto = np.zeros(len(candidates), dtype=bool)
+        pareto[active[pareto_ranks(sign*means[active],
+                                   costs[active]) == 0]] = True
+
+        results_df = pd.DataFrame(candidates)
+        results_df["cost"] = costs
+        results_df["mean"] = means
+        results_df["ci_half_width"] = quantile*stddevs/np.sqrt(counts)
+        results_df["nb_runs"] = counts
+        results_df["round"] = rounds
+        results_df["pareto"] = pareto
+
+        return results_df
+
+    def pareto_front(self, results_df=None):
+        if results_df is None:
+            results_df = self.run()
+        return results_df[results_df["pareto"]]\
+            .sort_values("cost").reset_index(drop=True)
@@ -0,0 +1,127 @@
+import numpy as np
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+import pkg_resources
+installed_pkg = {pkg.key for pkg in pkg_resources.working_set}
+if 'ipdb' in installed_pkg:
+    import ipdb  # noqa: F401
+
+
+def lttb_indices(x, y, nb_points):
+    """ Largest-Triangle-Three-Buckets downsampling: indices of the
+    nb_points points preserving the visual shape of the series """
+    nb_data = len(x)
+    if nb_points >= nb_data or nb_points < 3:
+        return np.arange(nb_data)
+
+    bucket_edges = np.linspace(1, nb_data - 1, nb_points - 1).astype(int)
+    indices = np.empty(nb_points, dtype=int)
+    indices[0] = 0
+    indices[-1] = nb_data - 1
+
+    idx_prev = 0
+    for bucket_idx in range(nb_points - 2):
+        start, end = bucket_edges[bucket_idx], bucket_edges[bucket_idx + 1]
+        next_end = bucket_edges[bucket_idx + 2] \
+            if bucket_idx + 2 < len(bucket_edges) else nb_data
+        x_next = x[end:next_end].mean()
+        y_next = y[end:next_end].mean()
+
+        area = np.abs((x[idx_prev] - x_next)*(y[start:end] - y[idx_prev]) -
+                      (x[idx_prev] - x[start:end])*(y_next - y[idx_prev]))
+        idx_prev = start + int(area.argmax())
+        indices[bucket_idx + 1] = idx_prev
+
+    return indices
+
+
+def minmax_indices(x, y, nb_points):
+    """ Min-max downsampling: indices of the extreme values of
+    nb_points/2 buckets """
+    nb_data = len(x)
+    if nb_points >= nb_data or nb_points < 2:
+        return np.arange(nb_data)
+
+    bucket_edges = np.linspace(0, nb_data, nb_points//2 + 1).astype(int)
+    indices = [0, nb_data - 1]
+    for start, end in zip(bucket_edges[:-1], bucket_edges[1:]):
+        if end > start:
+            indices.append(start + int(y[start:end].argmin()))
+            indices.append(start + int(y[start:end].argmax()))
+
+    return np.unique(indices)
+
+
+def downsample_indices(x, y, nb_points, method="lttb"):
+
+    if nb_points is None:
+        return np.arange(len(x))
+    elif method == "lttb":
+        return lttb_indices(x, y, nb_points)
+    elif method == "minmax":
+        return minmax_indices(x, y, nb_points)
+    else:
+        raise ValueError(f"Downsampling method {method} not supported")
+
+
+def indic_fig(indicators,
+              stat="mean",
+              max_points=None,
+              downsample="lttb",
+              stddev_band=False,
+              facet=None,
+              markers=True,
+              layout={}):
+    """ WebGL line plot of indicators built from their result arrays
+
+    facet: Indicator metadata key used to split the indicators
+    into subplots
+    """
+    facet_values = []
+    for indic in indicators:
+        facet_value = indic.metadata.get(facet) if facet else None
+        if facet_value not in facet_values:
+            facet_values.append(facet_value)
+
+    fig = make_subplots(rows=len(facet_values), cols=1,
+                        shared_xaxes=True,
+                        subplot_titles=[str(val) for val in facet_values]
+                        if facet else None)
+
+    mode = "lines+markers" if markers else "lines"
+
+    for indic in indicators:
+        facet_value = indic.metadata.get(facet) if facet else None
+        row = facet_values.index(facet_value) + 1
+
+        x = np.asarray(indic.instants, dtype=float)
+        y = indic.get_stat_values(stat)
+        idx = downsample_indices(x, y, max_points, method=downsample)
+
+        if stddev_band:
+            y_std = indic.get_stat_values("stddev")[idx]
+            fig.add_trace(
+                go.Scattergl(
+                    x=np.concatenate([x[idx], x[idx][::-1]]),
+                    y=np.concatenate([y[idx] + y_std,
+                                      (y[idx] - y_std)[::-1]]),
+                    fill="toself",
+                    mode="lines",
+                    line=dict(width=0),
+                    opacity=0.2,
+                    legendgroup=indic.name,
+                    showlegend=False,
+                    hoverinfo="skip",
+                    name=indic.name),
+                row=row, col=1)
+
+        fig.add_trace(
+            go.Scattergl(x=x[idx], y=y[idx],
+                         mode=mode,
+                         legendgroup=indic.name,
+                         name=indic.name),
+            row=row, col=1)
+
+    fig.update_layout(**layout)
+
+    return fig
@@ -0,0 +1,106 @@
+import asyncio
+import concurrent.futures
+import math
+import weakref
+import pkg_resources
+installed_pkg = {pkg.key for pkg in pkg_resources.working_set}
+if 'ipdb' in installed_pkg:
+    import ipdb  # noqa: F401
+
+
+class PycSimulationScheduler:
+    """ Shared scheduler limiting the number of simulations running
+    at once, backend simulations are run in its thread pool """
+
+    def __init__(self, max_simulations=1):
+        self.max_simulations = max_simulations
+        self.executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_simulations)
+        self._semaphores = weakref.WeakKeyDictionary()
+
+    @property
+    def semaphore(self):
+        # One semaphore per event loop as asyncio primitives are bound
+        # to the loop using them (the thread pool still limits backend
+        # simulations across loops)
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = asyncio.Semaphore(self.max_simulations)
+            self._semaphores[loop] = semaphore
+        return semaphore
+
+    async def run_in_executor(self, fun, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, fun, *args)
+
+    def shutdown(self):
+        self.executor.shutdown(wait=True)
+
+
+DEFAULT_SCHEDULER = None
+
+
+def get_default_scheduler():
+    global DEFAULT_SCHEDULER
+    if DEFAULT_SCHEDULER is None:
+        DEFAULT_SCHEDULER = PycSimulationScheduler()
+    return DEFAULT_SCHEDULER
+
+
+async def simulate_iter(system, scheduler=None, nb_progress=20,
+                        **simu_params):
+    """ Simulates system batch by batch in the scheduler executor,
+    yielding progress after each batch.
+
+    Without batch_size, the campaign is split in nb_progress batches:
+    batches are seeded from the campaign seed (see
+    PycMCSimulationParam.get_batch_seed), so results are the ones of
+    system.simulate(..., batch_size=ceil(nb_runs/nb_progress)), not of
+    an unbatched simulation with the same seed.
+    On cancellation, the running batch is completed before the
+    simulation slot is released so the backend is never left
+    simulating in the background.
+    """
+    if scheduler is None:
+        scheduler = get_default_scheduler()
+
+    if not simu_params.get("batch_size"):
+        simu_params["batch_size"] = \
+            max(1, math.ceil(simu_params.get("nb_runs", 1)/nb_progress))
+
+    async with scheduler.semaphore:
+        await scheduler.run_in_executor(
+            lambda: system.prepare_simu(**simu_params))
+
+        nb_runs_total = system.simu_params.nb_runs
+        batch_iter = system.simulate_batches()
+        try:
+            while True:
+                batch_future = asyncio.ensure_future(
+                    scheduler.run_in_executor(next, batch_iter, None))
+                try:
+                    batch_idx = await asyncio.shield(batch_future)
+                except asyncio.CancelledError:
+                    await asyncio.wait([batch_future])
+                    raise
+
+                if batch_idx is None:
+                    break
+
+                nb_runs_done = min(
+                    (batch_idx + 1)*system.simu_params.batch_size,
+                    nb_runs_total)
+
+                yield {
+                    "batch": batch_idx,
+                    "nb_runs": nb_runs_done,
+                    "nb_runs_total": nb_runs_total,
+                    "means": {name: indic.accumulator.mean()
+                              for name, indic in system.indicators.items()
+                              if indic.accumulator is not None},
+                }
+        finally:
+            batch_iter.close()
+
+        await scheduler.run_in_executor(system.postproc_simu)
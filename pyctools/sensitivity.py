@@ -0,0 +1,308 @@
+import contextlib
+import numpy as np
+import pandas as pd
+import concurrent.futures
+import pkg_resources
+from .automaton import ExpOccDistribution, DelayOccDistribution, \
+    PycOccurrenceDistribution
+installed_pkg = {pkg.key for pkg in pkg_resources.working_set}
+if 'ipdb' in installed_pkg:
+    import ipdb  # noqa: F401
+
+
+def get_law_param(occ_law):
+    if isinstance(occ_law, ExpOccDistribution):
+        return occ_law.rate
+    elif isinstance(occ_law, DelayOccDistribution):
+        return occ_law.time
+    else:
+        raise ValueError(f"Sensitivity on distribution {type(occ_law).__name__} is not supported")
+
+
+def scale_occ_law(occ_law, factor):
+    """ New distribution whose parameter is multiplied by factor """
+    if isinstance(occ_law, ExpOccDistribution):
+        return ExpOccDistribution(rate=occ_law.rate*factor)
+    elif isinstance(occ_law, DelayOccDistribution):
+        return DelayOccDistribution(time=occ_law.time*factor)
+    else:
+        raise ValueError(f"Sensitivity on distribution {type(occ_law).__name__} is not supported")
+
+
+def set_law_param(occ_law, value):
+    """ New distribution of the same kind with parameter value """
+    if isinstance(occ_law, ExpOccDistribution):
+        return ExpOccDistribution(rate=value)
+    elif isinstance(occ_law, DelayOccDistribution):
+        return DelayOccDistribution(time=value)
+    else:
+        raise ValueError(f"Sensitivity on distribution {type(occ_law).__name__} is not supported")
+
+
+def indicator_exprs(indicators):
+    """ Expressions of the instantaneous values of indicators, the
+    only measure estimated from recorded sequences """
+    exprs = []
+    for indic in indicators:
+        if not hasattr(indic, "to_expr"):
+            raise ValueError(f"Sensitivity of {type(indic).__name__} indicator {indic.name} is not supported")
+        if indic.measure != "value":
+            raise ValueError(f"Sensitivity of indicator {indic.name} with measure {indic.measure} is not supported")
+        exprs.append(indic.to_expr())
+    return exprs
+
+
+@contextlib.contextmanager
+def occ_laws_changed(system, occ_laws):
+    """ Sets occurrence distributions (indexed by transition id), the
+    previous ones are restored on exit """
+    trans_dict = system.get_transitions()
+    occ_laws_prev = {
+        trans_id: PycOccurrenceDistribution.from_bkd(
+            trans_dict[trans_id].distLaw())
+        for trans_id in occ_laws}
+    system.set_occ_laws(occ_laws)
+    try:
+        yield
+    finally:
+        system.set_occ_laws(occ_laws_prev)
+
+
+def record_sequences(system, exprs, instants, nb_runs,
+                     seed=None, trans_ids=[]):
+    """ Simulates nb_runs sequences step by step and records at each
+    instant:
+    - values: expression values, shape (nb_runs, nb_exprs, nb_instants)
+    - counts: number of firings of trans_ids transitions,
+      shape (nb_runs, nb_trans, nb_instants)
+    - exposures: time spent active by trans_ids transitions,
+      shape (nb_runs, nb_trans, nb_instants)
+    """
+    evaluators = [system.compile_expr(expr) for expr in exprs]
+    trans_idx_dict = {trans_id: idx for idx, trans_id in enumerate(trans_ids)}
+    instants = np.sort(np.asarray(instants, dtype=float))
+    nb_instants = len(instants)
+
+    values = np.zeros((nb_runs, len(exprs), nb_instants))
+    counts = np.zeros((nb_runs, len(trans_ids), nb_instants))
+    exposures = np.zeros((nb_runs, len(trans_ids), nb_instants))
+
+    seeds = np.random.SeedSequence(seed).generate_state(nb_runs)
+
+    system.setTMax(instants[-1])
+
+    for seq_idx in range(nb_runs):
+        system.setRNGSeed(int(seeds[seq_idx]))
+        system.startInteractive()
+        system.stepForward()
+
+        count_cur = np.zeros(len(trans_ids))
+        exposure_cur = np.zeros(len(trans_ids))
+        t_prev = system.currentTime()
+        inst_idx = 0
+        while inst_idx < nb_instants:
+            system.updatePlanningInt()
+            trans_active = system.getActiveTransitions()
+            end_times = [trans.endTime() for trans in trans_active]
+            t_next = min(end_times, default=np.inf)
+            active_idx = [trans_idx_dict[trans.name()]
+                          for trans in trans_active
+                          if trans.name() in trans_idx_dict]
+
+            # State is constant until next event
+            while inst_idx < nb_instants and instants[inst_idx] < t_next:
+                values[seq_idx, :, inst_idx] = \
+                    [ev.evaluate_bkd() for ev in evaluators]
+                counts[seq_idx, :, inst_idx] = count_cur
+                exposures[seq_idx, :, inst_idx] = exposure_cur
+                exposures[seq_idx, active_idx, inst_idx] += \
+                    instants[inst_idx] - t_prev
+                inst_idx += 1
+
+            if inst_idx >= nb_instants:
+                break
+
+            exposure_cur[active_idx] += t_next - t_prev
+            for trans, end_time in zip(trans_active, end_times):
+                if end_time == t_next and trans.name() in trans_idx_dict:
+                    count_cur[trans_idx_dict[trans.name()]] += 1
+
+            system.stepForward()
+            t_prev = system.currentTime()
+
+        system.stopInteractive()
+
+    return values, counts, exposures
+
+
+def sensitivity_table(indic_names, instant, occ_laws,
+                      means, derivatives, stderrs, method):
+
+    data_list = []
+    for indic_idx, indic_name in enumerate(indic_names):
+        for param_idx, (trans_id, occ_law) in enumerate(occ_laws.items()):
+            param = get_law_param(occ_law)
+            mean = means[indic_idx]
+            deriv = derivatives[indic_idx, param_idx]
+            data_list.append({
+                "name": indic_name,
+                "instant": instant,
+                "transition": trans_id,
+                "occ_law": str(occ_law),
+                "param": param,
+                "mean": mean,
+                "derivative": deriv,
+                "stderr": stderrs[indic_idx, param_idx],
+                "elasticity": deriv*param/mean if mean != 0 else np.nan,
+                "method": method,
+            })
+
+    return pd.DataFrame(data_list)
+
+
+def lr_sensitivity(system, indicators, occ_laws, instant,
+                   nb_runs=1000, seed=None):
+    """ Likelihood ratio (score function) estimates of the derivatives
+    of indicator means with respect to exponential rates, computed
+    from a single set of sequences.
+
+    For an exponential transition of rate l fired N times while being
+    active T time units, the score is N/l - T and the derivative of
+    E[f] is estimated by the covariance of f and the score.
+    """
+    trans_ids = list(occ_laws.keys())
+    rates = np.array([occ_law.rate for occ_law in occ_laws.values()])
+
+    values, counts, exposures = record_sequences(
+        system, indicator_exprs(indicators),
+        [instant], nb_runs, seed=seed, trans_ids=trans_ids)
+
+    values = values[:, :, -1]
+    scores = counts[:, :, -1]/rates - exposures[:, :, -1]
+    values_c = values - values.mean(axis=0)
+
+    terms = values_c[:, :, None]*scores[:, None, :]
+    derivatives = terms.sum(axis=0)/(nb_runs - 1)
+    stderrs = terms.std(axis=0, ddof=1)/np.sqrt(nb_runs)
+
+    return sensitivity_table([indic.name for indic in indicators],
+                             instant, occ_laws,
+                             values.mean(axis=0), derivatives, stderrs,
+                             method="likelihood-ratio")
+
+
+def fd_sensitivity(system, indicators, occ_laws, instant,
+                   nb_runs=1000, seed=None, step=0.1):
+    """ Central finite difference estimates with common random numbers,
+    used for parameters without density (e.g. delays) """
+    exprs = indicator_exprs(indicators)
+    if seed is None:
+        # Base and perturbed simulations must share their random numbers
+        seed = int(np.random.SeedSequence().generate_state(1)[0])
+
+    values, _, _ = record_sequences(system, exprs, [instant],
+                                    nb_runs, seed=seed)
+    means = values[:, :, -1].mean(axis=0)
+
+    derivatives = np.zeros((len(indicators), len(occ_laws)))
+    stderrs = np.zeros((len(indicators), len(occ_laws)))
+    for param_idx, (trans_id, occ_law) in enumerate(occ_laws.items()):
+        param = get_law_param(occ_law)
+        values_diff = []
+        for factor in [1 + step, 1 - step]:
+            with occ_laws_changed(
+                    system, {trans_id: scale_occ_law(occ_law, factor)}):
+                values, _, _ = record_sequences(system, exprs, [instant],
+                                                nb_runs, seed=seed)
+            values_diff.append(values[:, :, -1])
+
+        terms = (values_diff[0] - values_diff[1])/(2*step*param)
+        derivatives[:, param_idx] = terms.mean(axis=0)
+        stderrs[:, param_idx] = terms.std(axis=0, ddof=1)/np.sqrt(nb_runs)
+
+    return sensitivity_table([indic.name for indic in indicators],
+                             instant, occ_laws,
+                             means, derivatives, stderrs,
+                             method="finite-difference")
+
+
+def rank_sensitivity(sensi_df, by="elasticity"):
+    """ Ranks parameters per indicator by decreasing absolute value """
+    sensi_df = sensi_df.assign(abs_value=sensi_df[by].abs())\
+                       .sort_values(["name", "abs_value"],
+                                    ascending=[True, False])\
+                       .drop(columns="abs_value")
+    sensi_df["rank"] = sensi_df.groupby("name").cumcount() + 1
+    return sensi_df.reset_index(drop=True)
+
+
+def eval_sobol_sample(study, occ_laws):
+    """ Process pool entry point: indicator means at the last instant
+    of a study simulated with occ_laws (the study system is restored) """
+    system = study.get_system()
+    with occ_laws_changed(system, occ_laws):
+        system.simulate(**study.simu_params.dict())
+
+    return [indic.get_stat_values("mean")[-1]
+            for indic in system.indicators.values()]
+
+
+def sobol_indices(study, trans_ids, factor_bounds=(0.5, 2.),
+                  nb_samples=64, seed=None, max_workers=None):
+    """ First order and total Sobol indices of the study indicators
+    with respect to multiplicative factors applied on the parameters
+    of trans_ids occurrence distributions.
+
+    Saltelli sampling needs nb_samples*(nb_params + 2) simulations
+    which are run in a process pool. Indices are estimated with
+    Saltelli (first order) and Jansen (total) estimators.
+    """
+    system = study.get_system()
+    occ_laws_ref = {trans_id: occ_law
+                    for trans_id, occ_law in system.get_occ_laws().items()
+                    if trans_id in trans_ids}
+    indic_names = list(system.indicators.keys())
+    nb_params = len(trans_ids)
+
+    rng = np.random.default_rng(seed)
+    log_low, log_high = np.log(factor_bounds)
+    samples_A = np.exp(rng.uniform(log_low, log_high, (nb_samples, nb_params)))
+    samples_B = np.exp(rng.uniform(log_low, log_high, (nb_samples, nb_params)))
+
+    samples_list = [samples_A, samples_B]
+    for param_idx in range(nb_params):
+        samples_AB = samples_A.copy()
+        samples_AB[:, param_idx] = samples_B[:, param_idx]
+        samples_list.append(samples_AB)
+    samples = np.concatenate(samples_list, axis=0)
+
+    occ_laws_list = [
+        {trans_id: scale_occ_law(occ_laws_ref[trans_id], factor)
+         for trans_id, factor in zip(trans_ids, sample)}
+        for sample in samples]
+
+    with concurrent.futures.ProcessPoolExecutor(
+            max_workers=max_workers) as executor:
+        outputs = np.array(list(executor.map(
+            eval_sobol_sample,
+            [study]*len(occ_laws_list), occ_laws_list,
+            chunksize=max(1, nb_samples//4))))
+
+    outputs = outputs.reshape(nb_params + 2, nb_samples, len(indic_names))
+    f_A, f_B, f_AB = outputs[0], outputs[1], outputs[2:]
+    var = np.concatenate([f_A, f_B]).var(axis=0)
+
+    data_list = []
+    for param_idx, trans_id in enumerate(trans_ids):
+        s_first = (f_B*(f_AB[param_idx] - f_A)).mean(axis=0)/var
+        s_total = 0.5*((f_A - f_AB[param_idx])**2).mean(axis=0)/var
+        for indic_idx, indic_name in enumerate(indic_names):
+            data_list.append({
+                "name": indic_name,
+                "transition": trans_id,
+                "occ_law": str(occ_laws_ref[trans_id]),
+                "S1": s_first[indic_idx],
+                "ST": s_total[indic_idx],
+            })
+
+    return rank_sensitivity(pd.DataFrame(data_list), by="ST")
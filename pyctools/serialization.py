@@ -0,0 +1,321 @@
+import json
+import struct
+import time
+import zlib
+import Pycatshoo as pyc
+import pkg_resources
+from .common import get_pyc_type, get_obj_ref, load_obj_ref
+from .automaton import get_transitions_bkd, get_targets_bkd, \
+    PycOccurrenceDistribution
+from .fingerprint import indicator_specs
+from . import indicator
+installed_pkg = {pkg.key for pkg in pkg_resources.working_set}
+if 'ipdb' in installed_pkg:
+    import ipdb  # noqa: F401
+# msgpack is optional (pip install msgpack), zlib compressed JSON
+# is used otherwise
+if 'msgpack' in installed_pkg:
+    import msgpack
+
+
+MODEL_MAGIC = b"PYCM"
+MODEL_VERSION = 1
+CODEC_JSON = 0
+CODEC_MSGPACK = 1
+
+VAR_TYPES = ["bool", "int", "float"]
+
+
+class StringTable:
+    """ Interned strings: each distinct string is stored once and
+    referenced by its index """
+
+    def __init__(self, strings=None):
+        self.strings = list(strings or [])
+        self.index = {string: idx for idx, string in enumerate(self.strings)}
+
+    def intern(self, string):
+        idx = self.index.get(string)
+        if idx is None:
+            idx = len(self.strings)
+            self.strings.append(string)
+            self.index[string] = idx
+        return idx
+
+
+def occ_law_to_specs(occ_law_bkd, strings):
+    occ_law = PycOccurrenceDistribution.from_bkd(occ_law_bkd)
+    try:
+        params = [float(param) for param in occ_law.get_bkd_params()]
+    except (TypeError, ValueError):
+        raise ValueError(f"Distribution {occ_law} has non numerical parameters and cannot be serialized")
+    return [strings.intern(occ_law.bkd_law_type), params]
+
+
+def get_target_bkd(trans_bkd):
+    """ Single target state of a transition, the only case stored """
+    targets = get_targets_bkd(trans_bkd)
+    if len(targets) != 1:
+        raise ValueError(f"Transition {trans_bkd.name()} has {len(targets)} targets, only single target transitions can be serialized")
+    return targets[0]
+
+
+def indicator_to_specs(indic):
+    """ Indicator specifications (see fingerprint.indicator_specs)
+    with an importable function reference """
+    specs = indicator_specs(indic)
+    if getattr(indic, "fun", None) is not None:
+        try:
+            specs["fun"] = get_obj_ref(indic.fun)
+        except ValueError as error:
+            raise ValueError(f"Indicator {indic.name} cannot be serialized: {error}")
+    return specs
+
+
+def component_to_specs(comp_bkd, strings):
+    """ Nested lists of interned string indices:
+    [name, class, variables, automata] with
+    variable = [name, type, init value],
+    automaton = [name, states, init state position, transitions] and
+    transition = [name, source position, target position,
+                  interruptible, occurrence law] """
+    variables = []
+    for var in comp_bkd.getVariables():
+        value = var.initValue()
+        var_type = type(value).__name__
+        if var_type not in VAR_TYPES:
+            raise ValueError(f"Variable {var.name()} of type {var_type} cannot be serialized")
+        variables.append([strings.intern(var.basename()),
+                          VAR_TYPES.index(var_type),
+                          value])
+
+    automata = []
+    for aut in comp_bkd.getAutomata():
+        state_names = [state.basename() for state in aut.states()]
+        state_pos = {name: pos for pos, name in enumerate(state_names)}
+        transitions = [[strings.intern(trans.basename()),
+                        state_pos[trans.startState().basename()],
+                        state_pos[get_target_bkd(trans).basename()],
+                        bool(trans.interruptible()),
+                        occ_law_to_specs(trans.distLaw(), strings)]
+                       for trans in get_transitions_bkd(aut)]
+        automata.append([strings.intern(aut.basename()),
+                         [strings.intern(name) for name in state_names],
+                         state_pos[aut.initState().basename()],
+                         transitions])
+
+    return [strings.intern(comp_bkd.basename()),
+            strings.intern(get_obj_ref(type(comp_bkd))),
+            variables,
+            automata]
+
+
+def system_to_specs(system):
+    """ Static definition of a backend system: components structure
+    (variables, automata, transitions and occurrence laws) and
+    indicators.
+
+    Raises ValueError for what could not be loaded back: multiple
+    target transitions, non numerical law parameters, variable types
+    other than VAR_TYPES and indicator functions without importable
+    reference (lambdas, local functions).
+    """
+    strings = StringTable()
+    components = [component_to_specs(comp, strings)
+                  for comp in system.getComponents("#.*", "#.*")]
+    indicators = [indicator_to_specs(indic)
+                  for indic in getattr(system, "indicators", {}).values()]
+
+    return {"name": system.name(),
+            "strings": strings.strings,
+            "components": components,
+            "indicators": indicators}
+
+
+def encode_specs(specs, codec=None):
+    if codec is None:
+        codec = CODEC_MSGPACK if 'msgpack' in installed_pkg else CODEC_JSON
+
+    if codec == CODEC_MSGPACK:
+        payload = msgpack.packb(specs, use_bin_type=True, default=str)
+    else:
+        payload = json.dumps(specs, separators=(",", ":"),
+                             default=str).encode("utf-8")
+
+    return MODEL_MAGIC + struct.pack("<BB", MODEL_VERSION, codec) + \
+        zlib.compress(payload)
+
+
+def decode_specs(data):
+    if data[:len(MODEL_MAGIC)] != MODEL_MAGIC:
+        raise ValueError("Not a serialized Pycatshoo model")
+    version, codec = struct.unpack_from("<BB", data, len(MODEL_MAGIC))
+    if version != MODEL_VERSION:
+        raise ValueError(f"Model format version {version} not supported")
+
+    payload = zlib.decompress(data[len(MODEL_MAGIC) + 2:])
+    if codec == CODEC_MSGPACK:
+        if 'msgpack' not in installed_pkg:
+            raise ValueError("Model serialized with msgpack which is not installed")
+        return msgpack.unpackb(payload, raw=False, strict_map_key=False)
+    elif codec == CODEC_JSON:
+        return json.loads(payload.decode("utf-8"))
+    else:
+        raise ValueError(f"Model codec {codec} not supported")
+
+
+def dump_system(system, filename, codec=None):
+    """ Writes the static definition of a system (see system_to_specs) """
+    data = encode_specs(system_to_specs(system), codec=codec)
+    with open(filename, "wb") as file:
+        file.write(data)
+    return len(data)
+
+
+def get_law(comp, law_type, params, strings, law_types):
+    if law_type not in law_types:
+        law_types[law_type] = getattr(pyc.TLawType, strings[law_type])
+    return pyc.IDistLaw.newLaw(comp, law_types[law_type], *params)
+
+
+def build_component(comp, variables, automata, strings, pyc_types,
+                    law_types):
+    """ Adds the stored variables and automata to an empty component """
+    for var_name, var_type, value in variables:
+        py_type, pyc_type = pyc_types[var_type]
+        comp.addVariable(strings[var_name], pyc_type, py_type(value))
+
+    for aut_name, state_names, init_pos, transitions in automata:
+        aut = comp.addAutomaton(strings[aut_name])
+        states = [aut.addState(strings[state_name], state_id)
+                  for state_id, state_name in enumerate(state_names)]
+        aut.setInitState(states[init_pos])
+
+        for trans_name, src_pos, tgt_pos, interruptible, \
+                (law_type, params) in transitions:
+            trans = states[src_pos].addTransition(strings[trans_name])
+            trans.setInterruptible(interruptible)
+            trans.addTarget(states[tgt_pos])
+            trans.setDistLaw(get_law(comp, law_type, params,
+                                     strings, law_types))
+
+
+def update_component(comp, variables, automata, strings, pyc_types,
+                     law_types):
+    """ Sets the stored init values, init states and occurrence laws on
+    a component whose class built the variables and automata """
+    error_msg = f"Component {comp.basename()} of class {type(comp).__name__} does not match its stored definition"
+
+    var_dict = {var.basename(): var for var in comp.getVariables()}
+    aut_dict = {aut.basename(): aut for aut in comp.getAutomata()}
+    if set(var_dict) != {strings[var[0]] for var in variables} or \
+       set(aut_dict) != {strings[aut[0]] for aut in automata}:
+        raise ValueError(error_msg)
+
+    for var_name, var_type, value in variables:
+        py_type, _ = pyc_types[var_type]
+        var_dict[strings[var_name]].setInitValue(py_type(value))
+
+    for aut_name, state_names, init_pos, transitions in automata:
+        aut = aut_dict[strings[aut_name]]
+        states = aut.states()
+        if [state.basename() for state in states] != \
+           [strings[state_name] for state_name in state_names]:
+            raise ValueError(error_msg)
+        aut.setInitState(states[init_pos])
+
+        trans_dict = {(trans.startState().basename(), trans.basename()): trans
+                      for trans in get_transitions_bkd(aut)}
+        if len(trans_dict) != len(transitions):
+            raise ValueError(error_msg)
+        for trans_name, src_pos, tgt_pos, interruptible, \
+                (law_type, params) in transitions:
+            trans = trans_dict.get((strings[state_names[src_pos]],
+                                    strings[trans_name]))
+            if trans is None or \
+               trans.getTarget(0).basename() != strings[state_names[tgt_pos]]:
+                raise ValueError(error_msg)
+            trans.setInterruptible(interruptible)
+            trans.setDistLaw(get_law(comp, law_type, params,
+                                     strings, law_types))
+
+
+def specs_to_system(specs, system_cls=None, comp_cls=None):
+    """ Builds a backend system from its static definition.
+
+    Components are instances of their stored class, so that behaviour
+    written in Python methods (conditions, effects, message boxes) is
+    kept. A class building its variables and automata in its
+    constructor (called with the component name) must build the stored
+    ones: the stored init values, init states and occurrence laws are
+    set on them. Empty components are filled with the stored
+    definition, without intermediate pydantic models.
+
+    comp_cls (e.g. pyc.CComponent) overrides the stored classes: all
+    components are then built from the stored definition only and
+    their Python behaviour is lost.
+    """
+    if system_cls is None:
+        from .system import PycSystem
+        system_cls = PycSystem
+
+    strings = specs["strings"]
+    pyc_types = [get_pyc_type(var_type) for var_type in VAR_TYPES]
+    law_types = {}
+
+    system = system_cls(specs["name"])
+
+    for comp_name, cls_ref, variables, automata in specs["components"]:
+        cls = load_obj_ref(strings[cls_ref]) if comp_cls is None \
+            else comp_cls
+        try:
+            comp = cls(strings[comp_name])
+        except TypeError:
+            raise ValueError(f"Component class {strings[cls_ref]} cannot be built from a component name, set comp_cls to build components from their stored definition")
+
+        if comp.getVariables() or comp.getAutomata():
+            update_component(comp, variables, automata, strings,
+                             pyc_types, law_types)
+        else:
+            build_component(comp, variables, automata, strings,
+                            pyc_types, law_types)
+
+    for indic_specs in specs["indicators"]:
+        indic_specs = dict(indic_specs)
+        indic_cls = getattr(indicator, indic_specs.pop("cls"))
+        if "fun" in indic_specs:
+            indic_specs["fun"] = load_obj_ref(indic_specs["fun"])
+        system.add_indicator(indic_cls(**indic_specs))
+
+    return system
+
+
+def load_system(filename, system_cls=None, comp_cls=None):
+    """ Loads a system written by dump_system.
+
+    Components are rebuilt with their stored class (see
+    specs_to_system), which must be importable. Can be used as PycStudy system factory
+    ("pyctools.serialization:load_system" with system_params
+    {"filename": ...}) so that workers load the model file instead of
+    rebuilding the system.
+    """
+    with open(filename, "rb") as file:
+        specs = decode_specs(file.read())
+    return specs_to_system(specs, system_cls=system_cls, comp_cls=comp_cls)
+
+
+def benchmark_load(filename, system_factory, system_params={}, nb_repeats=3):
+    """ Best times (in seconds) of loading the model file and of
+    rebuilding the system with its factory """
+    factory = load_obj_ref(system_factory)
+
+    def best_time(fun, **kwargs):
+        times = []
+        for _ in range(nb_repeats):
+            start = time.perf_counter()
+            fun(**kwargs)
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    return {"load": best_time(load_system, filename=filename),
+            "factory": best_time(factory, **system_params)}
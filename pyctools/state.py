@@ -0,0 +1,203 @@
+import typing
+import pydantic
+import numpy as np
+import pkg_resources
+from .core import BaseModel
+from .automaton import get_transitions_bkd
+from .common import get_pyc_type
+installed_pkg = {pkg.key for pkg in pkg_resources.working_set}
+if 'ipdb' in installed_pkg:
+    import ipdb  # noqa: F401
+
+
+NumpyArray = typing.TypeVar('np.ndarray')
+
+
+class PycVarSelection:
+    """ Backend variables grouped by type to be read and written
+    as typed arrays """
+
+    def __init__(self, var_bkd, var_types=None):
+        self.var_bkd = list(var_bkd)
+        self.ids = [var.name() for var in self.var_bkd]
+        self.var_types = [type(var.initValue()) for var in self.var_bkd] \
+            if var_types is None else list(var_types)
+
+        type_dict = {get_pyc_type(type_name)[0]: np_type
+                     for type_name, np_type in [("bool", np.bool_),
+                                                ("int", np.int64),
+                                                ("float", np.float64)]}
+        groups = {}
+        for pos, py_type in enumerate(self.var_types):
+            groups.setdefault(py_type, []).append(pos)
+
+        # (py type, numpy type, positions, handles)
+        self.groups = [(py_type, type_dict.get(py_type, object),
+                        np.array(pos_list, dtype=int),
+                        [self.var_bkd[pos] for pos in pos_list])
+                       for py_type, pos_list in groups.items()]
+
+    def __len__(self):
+        return len(self.var_bkd)
+
+    def subset(self, positions):
+        """ Selection of some of the variables, types are not
+        queried again """
+        return PycVarSelection([self.var_bkd[pos] for pos in positions],
+                               [self.var_types[pos] for pos in positions])
+
+    def get_values(self, init=False, dtype=float):
+        values = np.empty(len(self.var_bkd), dtype=dtype)
+        for py_type, np_type, pos, var_bkd in self.groups:
+            if init:
+                values_it = (var.initValue() for var in var_bkd)
+            else:
+                values_it = (var.value() for var in var_bkd)
+            values[pos] = np.fromiter(values_it, dtype=np_type,
+                                      count=len(var_bkd))
+        return values
+
+    def set_values(self, values, init=False):
+        values = np.asarray(values)
+        for py_type, np_type, pos, var_bkd in self.groups:
+            values_grp = values[pos].astype(np_type).tolist()
+            if init:
+                for var, value in zip(var_bkd, values_grp):
+                    var.setInitValue(py_type(value))
+            else:
+                for var, value in zip(var_bkd, values_grp):
+                    var.setValue(py_type(value))
+
+
+def structure_key(system):
+    """ Cheap key of the system structure (components, variables,
+    automata, states and transitions) used to invalidate the backend
+    handles cached on the system """
+    return tuple(
+        (comp.name(), len(comp.getVariables()),
+         tuple(tuple(len(state.transitions()) for state in aut.states())
+               for aut in comp.getAutomata()))
+        for comp in system.getComponents("#.*", "#.*"))
+
+
+class PycStateIndex:
+    """ Backend handles of a system in a fixed order, state arrays
+    follow this order """
+
+    def __init__(self, system):
+        self.structure_key = structure_key(system)
+        comp_list = system.getComponents("#.*", "#.*")
+        self.comp_ids = [comp.name() for comp in comp_list]
+
+        var_bkd = [var for comp in comp_list for var in comp.getVariables()]
+        self.var_selection = PycVarSelection(var_bkd)
+        self.var_comp_names = [var.parent().basename() for var in var_bkd]
+        self.var_comp_ids = [var.parent().name() for var in var_bkd]
+        self.var_names = [var.basename() for var in var_bkd]
+
+        self.aut_bkd = [aut for comp in comp_list
+                        for aut in comp.getAutomata()]
+        self.aut_comp_names = [aut.parent().basename()
+                               for aut in self.aut_bkd]
+        self.aut_comp_ids = [aut.parent().name() for aut in self.aut_bkd]
+        self.aut_names = [aut.basename() for aut in self.aut_bkd]
+        self.aut_states_bkd = [list(aut.states()) for aut in self.aut_bkd]
+        self.aut_states_idx = [{state.basename(): idx
+                                for idx, state in enumerate(states)}
+                               for states in self.aut_states_bkd]
+
+        self.trans_bkd = [trans for aut in self.aut_bkd
+                          for trans in get_transitions_bkd(aut)]
+
+
+# Backend setters needed to restore a state, they are not part of the
+# Pycatshoo API used elsewhere and are checked before restoring
+RESTORE_API = {"system": ["setCurrentTime", "setRNGSeed"],
+               "automaton": ["setCurrentState"],
+               "transition": ["setEndTime"]}
+
+
+def missing_restore_api(system, state_index):
+    """ Backend setters (element kind, method) missing to restore a
+    state of system """
+    elements = {"system": [system],
+                "automaton": state_index.aut_bkd[:1],
+                "transition": state_index.trans_bkd[:1]}
+    return [(kind, method)
+            for kind, methods in RESTORE_API.items()
+            for method in methods
+            if any(not hasattr(elt, method) for elt in elements[kind])]
+
+
+class PycSystemState(BaseModel):
+    """ Compact snapshot of the dynamic state of a system """
+    time: float = pydantic.Field(0, description="Current time")
+    var_values: NumpyArray = pydantic.Field(
+        None, description="Variable values")
+    aut_states: NumpyArray = pydantic.Field(
+        None, description="Current state index of each automaton")
+    trans_end_times: NumpyArray = pydantic.Field(
+        None, description="Planned end time of each transition")
+    seed: int = pydantic.Field(
+        None, description="RNG seed set when the state is restored (not the RNG state of the snapshot)")
+
+    @classmethod
+    def from_bkd(basecls, system, state_index, rng=None):
+
+        if rng is None:
+            rng = np.random.default_rng()
+
+        return basecls(
+            time=system.currentTime(),
+            var_values=state_index.var_selection.get_values(),
+            aut_states=np.array(
+                [states_idx[aut.currentState().basename()]
+                 for aut, states_idx in zip(state_index.aut_bkd,
+                                            state_index.aut_states_idx)],
+                dtype=np.int32),
+            trans_end_times=np.array([trans.endTime()
+                                      for trans in state_index.trans_bkd],
+                                     dtype=float),
+            seed=int(rng.integers(2**31)))
+
+    def update_bkd(self, system, state_index):
+        """ Restores the state into the backend.
+
+        The backend RNG state is not exposed: the RNG is reseeded with
+        a seed drawn when the snapshot was taken. Restoring a state
+        several times always gives the same continuation, which is not
+        the continuation of the run the snapshot was taken from.
+
+        Raises ValueError if the system structure changed since the
+        snapshot and NotImplementedError if the backend lacks the
+        setters of RESTORE_API, before changing anything.
+        """
+        if len(self.var_values) != len(state_index.var_selection) or \
+           len(self.aut_states) != len(state_index.aut_bkd) or \
+           len(self.trans_end_times) != len(state_index.trans_bkd):
+            raise ValueError("System state does not match the system structure (modified after the snapshot)")
+
+        missing = missing_restore_api(system, state_index)
+        if missing:
+            missing_str = ", ".join(f"{kind}.{method}"
+                                    for kind, method in missing)
+            raise NotImplementedError(f"Pycatshoo backend cannot restore system states (missing {missing_str})")
+
+        system.setCurrentTime(self.time)
+
+        state_index.var_selection.set_values(self.var_values)
+
+        for aut, states, state_idx in zip(state_index.aut_bkd,
+                                          state_index.aut_states_bkd,
+                                          self.aut_states):
+            aut.setCurrentState(states[state_idx])
+
+        for trans, end_time in zip(state_index.trans_bkd,
+                                   self.trans_end_times):
+            trans.setEndTime(end_time)
+
+        system.setRNGSeed(self.seed)
+
+    def nbytes(self):
+        return self.var_values.nbytes + self.aut_states.nbytes + \
+            self.trans_end_times.nbytes
@@ -0,0 +1,201 @@
+import re
+import pydantic
+import numpy as np
+import pandas as pd
+import pkg_resources
+from .core import BaseModel
+installed_pkg = {pkg.key for pkg in pkg_resources.working_set}
+if 'ipdb' in installed_pkg:
+    import ipdb  # noqa: F401
+
+
+STATUS_COLUMNS = ["Component", "Name", "Type", "Init. value", "Current value"]
+
+
+class PycStatusView(BaseModel):
+    """ Lazy view of components status
+
+    Filtering on names only uses the names cached in the system state
+    index, values are read for the filtered rows only when a value
+    filter or sort is requested and displayed values are read for the
+    displayed page only. Component and name patterns are searched
+    (not anchored) as component patterns of the system.
+    """
+    comp_pat: str = pydantic.Field(".*", description="Component name regex")
+    name_pat: str = pydantic.Field(".*", description="Variable/automaton name regex")
+    types: list = pydantic.Field(["VAR", "ST"], description="Element types to display")
+    changed_only: bool = pydantic.Field(
+        False, description="Only elements changed since the reference values")
+    differs_from_init: bool = pydantic.Field(
+        False, description="Only elements whose value differs from init value")
+    sort_by: str = pydantic.Field(
+        None, description="Sort column: Component, Name, Type or Current value")
+    ascending: bool = pydantic.Field(True, description="Sort order")
+    page: int = pydantic.Field(0, description="Page index")
+    page_size: int = pydantic.Field(None, description="Rows per page (None: all rows)")
+    nb_rows: int = pydantic.Field(
+        None, description="Number of matching rows of the last view")
+
+    def filter_names(self, comp_names, names):
+        comp_re = re.compile(self.comp_pat)
+        name_re = re.compile(self.name_pat)
+        return np.array([idx for idx, (comp_name, name)
+                         in enumerate(zip(comp_names, names))
+                         if comp_re.search(comp_name) and
+                         name_re.search(name)], dtype=int)
+
+    def need_values(self):
+        return self.changed_only or self.differs_from_init or \
+            self.sort_by == "Current value"
+
+    def read_values(self, state_index):
+        """ Current values of the name filtered elements indexed by
+        type as (positions in state index, values) where automaton
+        values are current state indices.
+
+        Used as a light reference state to track changes of these
+        elements only.
+        """
+        values_dict = {}
+        if "VAR" in self.types:
+            var_pos = self.filter_names(state_index.var_comp_names,
+                                        state_index.var_names)
+            values_dict["VAR"] = (
+                var_pos, state_index.var_selection.subset(var_pos).get_values())
+        if "ST" in self.types:
+            aut_pos = self.filter_names(state_index.aut_comp_names,
+                                        state_index.aut_names)
+            values_dict["ST"] = (aut_pos, np.array(
+                [state_index.aut_states_idx[pos][
+                    state_index.aut_bkd[pos].currentState().basename()]
+                 for pos in aut_pos], dtype=float))
+        return values_dict
+
+    def get_rows(self, state_index, values_ref=None):
+        """ Matching rows as (type, position in state index, current value
+        as float or None if not read) arrays, elements missing from
+        values_ref (see read_values) are not reported as changed """
+        if self.changed_only and values_ref is None:
+            raise ValueError("Reference values needed to filter changed elements")
+
+        values_dict = self.read_values(state_index) if self.need_values() \
+            else {row_type: (self.filter_names(*names), None)
+                  for row_type, names in [
+                      ("VAR", (state_index.var_comp_names,
+                               state_index.var_names)),
+                      ("ST", (state_index.aut_comp_names,
+                              state_index.aut_names))]
+                  if row_type in self.types}
+
+        rows_list = []
+        for row_type, (pos, values) in values_dict.items():
+            if values is not None:
+                keep = np.ones(len(pos), dtype=bool)
+                if self.differs_from_init:
+                    if row_type == "VAR":
+                        values_init = state_index.var_selection.subset(pos)\
+                                                               .get_values(init=True)
+                    else:
+                        values_init = np.array(
+                            [state_index.aut_states_idx[aut_pos][
+                                state_index.aut_bkd[aut_pos].initState().basename()]
+                             for aut_pos in pos], dtype=float)
+                    keep &= values != values_init
+                if self.changed_only:
+                    pos_ref, values_ref_cur = values_ref.get(
+                        row_type, (np.array([], dtype=int), np.array([])))
+                    ref_idx = np.searchsorted(pos_ref, pos)
+                    tracked = ref_idx < len(pos_ref)
+                    tracked[tracked] = pos_ref[ref_idx[tracked]] == pos[tracked]
+                    changed = np.zeros(len(pos), dtype=bool)
+                    changed[tracked] = \
+                        values[tracked] != values_ref_cur[ref_idx[tracked]]
+                    keep &= changed
+                pos, values = pos[keep], values[keep]
+            rows_list.append((row_type, pos, values))
+
+        return rows_list
+
+    def to_df(self, system, values_ref=None):
+        """ Status rows grouped by component (variables then automata of
+        each component in the system order) unless sorted, ties of the
+        sort keep this order """
+        state_index = system.get_state_index()
+
+        rows_list = self.get_rows(state_index, values_ref=values_ref)
+
+        comp_rank = {comp_id: rank
+                     for rank, comp_id in enumerate(state_index.comp_ids)}
+        comp_ids = {"VAR": state_index.var_comp_ids,
+                    "ST": state_index.aut_comp_ids}
+        type_rank = {"VAR": 0, "ST": 1}
+        rows = [(row_type, pos, value)
+                for row_type, pos_list, values in rows_list
+                for pos, value in zip(
+                    pos_list,
+                    values if values is not None else [None]*len(pos_list))]
+        rows.sort(key=lambda row: (comp_rank[comp_ids[row[0]][row[1]]],
+                                   type_rank[row[0]], row[1]))
+        self.nb_rows = len(rows)
+
+        if self.sort_by:
+            names = {"VAR": state_index.var_names,
+                     "ST": state_index.aut_names}
+            if self.sort_by == "Component":
+                sort_key = lambda row: comp_ids[row[0]][row[1]]
+            elif self.sort_by == "Name":
+                sort_key = lambda row: names[row[0]][row[1]]
+            elif self.sort_by == "Type":
+                sort_key = lambda row: row[0]
+            elif self.sort_by == "Current value":
+                # Variable values and automaton state names are not
+                # comparable: variables come first, then automata
+                # sorted by current state name
+                sort_key = lambda row: \
+                    (0, row[2], "") if row[0] == "VAR" else \
+                    (1, 0., state_index.aut_states_bkd[row[1]][
+                        int(row[2])].basename())
+            else:
+                raise ValueError(f"Sort column {self.sort_by} not supported")
+            if self.sort_by == "Current value" and not self.ascending:
+                # Keeps variables before automata
+                rows = sorted([row for row in rows if row[0] == "VAR"],
+                              key=sort_key, reverse=True) + \
+                    sorted([row for row in rows if row[0] == "ST"],
+                           key=sort_key, reverse=True)
+            else:
+                rows = sorted(rows, key=sort_key, reverse=not self.ascending)
+
+        if self.page_size:
+            start = self.page*self.page_size
+            rows = rows[start:start + self.page_size]
+
+        data_list = []
+        for row_type, pos, _ in rows:
+            if row_type == "VAR":
+                var = state_index.var_selection.var_bkd[pos]
+                data_list.append(
+                    [state_index.var_comp_ids[pos],
+                     state_index.var_names[pos],
+                     row_type,
+                     var.initValue(),
+                     var.value()])
+            else:
+                aut = state_index.aut_bkd[pos]
+                data_list.append(
+                    [state_index.aut_comp_ids[pos],
+                     state_index.aut_names[pos],
+                     row_type,
+                     aut.initState().basename(),
+                     aut.currentState().basename()])
+
+        return pd.DataFrame(data_list, columns=STATUS_COLUMNS)
+
+    def page_info(self):
+        if not self.page_size:
+            return f"{self.nb_rows} rows"
+        start = self.page*self.page_size
+        end = min(start + self.page_size, self.nb_rows)
+        nb_pages = -(-self.nb_rows//self.page_size)
+        return f"rows {start + 1}-{end} of {self.nb_rows}, " \
+            f"page {self.page + 1}/{nb_pages}"
@@ -0,0 +1,120 @@
+import math
+import statistics
+import pydantic
+import numpy as np
+import pkg_resources
+from .core import BaseModel
+installed_pkg = {pkg.key for pkg in pkg_resources.working_set}
+if 'ipdb' in installed_pkg:
+    import ipdb  # noqa: F401
+
+
+class PycSteadyStateParam(BaseModel):
+    nb_batches: int = pydantic.Field(
+        20, description="Number of batches per sequence after warm-up")
+    confidence: float = pydantic.Field(
+        0.95, description="Confidence level of the intervals")
+    batch_size_mser: int = pydantic.Field(
+        5, description="Batch size of the MSER warm-up detection")
+
+
+def t_cdf(t, dof):
+    """ Student cumulative distribution for an integer number of
+    degrees of freedom (finite series, Abramowitz and Stegun 26.7.3
+    and 26.7.4) """
+    theta = math.atan(t/math.sqrt(dof))
+    cos_sq = math.cos(theta)**2
+    total = 0.
+    if dof % 2 == 1:
+        term = math.cos(theta)
+        for k in range(1, (dof - 1)//2 + 1):
+            total += term
+            term *= 2*k/(2*k + 1)*cos_sq
+        prob = 2/math.pi*(theta + math.sin(theta)*total)
+    else:
+        term = 1.
+        for k in range(1, dof//2 + 1):
+            total += term
+            term *= (2*k - 1)/(2*k)*cos_sq
+        prob = math.sin(theta)*total
+    return (1 + prob)/2
+
+
+def t_quantile(prob, dof):
+    """ Student quantile: inversion of t_cdf below 30 degrees of
+    freedom, Cornish-Fisher expansion of the normal quantile otherwise
+    (absolute error below 1e-5 for prob <= 0.9995) """
+    if dof < 30 and dof == int(dof):
+        dof = int(dof)
+        low, high = -1., 1.
+        while t_cdf(high, dof) < prob:
+            high *= 2
+        while t_cdf(low, dof) > prob:
+            low *= 2
+        for _ in range(100):
+            mid = (low + high)/2
+            if t_cdf(mid, dof) < prob:
+                low = mid
+            else:
+                high = mid
+        return (low + high)/2
+
+    z = statistics.NormalDist().inv_cdf(prob)
+    return z + (z**3 + z)/(4*dof) + \
+        (5*z**5 + 16*z**3 + 3*z)/(96*dof**2) + \
+        (3*z**7 + 19*z**5 + 17*z**3 - 15*z)/(384*dof**3) + \
+        (79*z**9 + 776*z**7 + 1482*z**5 - 1920*z**3 - 945*z) / \
+        (92160*dof**4)
+
+
+def mser_truncation(values, batch_size=5):
+    """ MSER-m warm-up detection: number of leading observations to
+    delete, minimizing the standard error of the remaining batch means
+    (the search is restricted to the first half of the series) """
+    nb_batches = len(values)//batch_size
+    if nb_batches < 2:
+        return 0
+
+    batch_means = np.asarray(values[:nb_batches*batch_size], dtype=float)\
+                    .reshape(nb_batches, batch_size).mean(axis=1)
+
+    # Statistics of batch_means[d:] for all d, from reversed cumulated sums
+    counts = np.arange(nb_batches, 0, -1)
+    sums = np.cumsum(batch_means[::-1])[::-1]
+    sums_sq = np.cumsum(batch_means[::-1]**2)[::-1]
+    sse = sums_sq - sums**2/counts
+    mser = sse/counts**2
+
+    d_max = nb_batches//2
+    return int(np.argmin(mser[:d_max + 1]))*batch_size
+
+
+def batch_means(values, nb_batches):
+    """ Means of nb_batches contiguous batches """
+    batch_size = len(values)//nb_batches
+    if batch_size == 0:
+        raise ValueError(f"Not enough observations ({len(values)}) for {nb_batches} batches")
+    return np.asarray(values[len(values) - nb_batches*batch_size:],
+                      dtype=float)\
+             .reshape(nb_batches, batch_size).mean(axis=1)
+
+
+def steady_state_estimate(trajectories, instants, params):
+    """ Time-averaged estimate over post warm-up observations of long
+    sequences (one trajectory per row on a regular instant grid)
+
+    Returns mean, confidence interval half width and warm-up end time.
+    """
+    trajectories = np.atleast_2d(np.asarray(trajectories, dtype=float))
+
+    truncation = max(mser_truncation(traj, params.batch_size_mser)
+                     for traj in trajectories)
+
+    means = np.concatenate([batch_means(traj[truncation:], params.nb_batches)
+                            for traj in trajectories])
+
+    mean = means.mean()
+    half_width = t_quantile((1 + params.confidence)/2, len(means) - 1) * \
+        means.std(ddof=1)/np.sqrt(len(means))
+
+    return mean, half_width, instants[truncation]
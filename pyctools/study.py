@@ -1,73 +1,139 @@
 import typing
 import pydantic
 import pkg_resources
-from .. import StudyModel, MCSimulationParam
-from . import PycSystem, PycVarIndicator, PycTransition
+import concurrent.futures
+import pandas as pd
+from .core import BaseModel
+from .common import get_obj_ref, load_obj_ref, spec_hash
+from .system import PycMCSimulationParam
 
 installed_pkg = {pkg.key for pkg in pkg_resources.working_set}
 if 'ipdb' in installed_pkg:
     import ipdb  # noqa: 401
 
 
-# Utility functions
-# -----------------
+PandasDataFrame = typing.TypeVar('pd.core.dataframe')
 
+# Built systems of the current process indexed by model hash
+SYSTEM_CACHE = {}
 
-class PycMCSimulationParam(MCSimulationParam):
-    pass
 
+class StudyModel(BaseModel):
+    name: str = pydantic.Field(..., description="Study name")
+    description: str = pydantic.Field("", description="Study description")
+    before_hook: typing.Any = pydantic.Field(
+        None, description="Function called with the system before simulation")
+    after_hook: typing.Any = pydantic.Field(
+        None, description="Function called with the system after simulation")
 
-class PycStudy(StudyModel):
+    def run_before_hook(self, system):
+        if self.before_hook:
+            load_obj_ref(self.before_hook)(system)
 
-    system_model: PycSystem = pydantic.Field(
-        None, description="System model")
+    def run_after_hook(self, system):
+        if self.after_hook:
+            load_obj_ref(self.after_hook)(system)
 
-    simu_params: PycMCSimulationParam = pydantic.Field(
-        None, description="Simulator parametters")
 
-    indicators: typing.List[PycVarIndicator] = pydantic.Field(
-        [], description="List of indicators")
+class PycStudy(StudyModel):
 
-    def prepare_simu(self, **kwargs):
+    system_factory: typing.Any = pydantic.Field(
+        ..., description="Function (or 'module:function' reference) building the system")
+    system_params: dict = pydantic.Field(
+        {}, description="Parameters passed to the system factory")
+    indicators: typing.List[dict] = pydantic.Field(
+        [], description="Variable indicator specifications (see PycSystem.add_indicator_var)")
+    simu_params: PycMCSimulationParam = pydantic.Field(
+        PycMCSimulationParam(), description="Simulator parameters")
+    results: PandasDataFrame = pydantic.Field(
+        None, description="Indicator estimates")
+
+    def model_specs(self):
+        """ Everything that is bound into the backend system """
+        return {
+            "system_factory": get_obj_ref(self.system_factory),
+            "system_params": self.system_params,
+            "indicators": self.indicators,
+            "schedule": self.simu_params.dict()["schedule"],
+            "time_unit": self.simu_params.time_unit,
+        }
+
+    def model_hash(self):
+        return spec_hash(self.model_specs())
+
+    def build_system(self):
+        system = load_obj_ref(self.system_factory)(**self.system_params)
+        for indic_specs in self.indicators:
+            system.add_indicator_var(**indic_specs)
+        # Specification shipped to remote workers and fingerprint
+        # of the system they rebuild
+        system.model_spec = self.copy(exclude={"results"})
+        system.model_fingerprint = system.fingerprint()
+        return system
+
+    def get_system(self):
+        """ System of the study, shared through SYSTEM_CACHE by the
+        studies of the same model. Studies with hooks may change the
+        system: they get a system of their own. """
+        if self.before_hook or self.after_hook:
+            return self.build_system()
+
+        model_hash = self.model_hash()
+        system = SYSTEM_CACHE.get(model_hash)
+        if system is None:
+            system = self.build_system()
+            SYSTEM_CACHE[model_hash] = system
+
+        return system
 
-        self.run_before_hook()
+    def run_simu(self, **kwargs):
 
-        # Set instants
-        instants_list = self.simu_params.get_instants_list()
+        system = self.get_system()
 
-        # Prepare indicators
-        for indic in self.indicators:
-            indic.instants = instants_list
-            indic.bkd = \
-                self.system_model.bkd.addIndicator(indic.name,
-                                                   indic.get_expr(),
-                                                   indic.get_type())
-            indic.update_restitution()
+        self.run_before_hook(system)
 
-        # Simulator configuration
-        self.system_model.bkd.setTMax(instants_list[-1])
+        system.simulate(**self.simu_params.dict())
 
-        for instant in instants_list:
-            self.system_model.bkd.addInstant(instant)
+        self.run_after_hook(system)
 
-        if self.simu_params.seed:
-            self.system_model.bkd.setRNGSeed(self.simu_params.seed)
+        results = system.indic_to_frame()
+        if results is not None:
+            results.insert(0, "study", self.name)
+        self.results = results
 
-        if self.simu_params.nb_runs:
-            self.system_model.bkd.setNbSeqToSim(self.simu_params.nb_runs)
+        return self.results
 
-    def run_simu(self, **kwargs):
 
-        self.prepare_simu(**kwargs)
+def run_study_group(studies):
+    """ Process pool entry point: studies sharing the same model
+    are run on the same worker to reuse the cached system """
+    return [study.run_simu() for study in studies]
+
 
-        self.system_model.bkd.simulate()
+def run_studies(studies, max_workers=None):
+    """ Runs studies concurrently in a process pool and returns the
+    consolidated indicator estimates """
 
-        self.postproc_simu(**kwargs)
+    study_groups = {}
+    for study in studies:
+        study_groups.setdefault(study.model_hash(), []).append(study)
+    study_groups = list(study_groups.values())
 
-    def postproc_simu(self, **kwargs):
+    if max_workers == 1:
+        results_groups = [run_study_group(group) for group in study_groups]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=max_workers) as executor:
+            results_groups = list(executor.map(run_study_group, study_groups))
 
-        for indic in self.indicators:
-            indic.update_values()
+    results_list = []
+    for group, results_group in zip(study_groups, results_groups):
+        for study, results in zip(group, results_group):
+            study.results = results
+            if results is not None:
+                results_list.append(results)
 
-        self.run_after_hook()
+    if not results_list:
+        return None
 
+    return pd.concat(results_list, axis=0, ignore_index=True)
@@ -6,8 +6,26 @@ import plotly.express as px
 import typing
 import pkg_resources
 import itertools
+import math
 import re
-from .indicator import PycVarIndicator, PycFunIndicator
+from .indicator import PycVarIndicator, PycFunIndicator, PycExprIndicator, \
+    compact_to_frame
+from .expression import PycExpression
+from .serialization import dump_system, load_system
+from .automaton import get_transitions_bkd, PycOccurrenceDistribution, \
+    ExpOccDistribution, DelayOccDistribution
+from .transition_table import PycTransitionTable, automaton_from_bkd
+from .sensitivity import lr_sensitivity, fd_sensitivity, rank_sensitivity
+from .fingerprint import PycFingerprint, component_specs, indicator_specs
+from .state import PycStateIndex, PycSystemState, PycVarSelection, \
+    structure_key
+from .executor import PycBatchTask, run_batch_task, merge_batch_results
+from .indicator import PycIndicatorAccumulator
+from .steady_state import PycSteadyStateParam, steady_state_estimate
+from .checkpoint import PycCheckpoint
+from .plotting import indic_fig, downsample_indices
+from .scheduler import simulate_iter
+from .monitor import PycMonitorPublisher
 installed_pkg = {pkg.key for pkg in pkg_resources.working_set}
 if 'ipdb' in installed_pkg:
     import ipdb  # noqa: F401
@@ -50,7 +68,33 @@ class MCSimulationParam(pydantic.BaseModel):
 
         
 class PycMCSimulationParam(MCSimulationParam):
-    pass
+    batch_size: int = pydantic.Field(
+        None, description="Number of sequences per backend simulation (None: single simulation)")
+    checkpoint_path: str = pydantic.Field(
+        None, description="Checkpoint file of batched simulations")
+    checkpoint_period: int = pydantic.Field(
+        1, description="Number of batches between two checkpoints")
+    result_mode: str = pydantic.Field(
+        "frame", description="Indicator results storage: frame (DataFrame per indicator) or compact (float32, run-length encoded series)")
+
+    @pydantic.validator("result_mode")
+    def check_result_mode(cls, value):
+        if value not in ["frame", "compact"]:
+            raise ValueError(f"Result mode {value} not supported")
+        return value
+
+    def get_nb_batches(self):
+        return math.ceil(self.nb_runs/self.batch_size)
+
+    def get_batch_nb_runs(self, batch_idx):
+        return min(self.batch_size,
+                   self.nb_runs - batch_idx*self.batch_size)
+
+    def get_batch_seed(self, batch_idx):
+        """ Seed of a batch only depends on the campaign seed and the
+        batch index, batches can then be simulated in any order """
+        seed_seq = np.random.SeedSequence([self.seed, batch_idx])
+        return int(seed_seq.generate_state(1)[0])
 
         
 class PycSystem(pyc.CSystem):
@@ -58,6 +102,14 @@ class PycSystem(pyc.CSystem):
     def __init__(self, name):
         super().__init__(name)
         self.indicators = {}
+        self.instants_added = []
+        self.fingerprint_parts = PycFingerprint()
+        self.state_index = None
+        self.var_selections = {}
+        self.model_spec = None
+        self.model_fingerprint = None
+        self.simu_params = None
+        self.monitor = None
 
     def add_indicator_var(self, **indic_specs):
         
@@ -90,20 +142,282 @@ class PycSystem(pyc.CSystem):
                 # if "MES" in comp_pat:
                 #     ipdb.set_trace()
 
-                self.indicators[indic_name_cur] = indic
+                self.add_indicator(indic)
+
+    def add_indicator_expr(self, name, expr, **indic_specs):
+
+        stats = indic_specs.pop("stats", ["mean"])
+
+        indic = PycExprIndicator(
+            name=name,
+            expr=expr,
+            stats=stats,
+            **indic_specs)
+
+        self.add_indicator(indic)
+
+    def add_indicator_group(self, name, aggregation, comp_pat=".*",
+                            var_pat=".*", k=None, subgroups={},
+                            keep_members=False, **indic_specs):
+        """ Aggregate (sum, mean, min, max, any, all, count or kofn) of
+        the comp_pat components variables matching var_pat, evaluated
+        in each sequence so that its statistics account for the
+        correlation between members.
+
+        subgroups (label: component regex) adds one aggregate per
+        subgroup named {name}_{label}. Member indicators (see
+        add_indicator_var) are only created if keep_members is set.
+        """
+        if not (aggregation in ["sum", "mean", "min", "max", "any", "all",
+                                "count", "kofn"]):
+            raise ValueError(f"Aggregation {aggregation} not supported")
+        if aggregation == "kofn" and k is None:
+            raise ValueError("kofn aggregation needs k")
+
+        metadata = indic_specs.pop("metadata", {})
+
+        group_list = [(name, comp_pat, dict(metadata, group=name))] + \
+            [(f"{name}_{label}", sub_pat,
+              dict(metadata, group=name, subgroup=label))
+             for label, sub_pat in subgroups.items()]
+
+        for group_name, group_pat, group_metadata in group_list:
+            members = f"{group_pat!r}, {var_pat!r}"
+            expr = f"kofn({k}, {members})" if aggregation == "kofn" \
+                else f"{aggregation}({members})"
+            self.add_indicator_expr(group_name, expr,
+                                    metadata=group_metadata,
+                                    **indic_specs)
+
+        if keep_members:
+            self.add_indicator_var(component=comp_pat, var=var_pat,
+                                   metadata=dict(metadata, group=name),
+                                   **indic_specs)
+
+    def add_indicator(self, indic):
+
+        self.indicators[indic.name] = indic
+        self.fingerprint_parts.set_part(("indicator", indic.name),
+                                        indicator_specs(indic))
+
+    def fingerprint(self, refresh=False):
+        """ Structural hash of components and indicators.
+
+        Components are hashed the first time they are seen and rehashed
+        when modified through set_occ_laws or set_values (init values).
+        Changes made directly on the backend need refresh to rehash all
+        components and indicators.
+        """
+        if refresh:
+            self.fingerprint_parts = PycFingerprint()
+        comp_dict = {comp.name(): comp
+                     for comp in self.getComponents("#.*", "#.*")}
+        self.fingerprint_parts.sync("component", comp_dict, component_specs)
+        self.fingerprint_parts.sync("indicator", self.indicators,
+                                    indicator_specs)
+
+        return self.fingerprint_parts.hexdigest()
+
+    def get_variables(self, comp_pat=".*", var_pat=".*"):
+        """ Backend variables selected by component and variable regex """
+        return [var
+                for comp in self.getComponents("#" + comp_pat, "#.*")
+                for var in comp.getVariables()
+                if re.search(var_pat, var.basename())]
+
+    def get_transitions(self, comp_pat=".*"):
+        """ Backend transitions indexed by transition id """
+        return {trans.name(): trans
+                for comp in self.getComponents("#" + comp_pat, "#.*")
+                for aut in comp.getAutomata()
+                for trans in get_transitions_bkd(aut)}
+
+    def get_occ_laws(self, comp_pat=".*"):
+        """ Occurrence distributions indexed by transition id """
+        return {trans_id: PycOccurrenceDistribution.from_bkd(trans.distLaw())
+                for trans_id, trans in self.get_transitions(comp_pat).items()}
+
+    def set_occ_laws(self, occ_laws):
+        """ Sets occurrence distributions indexed by transition id """
+        trans_dict = self.get_transitions()
+        for trans_id, occ_law in occ_laws.items():
+            trans = trans_dict[trans_id]
+            trans.setDistLaw(occ_law.to_bkd(trans.parent()))
+            self.fingerprint_parts.remove_part(
+                ("component", trans.parent().name()))
+
+    def sensitivity(self, instant, nb_runs=1000, seed=None,
+                    indicators=None, comp_pat=".*", delay_step=0.1):
+        """ Ranked derivative estimates of indicator means at instant
+        with respect to the occurrence law parameters of comp_pat
+        components: likelihood ratio estimates for exponential rates
+        and finite differences for delays. Only instantaneous value
+        indicators with an expression (variable and expression
+        indicators) are supported. """
+        indic_list = self.select_indicators(indicators)
+        occ_laws = self.get_occ_laws(comp_pat)
+
+        sensi_df_list = []
+        occ_laws_exp = {trans_id: occ_law
+                        for trans_id, occ_law in occ_laws.items()
+                        if isinstance(occ_law, ExpOccDistribution)}
+        if occ_laws_exp:
+            sensi_df_list.append(
+                lr_sensitivity(self, indic_list, occ_laws_exp, instant,
+                               nb_runs=nb_runs, seed=seed))
+
+        occ_laws_delay = {trans_id: occ_law
+                          for trans_id, occ_law in occ_laws.items()
+                          if isinstance(occ_law, DelayOccDistribution)}
+        if occ_laws_delay:
+            sensi_df_list.append(
+                fd_sensitivity(self, indic_list, occ_laws_delay, instant,
+                               nb_runs=nb_runs, seed=seed,
+                               step=delay_step))
+
+        if not sensi_df_list:
+            return None
+
+        return rank_sensitivity(
+            pd.concat(sensi_df_list, axis=0, ignore_index=True))
+
+    def check_structure(self):
+        """ Drops the cached backend handles (state index and variable
+        selections) if components, variables, automata, states or
+        transitions were added since they were built """
+        if self.state_index is not None and \
+           self.state_index.structure_key != structure_key(self):
+            self.state_index = None
+            self.var_selections = {}
+
+    def get_state_index(self, refresh=False):
+        """ Backend handles used by state snapshots, rebuilt when the
+        system structure changes """
+        self.check_structure()
+        if self.state_index is None or refresh:
+            self.state_index = PycStateIndex(self)
+        return self.state_index
+
+    def select_variables(self, comp_pat=".*", var_pat=".*"):
+        """ Typed selection of variables, cached by patterns until the
+        system structure changes """
+        # Selections are invalidated with the state index
+        self.get_state_index()
+        selection = self.var_selections.get((comp_pat, var_pat))
+        if selection is None:
+            selection = PycVarSelection(self.get_variables(comp_pat, var_pat))
+            self.var_selections[(comp_pat, var_pat)] = selection
+        return selection
+
+    def get_var_selection(self, selector):
+        if selector is None:
+            return self.get_state_index().var_selection
+        elif isinstance(selector, PycVarSelection):
+            return selector
+        else:
+            return self.select_variables(*selector)
+
+    def get_values(self, selector=None, init=False, dtype=float):
+        """ Current (or init) values of the variables selected by a
+        PycVarSelection, a (comp_pat, var_pat) tuple or all variables
+        if None """
+        return self.get_var_selection(selector).get_values(init=init,
+                                                           dtype=dtype)
+
+    def set_values(self, values, selector=None, init=False):
+        selection = self.get_var_selection(selector)
+        selection.set_values(values, init=init)
+        if init:
+            # Init values are part of the components fingerprint
+            for comp_name in {var.parent().name()
+                              for var in selection.var_bkd}:
+                self.fingerprint_parts.remove_part(("component", comp_name))
+
+    def snapshot(self):
+        return PycSystemState.from_bkd(self, self.get_state_index())
+
+    def restore(self, state):
+        state.update_bkd(self, self.get_state_index())
+
+    def transition_table(self, comp_pat=".*"):
+        """ Static transition table of the system automata """
+        return PycTransitionTable(
+            [automaton_from_bkd(aut)
+             for comp in self.getComponents("#" + comp_pat, "#.*")
+             for aut in comp.getAutomata()])
+
+    def check_model(self, comp_pat=".*"):
+        """ Structural issues of the system automata found before
+        simulation (see PycTransitionTable.check) """
+        return self.transition_table(comp_pat).check()
+
+    def save_model(self, filename, codec=None):
+        """ Writes the system definition in a compact binary file
+        (see serialization.dump_system), returns the file size """
+        return dump_system(self, filename, codec=codec)
+
+    @classmethod
+    def load_model(basecls, filename, comp_cls=None):
+        return load_system(filename, system_cls=basecls, comp_cls=comp_cls)
+
+    def compile_expr(self, expr):
+        """ Compiles an expression over the system variables and
+        automaton states """
+        var_bkd_dict = {}
+
+        def resolver(comp_pat, var_pat, exact):
+            if exact:
+                comp_pat = f"^{re.escape(comp_pat)}$"
+                var_pat = f"^{re.escape(var_pat)}$"
+            var_list = []
+            for var in self.get_variables(comp_pat, var_pat):
+                var_key = (var.parent().basename(), var.basename())
+                var_bkd_dict[var_key] = var
+                var_list.append(var_key)
+            return var_list
+
+        aut_bkd_dict = {}
+
+        def state_resolver(comp_name, aut_name, state_name):
+            state_index = self.get_state_index()
+            aut_list = []
+            for pos, aut in enumerate(state_index.aut_bkd):
+                if state_index.aut_comp_names[pos] != comp_name or \
+                   (aut_name is not None and
+                        state_index.aut_names[pos] != aut_name):
+                    continue
+                state_idx = state_index.aut_states_idx[pos].get(state_name)
+                if state_idx is None:
+                    continue
+                aut_key = (comp_name, state_index.aut_names[pos])
+                aut_bkd_dict[aut_key] = (aut,
+                                         state_index.aut_states_idx[pos])
+                aut_list.append((aut_key, state_idx))
+            return aut_list
+
+        return PycExpression(expr, resolver, var_bkd_dict,
+                             state_resolver, aut_bkd_dict)
 
     def prepare_simu(self, **params):
 
         #self.run_before_hook()
         simu_params = PycMCSimulationParam(**params)
-        
+        if simu_params.batch_size and simu_params.seed is None:
+            # Batch seeds must be reproducible on resume
+            simu_params.seed = \
+                int(np.random.SeedSequence().generate_state(1)[0])
+        self.simu_params = simu_params
+
         # Set instants
         instants_list = simu_params.get_instants_list()
 
         # Prepare indicators
+        # Indicators already bound to the backend are kept as is
+        # so that a system can be simulated several times
         for indic_name, indic in self.indicators.items():
             indic.instants = instants_list
-            indic.set_indicator(self)
+            if indic.bkd is None:
+                indic.set_indicator(self)
             # indic.bkd = \
             #     self.addIndicator(indic.name,
             #                       indic.get_expr(),
@@ -113,8 +427,17 @@ class PycSystem(pyc.CSystem):
         # Simulator configuration
         self.setTMax(instants_list[-1])
 
+        # Backend instants cannot be removed: instants of previous
+        # simulations are kept and indicators read their own ones
         for instant in instants_list:
-            self.addInstant(instant)
+            if not (instant in self.instants_added):
+                self.addInstant(instant)
+                self.instants_added.append(instant)
+        instants_bkd = sorted(self.instants_added)
+        instants_idx = None if instants_bkd == instants_list \
+            else np.searchsorted(instants_bkd, instants_list)
+        for indic in self.indicators.values():
+            indic.bkd_instants_idx = instants_idx
 
         if simu_params.seed:
             self.setRNGSeed(simu_params.seed)
@@ -122,18 +445,320 @@ class PycSystem(pyc.CSystem):
         if simu_params.nb_runs:
             self.setNbSeqToSim(simu_params.nb_runs)
 
-    def simulate(self, **simu_params):
-        
+    def simulate(self, result_cache=None, executor=None, steady_state=None,
+                 monitor=None, **simu_params):
+
+        if monitor is not None:
+            self.simulate_monitored(monitor, result_cache=result_cache,
+                                    executor=executor,
+                                    steady_state=steady_state,
+                                    **simu_params)
+            return
+
+        if steady_state is not None:
+            self.simulate_steady_state(steady_state, **simu_params)
+            return
+
+        if result_cache is not None:
+            self.simulate_cached(result_cache, executor=executor,
+                                 **simu_params)
+            return
+
+        if executor is not None:
+            self.simulate_distributed(executor, **simu_params)
+            return
+
         self.prepare_simu(**simu_params)
 
-        super().simulate()
+        if self.simu_params.batch_size:
+            for batch_idx in self.simulate_batches():
+                pass
+        else:
+            for indic in self.indicators.values():
+                indic.accumulator = None
+            super().simulate()
+
+        self.postproc_simu()
+
+    def simulate_monitored(self, monitor, result_cache=None, executor=None,
+                           steady_state=None, **simu_params):
+        """ Simulates while publishing partial estimates for live
+        viewers (see monitor.watch_terminal and monitor.watch_html).
+
+        monitor is either a PycMonitorPublisher owned by the caller or
+        a dict of PycMonitorPublisher options, in which case the shared
+        memory segment is removed at the end of the simulation.
+
+        Monitoring does not change results: the simulation is the one
+        of simulate with the same parameters. Partial estimates are
+        published after each batch (batch_size or executor), an
+        unbatched simulation only publishes its final estimates.
+        """
+        params = PycMCSimulationParam(**simu_params)
+
+        monitor_owned = not isinstance(monitor, PycMonitorPublisher)
+        if monitor_owned:
+            monitor = PycMonitorPublisher(list(self.indicators),
+                                          params.get_instants_list(),
+                                          params.nb_runs,
+                                          **monitor)
+
+        self.monitor = monitor
+        try:
+            self.simulate(result_cache=result_cache, executor=executor,
+                          steady_state=steady_state, **simu_params)
+            if monitor.nb_runs_last != params.nb_runs:
+                monitor.publish(self.get_accumulators(params.nb_runs),
+                                params.nb_runs, force=True)
+        finally:
+            self.monitor = None
+            monitor.finish()
+            if monitor_owned:
+                monitor.close()
+
+    def get_accumulators(self, nb_runs):
+        """ Indicator accumulators of the last simulation, built from
+        the mean and stddev estimates of nb_runs sequences when the
+        simulation was not batched """
+        accumulators = {}
+        for indic_name, indic in self.indicators.items():
+            if indic.accumulator is not None:
+                accumulators[indic_name] = indic.accumulator
+                continue
+            try:
+                means = indic.get_stat_values("mean")
+                stddevs = indic.get_stat_values("stddev")
+            except ValueError:
+                continue
+            accumulators[indic_name] = PycIndicatorAccumulator()
+            accumulators[indic_name].update_stats(means, stddevs, nb_runs)
+        return accumulators
+
+    def simulate_steady_state(self, steady_state={}, **simu_params):
+        """ Steady-state estimation from nb_runs long sequences observed
+        on a regular schedule (e.g. an InstantLinearRange).
+
+        Each sequence is simulated alone to get its trajectory, the
+        warm-up period is detected with MSER-5 and time-averaged
+        indicators are estimated with batch means. Estimates are added
+        to indicator values with stats steady-mean,
+        steady-ci-half-width and steady-warm-up (warm-up end time).
+        """
+        if not isinstance(steady_state, PycSteadyStateParam):
+            steady_state = PycSteadyStateParam(**steady_state)
+
+        if simu_params.get("result_mode") == "compact":
+            raise ValueError("Steady-state estimation is not supported in compact result mode")
+
+        self.prepare_simu(**dict(simu_params, batch_size=1))
+        instants = np.array(self.simu_params.get_instants_list())
+
+        trajectories = {indic_name: [] for indic_name in self.indicators}
+        for batch_idx in self.simulate_batches():
+            for indic_name, indic in self.indicators.items():
+                trajectories[indic_name].append(np.array(indic.bkd_means()))
+
+        self.postproc_simu()
+
+        for indic_name, indic in self.indicators.items():
+            mean, half_width, warm_up = steady_state_estimate(
+                trajectories[indic_name], instants, steady_state)
+
+            steady_df = indic.values.iloc[[0, 0, 0]].copy()
+            steady_df["stat"] = ["steady-mean",
+                                 "steady-ci-half-width",
+                                 "steady-warm-up"]
+            steady_df["instant"] = instants[-1]
+            steady_df["values"] = [mean, half_width, warm_up]
+
+            indic.values = pd.concat([indic.values, steady_df],
+                                     axis=0, ignore_index=True)
+
+    def simulate_distributed(self, executor, **simu_params):
+        """ Simulates the campaign batches with an executor
+        (executor.PycExecutor) and merges the batch accumulators.
+
+        Workers rebuild the system from its model specification (set
+        when the system is built by a PycStudy), so the system must not
+        have been modified since it was built (indicators added,
+        occurrence laws or init values changed, e.g. by a study hook):
+        this is checked on the system fingerprint. Merging is done in
+        batch order, results are the ones of a local batched simulation.
+        """
+        if self.model_spec is None:
+            raise ValueError("Distributed simulation needs a system built from a model specification (see PycStudy)")
+        if self.fingerprint(refresh=True) != self.model_fingerprint:
+            raise ValueError("System was modified after being built from its model specification: workers would simulate the original model")
+
+        params = PycMCSimulationParam(**simu_params)
+        if not params.batch_size:
+            params.batch_size = \
+                max(1, math.ceil(params.nb_runs/executor.nb_tasks_hint))
+        if params.seed is None:
+            params.seed = int(np.random.SeedSequence().generate_state(1)[0])
+        self.simu_params = params
+
+        tasks = [PycBatchTask(study=self.model_spec,
+                              simu_params=params.dict(),
+                              batch_idx=batch_idx)
+                 for batch_idx in range(params.get_nb_batches())]
+
+        results = {}
+        accumulators_partial = {}
+        for batch_idx, result in executor.map_tasks(run_batch_task, tasks):
+            results[batch_idx] = result
+            if self.monitor is not None:
+                for indic_name, acc in result.items():
+                    accumulators_partial.setdefault(
+                        indic_name, PycIndicatorAccumulator())\
+                        .merge(PycIndicatorAccumulator(**acc))
+                self.monitor.publish(
+                    accumulators_partial,
+                    sum(params.get_batch_nb_runs(idx) for idx in results))
+        accumulators = merge_batch_results(results)
+        missing = [indic_name for indic_name in self.indicators
+                   if not (indic_name in accumulators)]
+        if missing:
+            raise ValueError(f"Indicators {missing} were not simulated by the workers")
+
+        instants_list = params.get_instants_list()
+        for indic_name, indic in self.indicators.items():
+            indic.instants = instants_list
+            indic.accumulator = accumulators.get(indic_name)
+
+        self.postproc_simu()
+
+    def simulate_cached(self, result_cache, executor=None, **simu_params):
+        """ Simulates unless results of the same system with the same
+        parameters are in result_cache (fingerprint.PycResultCache).
+        Only seeded simulations are cached. The fingerprint is
+        recomputed so that changes made directly on the backend are
+        taken into account. """
+        params = PycMCSimulationParam(**simu_params)
+        if params.seed is None:
+            self.simulate(executor=executor, **simu_params)
+            return
+
+        cache_key = result_cache.get_key(
+            self.fingerprint(refresh=True),
+            params.dict(exclude={"checkpoint_path", "checkpoint_period"}))
+
+        results = result_cache.get(cache_key)
+        if results is not None:
+            self.simu_params = params
+            for indic_name, indic in self.indicators.items():
+                indic.instants = results[indic_name]["instants"]
+                indic.values = results[indic_name]["values"]
+                indic.compact_values = results[indic_name]["compact_values"]
+                indic.accumulator = results[indic_name]["accumulator"]
+            return
+
+        self.simulate(executor=executor, **simu_params)
+
+        result_cache.put(cache_key,
+                         {indic_name: {"instants": indic.instants,
+                                       "values": indic.values,
+                                       "compact_values": indic.compact_values,
+                                       "accumulator": indic.accumulator}
+                          for indic_name, indic in self.indicators.items()})
+
+    def simulate_batches(self, batch_start=0, nb_runs_start=0):
+        """ Simulates the campaign batch by batch from batch_start
+        (nb_runs_start sequences already simulated), yielding each
+        completed batch index.
+
+        Indicator accumulators are updated after each batch and the
+        campaign is checkpointed if a checkpoint path is set.
+        """
+        simu_params = self.simu_params
+
+        if batch_start == 0:
+            for indic in self.indicators.values():
+                indic.accumulator = None
+
+        fingerprint = self.fingerprint(refresh=True) \
+            if simu_params.checkpoint_path else None
+
+        batch_idx = batch_start
+        nb_runs_done = nb_runs_start
+        while nb_runs_done < simu_params.nb_runs:
+            nb_runs_batch = min(simu_params.batch_size,
+                                simu_params.nb_runs - nb_runs_done)
+
+            self.setRNGSeed(simu_params.get_batch_seed(batch_idx))
+            self.setNbSeqToSim(nb_runs_batch)
+            super().simulate()
+
+            for indic in self.indicators.values():
+                indic.accumulate(nb_runs_batch)
+            nb_runs_done += nb_runs_batch
+
+            if self.monitor is not None:
+                self.monitor.publish(
+                    {indic_name: indic.accumulator
+                     for indic_name, indic in self.indicators.items()},
+                    nb_runs_done)
+
+            if simu_params.checkpoint_path and \
+               ((batch_idx + 1) % simu_params.checkpoint_period == 0 or
+                    nb_runs_done == simu_params.nb_runs):
+                PycCheckpoint.from_system(self, batch_idx + 1, fingerprint)\
+                             .save(simu_params.checkpoint_path)
+
+            yield batch_idx
+            batch_idx += 1
+
+    def simulate_iter(self, scheduler=None, **simu_params):
+        """ Async iterator over simulation progress, see
+        scheduler.simulate_iter """
+        return simulate_iter(self, scheduler=scheduler, **simu_params)
+
+    async def simulate_async(self, scheduler=None, **simu_params):
+
+        async for progress in self.simulate_iter(scheduler=scheduler,
+                                                 **simu_params):
+            pass
+
+    def resume(self, checkpoint_path, **simu_params):
+        """ Resumes a batched campaign from its last checkpoint.
+
+        Simulation parameters can be overloaded, e.g. nb_runs to extend
+        a finished campaign: the remaining sequences are simulated in
+        new batches. Results are the ones of an uninterrupted run as
+        long as the batch size is unchanged and the previous number of
+        runs was a multiple of it. The system must be the checkpointed
+        one (checked on its fingerprint).
+        """
+        checkpoint = PycCheckpoint.load(checkpoint_path)
+        if checkpoint.fingerprint is not None and \
+           checkpoint.fingerprint != self.fingerprint(refresh=True):
+            raise ValueError(f"Checkpoint {checkpoint_path} was written by another system")
+
+        params = dict(checkpoint.simu_params,
+                      checkpoint_path=checkpoint_path)
+        params.update(simu_params)
+
+        nb_runs_done = checkpoint.nb_runs_done()
+        if nb_runs_done > params["nb_runs"]:
+            raise ValueError(f"Checkpoint has {nb_runs_done} sequences, more than the {params['nb_runs']} requested")
+
+        self.prepare_simu(**params)
+
+        for indic_name, indic in self.indicators.items():
+            indic.accumulator = checkpoint.accumulators.get(indic_name)
+
+        for batch_idx in self.simulate_batches(checkpoint.batch_next,
+                                               nb_runs_done):
+            pass
 
         self.postproc_simu()
 
     def postproc_simu(self):
 
+        compact = self.simu_params is not None and \
+            self.simu_params.result_mode == "compact"
         for indic in self.indicators.values():
-            indic.update_values()
+            indic.update_values(compact=compact)
 
         #self.run_after_hook()
 
@@ -148,9 +773,35 @@ class PycSystem(pyc.CSystem):
 
         if len(self.indicators) == 0:
             return None
+
+        indic_frame_list = [indic.values
+                            for indic in self.indicators.values()
+                            if indic.compact_values is None]
+        indic_compact_list = [indic for indic in self.indicators.values()
+                              if indic.compact_values is not None]
+        if indic_compact_list:
+            indic_frame_list.append(compact_to_frame(indic_compact_list))
+
+        return pd.concat(indic_frame_list, axis=0, ignore_index=True)
+
+    def indic_memory_usage(self):
+        """ Result size in bytes of each indicator """
+        return pd.DataFrame(
+            [{"name": indic_name,
+              "mode": "frame" if indic.compact_values is None else "compact",
+              "nbytes": indic.memory_usage()}
+             for indic_name, indic in self.indicators.items()],
+            columns=["name", "mode", "nbytes"])
+
+    def select_indicators(self, indicators=None):
+        """ Indicators selected by name list or name regex (all if None) """
+        if indicators is None:
+            return list(self.indicators.values())
+        elif isinstance(indicators, str):
+            return [indic for name, indic in self.indicators.items()
+                    if re.search(indicators, name)]
         else:
-            return pd.concat([indic.values for indic in self.indicators.values()],
-                             axis=0, ignore_index=True)
+            return [self.indicators[name] for name in indicators]
 
     def indic_px_line(self,
                       x="instant",
@@ -158,23 +809,65 @@ class PycSystem(pyc.CSystem):
                       color="name",
                       markers=True,
                       layout={},
+                      indicators=None,
+                      stat="mean",
+                      max_points=None,
+                      downsample="lttb",
+                      render_mode="webgl",
                       **px_conf):
 
-        indic_df = self.indic_to_frame()
+        indic_sel_list = self.select_indicators(indicators)
 
-        if indic_df is None:
+        if len(indic_sel_list) == 0:
             return None
 
-        idx_stat_sel = indic_df["stat"].isin(["mean"])
-
-        indic_sel_df = indic_df.loc[idx_stat_sel]
+        # Only the selected and downsampled points are materialized
+        indic_df_list = []
+        for indic in indic_sel_list:
+            instants = np.asarray(indic.instants, dtype=float)
+            values = indic.get_stat_values(stat)
+            idx = downsample_indices(instants, values, max_points,
+                                     method=downsample)
+            # Same columns as indic_to_frame
+            rows = indic.get_rows_header([stat])[0]
+            rows["instant"] = instants[idx]
+            rows["values"] = values[idx]
+            indic_df_list.append(pd.DataFrame(rows))
+
+        indic_sel_df = pd.concat(indic_df_list, axis=0, ignore_index=True)
 
         fig = px.line(indic_sel_df,
                       x=x, y=y,
                       color=color,
                       markers=markers,
+                      render_mode=render_mode,
                       **px_conf)
 
         fig.update_layout(**layout)
 
         return fig
+
+    def indic_plot(self, indicators=None, **plot_conf):
+        """ WebGL plot of indicators without building any DataFrame,
+        see plotting.indic_fig for options """
+        indic_sel_list = self.select_indicators(indicators)
+
+        if len(indic_sel_list) == 0:
+            return None
+
+        return indic_fig(indic_sel_list, **plot_conf)
+
+    def indic_export(self, filename, indicators=None, **plot_conf):
+        """ Exports indicators plot to HTML or static image (PNG, SVG,
+        etc. which requires kaleido) depending on file extension """
+        fig = self.indic_plot(indicators=indicators, **plot_conf)
+
+        if fig is None:
+            return None
+
+        if filename.endswith(".html"):
+            fig.write_html(filename, include_plotlyjs="cdn")
+        else:
+            fig.write_image(filename)
+
+        return fig
@@ -0,0 +1,244 @@
+import numpy as np
+import pandas as pd
+import pkg_resources
+from .automaton import get_transitions_bkd, PycOccurrenceDistribution, \
+    PycTransition, PycAutomaton
+installed_pkg = {pkg.key for pkg in pkg_resources.working_set}
+if 'ipdb' in installed_pkg:
+    import ipdb  # noqa: F401
+
+
+LAW_KINDS = ["delay", "exp", "weibull", "lognormal", "uniform",
+             "empirical", "mixed", "other"]
+
+NB_LAW_PARAMS = 2
+
+
+def get_law_kind(occ_law):
+    kind = type(occ_law).__name__.replace("OccDistribution", "").lower()
+    return LAW_KINDS.index(kind) if kind in LAW_KINDS \
+        else LAW_KINDS.index("other")
+
+
+def get_law_params(occ_law):
+    """ Numerical law parameters (NaN when unknown, e.g. parameters
+    given by variables) """
+    params = np.full(NB_LAW_PARAMS, np.nan)
+    try:
+        bkd_params = occ_law.get_bkd_params()
+    except NotImplementedError:
+        return params
+    for idx, param in enumerate(bkd_params[:NB_LAW_PARAMS]):
+        try:
+            params[idx] = float(param)
+        except (TypeError, ValueError):
+            pass
+    return params
+
+
+def transition_from_bkd(trans_bkd):
+    """ Transition model whose unsupported backend laws are kept as
+    generic distributions (kind other, NaN parameters) """
+    try:
+        return PycTransition.from_bkd(trans_bkd)
+    except ValueError:
+        return PycTransition(name=trans_bkd.basename(),
+                             source=trans_bkd.startState().basename(),
+                             target=trans_bkd.getTarget(0).basename(),
+                             occ_law=PycOccurrenceDistribution(),
+                             is_interruptible=trans_bkd.interruptible(),
+                             bkd=trans_bkd)
+
+
+def automaton_from_bkd(aut_bkd):
+    aut = PycAutomaton.from_bkd(aut_bkd)
+    aut.transitions = [transition_from_bkd(trans)
+                       for trans in get_transitions_bkd(aut_bkd)]
+    return aut
+
+
+class PycTransitionTable:
+    """ Automata and transitions flattened into integer indexed arrays
+
+    States have global ids, automaton i owns states
+    aut_state_start[i]:aut_state_start[i + 1]. Analyses only consider
+    the automata structure: transition conditions written in Python
+    methods are not known at this level.
+    """
+
+    def __init__(self, automata):
+
+        self.aut_comp_names = np.array([aut.comp_name or "" for aut in automata])
+        self.aut_names = np.array([aut.name for aut in automata])
+
+        nb_states = [len(aut.states) for aut in automata]
+        self.aut_state_start = np.concatenate([[0], np.cumsum(nb_states)])\
+                                 .astype(int)
+        self.state_aut = np.repeat(np.arange(len(automata)), nb_states)
+        self.state_names = np.array([state.name for aut in automata
+                                     for state in aut.states])
+        self.aut_init_state = np.array(
+            [start + ([st.name for st in aut.states].index(aut.init_state)
+                      if aut.init_state else 0)
+             for start, aut in zip(self.aut_state_start, automata)],
+            dtype=int)
+
+        trans_list = [(aut_idx, trans) for aut_idx, aut in enumerate(automata)
+                      for trans in aut.transitions]
+        state_idx = [{state.name: self.aut_state_start[aut_idx] + idx
+                      for idx, state in enumerate(aut.states)}
+                     for aut_idx, aut in enumerate(automata)]
+
+        self.trans_aut = np.array([aut_idx for aut_idx, _ in trans_list],
+                                  dtype=int)
+        self.trans_names = np.array([trans.name for _, trans in trans_list])
+        self.trans_src = np.array([state_idx[aut_idx][trans.source]
+                                   for aut_idx, trans in trans_list],
+                                  dtype=int)
+        self.trans_dst = np.array([state_idx[aut_idx][trans.target]
+                                   for aut_idx, trans in trans_list],
+                                  dtype=int)
+        self.trans_law = np.array([get_law_kind(trans.occ_law)
+                                   for _, trans in trans_list], dtype=int)
+        self.trans_params = np.array([get_law_params(trans.occ_law)
+                                      for _, trans in trans_list])\
+                              .reshape(len(trans_list), NB_LAW_PARAMS)
+
+    @property
+    def nb_states(self):
+        return len(self.state_names)
+
+    def dead_transitions(self):
+        """ Transitions that can never fire: zero rate or infinite delay """
+        law_exp = self.trans_law == LAW_KINDS.index("exp")
+        law_delay = self.trans_law == LAW_KINDS.index("delay")
+        param = self.trans_params[:, 0]
+        return (law_exp & (param <= 0)) | (law_delay & np.isinf(param))
+
+    def reachable_states(self, live=None):
+        if live is None:
+            live = ~self.dead_transitions()
+        src, dst = self.trans_src[live], self.trans_dst[live]
+
+        reached = np.zeros(self.nb_states, dtype=bool)
+        reached[self.aut_init_state] = True
+        frontier = reached.copy()
+        while frontier.any():
+            frontier_next = np.zeros(self.nb_states, dtype=bool)
+            frontier_next[dst[frontier[src]]] = True
+            frontier = frontier_next & ~reached
+            reached |= frontier
+        return reached
+
+    def strongly_connected_components(self, live=None):
+        """ SCC id of each state (iterative Tarjan algorithm) """
+        if live is None:
+            live = ~self.dead_transitions()
+        src, dst = self.trans_src[live], self.trans_dst[live]
+        order = np.argsort(src, kind="stable")
+        succ = dst[order]
+        succ_start = np.searchsorted(src[order], np.arange(self.nb_states + 1))
+
+        index = np.full(self.nb_states, -1)
+        lowlink = np.zeros(self.nb_states, dtype=int)
+        on_stack = np.zeros(self.nb_states, dtype=bool)
+        scc = np.full(self.nb_states, -1)
+        stack = []
+        counter = 0
+        nb_scc = 0
+
+        for root in range(self.nb_states):
+            if index[root] >= 0:
+                continue
+            call_stack = [(root, succ_start[root])]
+            index[root] = lowlink[root] = counter
+            counter += 1
+            stack.append(root)
+            on_stack[root] = True
+            while call_stack:
+                node, pos = call_stack[-1]
+                if pos < succ_start[node + 1]:
+                    call_stack[-1] = (node, pos + 1)
+                    child = succ[pos]
+                    if index[child] < 0:
+                        index[child] = lowlink[child] = counter
+                        counter += 1
+                        stack.append(child)
+                        on_stack[child] = True
+                        call_stack.append((child, succ_start[child]))
+                    elif on_stack[child]:
+                        lowlink[node] = min(lowlink[node], index[child])
+                    continue
+                call_stack.pop()
+                if call_stack:
+                    parent = call_stack[-1][0]
+                    lowlink[parent] = min(lowlink[parent], lowlink[node])
+                if lowlink[node] == index[node]:
+                    while True:
+                        member = stack.pop()
+                        on_stack[member] = False
+                        scc[member] = nb_scc
+                        if member == node:
+                            break
+                    nb_scc += 1
+
+        return scc
+
+    def check(self):
+        """ Structural issues: dead transitions, unreachable states,
+        absorbing states and trap components (closed set of states
+        which is not the whole reachable automaton) """
+        dead = self.dead_transitions()
+        live = ~dead
+        reached = self.reachable_states(live)
+        scc = self.strongly_connected_components(live)
+
+        issues = []
+
+        def add_issue(kind, aut_idx, element, message):
+            issues.append({"kind": kind,
+                           "component": self.aut_comp_names[aut_idx],
+                           "automaton": self.aut_names[aut_idx],
+                           "element": element,
+                           "message": message})
+
+        for trans_idx in np.flatnonzero(dead):
+            add_issue("dead-transition", self.trans_aut[trans_idx],
+                      self.trans_names[trans_idx],
+                      "Transition can never fire (zero rate or infinite delay)")
+
+        for trans_idx in np.flatnonzero(live & ~reached[self.trans_src]):
+            add_issue("dead-transition", self.trans_aut[trans_idx],
+                      self.trans_names[trans_idx],
+                      "Transition source state is unreachable")
+
+        for state_idx in np.flatnonzero(~reached):
+            add_issue("unreachable-state", self.state_aut[state_idx],
+                      self.state_names[state_idx],
+                      "State is unreachable from the init state")
+
+        has_exit = np.zeros(self.nb_states, dtype=bool)
+        has_exit[self.trans_src[live]] = True
+        for state_idx in np.flatnonzero(reached & ~has_exit):
+            add_issue("absorbing-state", self.state_aut[state_idx],
+                      self.state_names[state_idx],
+                      "Reachable state without outgoing transition")
+
+        # Closed SCC: no live transition leaving it
+        leaving = live & (scc[self.trans_src] != scc[self.trans_dst])
+        scc_open = np.zeros(scc.max() + 1 if len(scc) else 0, dtype=bool)
+        scc_open[scc[self.trans_src[leaving]]] = True
+        for aut_idx in range(len(self.aut_names)):
+            start, end = self.aut_state_start[aut_idx:aut_idx + 2]
+            aut_reached = np.flatnonzero(reached[start:end]) + start
+            aut_scc = np.unique(scc[aut_reached])
+            for scc_id in aut_scc[~scc_open[aut_scc]]:
+                members = aut_reached[scc[aut_reached] == scc_id]
+                if len(members) > 1 and len(members) < len(aut_reached):
+                    add_issue("trap-component", aut_idx,
+                              ", ".join(self.state_names[members]),
+                              "States never left once entered")
+
+        return pd.DataFrame(issues,
+                            columns=["kind", "component", "automaton",
+                                     "element", "message"])
@@ -0,0 +1,8 @@
+import os
+import sys
+
+try:
+    import Pycatshoo  # noqa: F401
+except ImportError:
+    # Stand-in backend (see stub/Pycatshoo.py)
+    sys.path.insert(0, os.path.join(os.path.dirname(__file__), "stub"))
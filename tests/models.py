@@ -0,0 +1,52 @@
+import Pycatshoo as pyc
+from pyctools import PycSystem
+from pyctools.automaton import ExpOccDistribution, DelayOccDistribution
+
+
+def build_component(comp, rate=1e-3, repair_time=24.):
+    """ Repairable component with on and load variables """
+    comp.addVariable("on", pyc.TVarType.t_bool, True)
+    comp.addVariable("load", pyc.TVarType.t_double, 1.5)
+
+    aut = comp.addAutomaton("aut")
+    state_ok = aut.addState("ok", 0)
+    state_ko = aut.addState("ko", 1)
+    aut.setInitState(state_ok)
+
+    trans = state_ok.addTransition("fail")
+    trans.addTarget(state_ko)
+    trans.setDistLaw(ExpOccDistribution(rate=rate).to_bkd(comp))
+
+    trans = state_ko.addTransition("rep")
+    trans.setInterruptible(False)
+    trans.addTarget(state_ok)
+    trans.setDistLaw(DelayOccDistribution(time=repair_time).to_bkd(comp))
+
+
+def add_component(name, rate=1e-3, repair_time=24.):
+    comp = pyc.CComponent(name)
+    build_component(comp, rate, repair_time)
+    return comp
+
+
+class RepairableComponent(pyc.CComponent):
+    """ Component whose class builds its structure """
+
+    def __init__(self, name):
+        super().__init__(name)
+        build_component(self)
+
+
+def build_system(nb_comps=3, name="S"):
+    """ System factory of the tests """
+    system = PycSystem(name)
+    for idx in range(nb_comps):
+        add_component(f"C{idx}")
+    system.add_indicator_var(component="C.*", var="^on$",
+                             stats=["mean", "stddev"])
+    return system
+
+
+def set_fast_failures(system):
+    """ Study hook changing the occurrence law of C0 failures """
+    system.set_occ_laws({"C0.fail": ExpOccDistribution(rate=0.5)})
@@ -0,0 +1,352 @@
+""" Minimal stand-in of the Pycatshoo backend used by the tests when
+Pycatshoo is not installed.
+
+Only the API used by pyctools is emulated: system structure
+(components, variables, automata, states, transitions and laws),
+indicators and simulation. Simulated indicator values are
+pseudo-random numbers only depending on the RNG seed, the number of
+sequences, the indicator name and the instants. Component regex
+patterns are searched (not anchored) so that missing anchors show up
+in the tests.
+"""
+import re
+import zlib
+import numpy as np
+
+
+class TVarType:
+    t_bool = "bool"
+    t_integer = "int"
+    t_double = "float"
+
+
+class TIndicatorType:
+    mean_values = 1
+    std_dev = 2
+
+
+class TComputationType:
+    simple = 0
+    res_time = 1
+    nb_visits = 2
+    realized = 3
+
+
+class TLawType:
+    defer = "delay"
+    expo = "exp"
+    weibull = "weibull"
+    lognormal = "lognormal"
+    uniform = "uniform"
+
+
+CURRENT_SYSTEM = [None]
+
+
+class IDistLaw:
+
+    def __init__(self, law_name, params):
+        self.law_name = law_name
+        self.params = list(params)
+
+    def name(self):
+        return self.law_name
+
+    def parameter(self, idx):
+        return self.params[idx]
+
+    @staticmethod
+    def newLaw(comp, law_type, *params):
+        return IDistLaw(law_type, params)
+
+
+class NamedElement:
+
+    def __init__(self, name, parent=None):
+        self._basename = name
+        self._parent = parent
+
+    def basename(self):
+        return self._basename
+
+    def name(self):
+        if isinstance(self._parent, NamedElement):
+            return f"{self._parent.name()}.{self._basename}"
+        return self._basename
+
+    def parent(self):
+        return self._parent
+
+
+class IVariable(NamedElement):
+
+    def __init__(self, name, parent, value):
+        super().__init__(name, parent)
+        self._init_value = value
+        self._value = value
+
+    def initValue(self):
+        return self._init_value
+
+    def setInitValue(self, value):
+        self._init_value = value
+
+    def value(self):
+        return self._value
+
+    def setValue(self, value):
+        self._value = value
+
+
+class ITransition(NamedElement):
+
+    def __init__(self, name, state):
+        super().__init__(name, state.parent())
+        self._state = state
+        self._targets = []
+        self._interruptible = True
+        self._law = None
+        self._end_time = np.inf
+
+    def startState(self):
+        return self._state
+
+    def addTarget(self, state):
+        self._targets.append(state)
+
+    def getTarget(self, idx):
+        return self._targets[idx]
+
+    def targetCount(self):
+        return len(self._targets)
+
+    def setInterruptible(self, value):
+        self._interruptible = value
+
+    def interruptible(self):
+        return self._interruptible
+
+    def setDistLaw(self, law):
+        self._law = law
+
+    def distLaw(self):
+        return self._law
+
+    def endTime(self):
+        return self._end_time
+
+    def setEndTime(self, end_time):
+        self._end_time = end_time
+
+
+class IState(NamedElement):
+
+    def __init__(self, name, automaton):
+        super().__init__(name, automaton.parent())
+        self._automaton = automaton
+        self._transitions = []
+
+    def automaton(self):
+        return self._automaton
+
+    def addTransition(self, name):
+        trans = ITransition(name, self)
+        self._transitions.append(trans)
+        return trans
+
+    def transitions(self):
+        return list(self._transitions)
+
+
+class IAutomaton(NamedElement):
+
+    def __init__(self, name, parent):
+        super().__init__(name, parent)
+        self._states = []
+        self._init_state = None
+        self._current_state = None
+
+    def addState(self, name, state_id):
+        state = IState(name, self)
+        self._states.append(state)
+        return state
+
+    def states(self):
+        return list(self._states)
+
+    def setInitState(self, state):
+        self._init_state = state
+
+    def initState(self):
+        return self._init_state
+
+    def currentState(self):
+        return self._current_state or self._init_state
+
+    def setCurrentState(self, state):
+        self._current_state = state
+
+
+class CComponent(NamedElement):
+
+    def __init__(self, name):
+        super().__init__(name, CURRENT_SYSTEM[0])
+        self._variables = []
+        self._automata = []
+        CURRENT_SYSTEM[0]._components.append(self)
+
+    def addVariable(self, name, var_type, value):
+        var = IVariable(name, self, value)
+        self._variables.append(var)
+        return var
+
+    def getVariables(self):
+        return list(self._variables)
+
+    def addAutomaton(self, name):
+        aut = IAutomaton(name, self)
+        self._automata.append(aut)
+        return aut
+
+    def getAutomata(self):
+        return list(self._automata)
+
+    def getStates(self):
+        return [state for aut in self._automata for state in aut.states()]
+
+
+class IIndicator:
+
+    def __init__(self, system, name):
+        self.system = system
+        self.name = name
+
+    def setRestitutions(self, restitution):
+        pass
+
+    def setComputation(self, computation):
+        pass
+
+    def means(self):
+        return self.system._results[self.name][0]
+
+    def stdDevs(self):
+        return self.system._results[self.name][1]
+
+
+class CSystem:
+
+    def __init__(self, name):
+        self._name = name
+        self._components = []
+        self._indicators = {}
+        self._instants = []
+        self._seed = 0
+        self._nb_seq = 1
+        self._results = {}
+        self._time = 0.
+        self.nb_simulations = 0
+        CURRENT_SYSTEM[0] = self
+
+    def name(self):
+        return self._name
+
+    def getComponents(self, comp_pat, cls_pat):
+        if comp_pat.startswith("#"):
+            return [comp for comp in self._components
+                    if re.search(comp_pat[1:], comp.basename())]
+        return [comp for comp in self._components
+                if comp.basename() == comp_pat]
+
+    def addIndicator(self, name, *args):
+        indic = IIndicator(self, name)
+        self._indicators[name] = indic
+        return indic
+
+    def setTMax(self, t_max):
+        self._t_max = t_max
+
+    def addInstant(self, instant):
+        self._instants.append(instant)
+
+    def instants(self):
+        return sorted(self._instants)
+
+    def setRNGSeed(self, seed):
+        self._seed = seed
+        self._rng = np.random.default_rng(int(seed))
+
+    def setNbSeqToSim(self, nb_seq):
+        self._nb_seq = nb_seq
+
+    def currentTime(self):
+        return self._time
+
+    # Interactive simulation: automata only (no variable effects),
+    # exponential and delay laws. The first step initializes the
+    # sequence at time 0.
+
+    def startInteractive(self):
+        self._rng = np.random.default_rng(int(self._seed))
+        self._time = 0.
+        self._started = False
+        for comp in self._components:
+            for aut in comp.getAutomata():
+                aut.setCurrentState(aut.initState())
+                for state in aut.states():
+                    for trans in state.transitions():
+                        trans.setEndTime(np.inf)
+
+    def getActiveTransitions(self):
+        return [trans for comp in self._components
+                for aut in comp.getAutomata()
+                for trans in aut.currentState().transitions()]
+
+    def updatePlanningInt(self):
+        for trans in self.getActiveTransitions():
+            if trans.endTime() < np.inf:
+                continue
+            law = trans.distLaw()
+            if law.name() == "exp":
+                delay = self._rng.exponential(1/law.parameter(0)) \
+                    if law.parameter(0) > 0 else np.inf
+            elif law.name() == "delay":
+                delay = law.parameter(0)
+            else:
+                raise ValueError(f"Law {law.name()} not simulated")
+            trans.setEndTime(self._time + delay)
+
+    def stepForward(self):
+        if not self._started:
+            self._started = True
+            self.updatePlanningInt()
+            return
+        trans_active = self.getActiveTransitions()
+        if not trans_active:
+            self._time = np.inf
+            return
+        trans = min(trans_active, key=lambda trans: trans.endTime())
+        self._time = trans.endTime()
+        aut = trans.startState().automaton()
+        for trans_left in aut.currentState().transitions():
+            trans_left.setEndTime(np.inf)
+        aut.setCurrentState(trans.getTarget(0))
+        self.updatePlanningInt()
+
+    def stopInteractive(self):
+        pass
+
+    def setCurrentTime(self, time):
+        self._time = time
+
+    def simulate(self):
+        self.nb_simulations += 1
+        nb_instants = len(self._instants)
+        self._results = {}
+        for name in self._indicators:
+            rng = np.random.default_rng(
+                [int(self._seed), zlib.crc32(name.encode("utf-8"))])
+            values = rng.random((self._nb_seq, nb_instants))
+            stddevs = values.std(axis=0, ddof=1) if self._nb_seq > 1 \
+                else np.zeros(nb_instants)
+            self._results[name] = (values.mean(axis=0), stddevs)
@@ -0,0 +1,115 @@
+import math
+import numpy as np
+import pytest
+import Pycatshoo as pyc
+from pyctools.automaton import PycOccurrenceDistribution, \
+    DelayOccDistribution, ExpOccDistribution, WeibullOccDistribution, \
+    LognormalOccDistribution, UniformOccDistribution, \
+    EmpiricalOccDistribution, MixedOccDistribution
+from .models import add_component
+
+NB_SAMPLES = 100000
+
+
+def check_samples(occ_law, mean, instants):
+    """ Sample mean and empirical cdf against the distribution """
+    samples = occ_law.sample(NB_SAMPLES, rng=np.random.default_rng(0))
+    assert samples.shape == (NB_SAMPLES,)
+    assert samples.mean() == pytest.approx(mean, rel=0.02)
+    for t in instants:
+        assert (samples <= t).mean() == \
+            pytest.approx(float(occ_law.cdf(t)), abs=0.01)
+
+
+def test_weibull():
+    occ_law = WeibullOccDistribution(scale=10., shape=2.)
+    check_samples(occ_law, 10.*math.gamma(1 + 1/2.), [5., 10., 20.])
+
+    t = np.array([0., 5., 20.])
+    np.testing.assert_allclose(occ_law.hazard(t), 2/10.*(t/10.))
+    np.testing.assert_allclose(occ_law.survival(t), np.exp(-(t/10.)**2))
+    # Shape 1: exponential distribution
+    np.testing.assert_allclose(
+        WeibullOccDistribution(scale=4., shape=1.).hazard(t), 0.25)
+
+
+def test_lognormal():
+    mu, sigma = 1., 0.5
+    occ_law = LognormalOccDistribution(mu=mu, sigma=sigma)
+    check_samples(occ_law, math.exp(mu + sigma**2/2), [1., 3., 6.])
+
+    for t in [1., 3., 6.]:
+        z = (math.log(t) - mu)/sigma
+        pdf = math.exp(-z**2/2)/(t*sigma*math.sqrt(2*math.pi))
+        survival = 0.5*math.erfc(z/math.sqrt(2))
+        assert float(occ_law.hazard(t)) == \
+            pytest.approx(pdf/survival, rel=1e-5)
+    assert occ_law.hazard(0.) == 0.
+
+
+def test_uniform():
+    occ_law = UniformOccDistribution(low=2., high=6.)
+    check_samples(occ_law, 4., [3., 5.])
+
+    t = np.array([0., 2., 4., 6., 8.])
+    # Occurrence is certain from high on: infinite hazard
+    np.testing.assert_allclose(occ_law.hazard(t),
+                               [0., 1/4., 1/2., np.inf, np.inf])
+
+
+def test_empirical():
+    occ_law = EmpiricalOccDistribution(values=[3., 1., 2.],
+                                       weights=[1., 2., 1.])
+    check_samples(occ_law, (3*1. + 1*2. + 2*1.)/4, [1., 2., 3.])
+    np.testing.assert_allclose(occ_law.cdf([0., 1., 2.5, 3.]),
+                               [0., 0.5, 0.75, 1.])
+    with pytest.raises(NotImplementedError):
+        occ_law.hazard(1.)
+    with pytest.raises(ValueError):
+        EmpiricalOccDistribution(values=[1., 2.], weights=[1.])
+
+
+def test_mixed():
+    occ_law = PycOccurrenceDistribution.from_dict(
+        dist="mixed",
+        components=[{"dist": "exp", "rate": 0.5},
+                    {"dist": "uniform", "low": 2., "high": 6.}],
+        weights=[3., 1.])
+    assert isinstance(occ_law.components[1], UniformOccDistribution)
+    check_samples(occ_law, 0.75*2. + 0.25*4., [1., 3., 5.])
+
+    t = np.array([1., 3., 8.])
+    survival = 0.75*np.exp(-0.5*t) + 0.25*np.clip((6. - t)/4., 0, 1)
+    pdf = 0.75*0.5*np.exp(-0.5*t) + 0.25*((t >= 2.) & (t <= 6.))/4.
+    np.testing.assert_allclose(occ_law.hazard(t), pdf/survival)
+
+
+@pytest.mark.parametrize("occ_law, law_name, params", [
+    (DelayOccDistribution(time=24.), "delay", [24.]),
+    (ExpOccDistribution(rate=1e-3), "exp", [1e-3]),
+    (WeibullOccDistribution(scale=10., shape=2.), "weibull", [10., 2.]),
+    (LognormalOccDistribution(mu=1., sigma=0.5), "lognormal", [1., 0.5]),
+    (UniformOccDistribution(low=2., high=6.), "uniform", [2., 6.]),
+])
+def test_backend_mapping(occ_law, law_name, params):
+    pyc.CSystem("S")
+    comp = add_component("C0")
+    law_bkd = occ_law.to_bkd(comp)
+
+    # Backend law name and parameters order read by from_bkd
+    assert law_bkd.name() == law_name
+    assert [law_bkd.parameter(idx) for idx in range(len(params))] == params
+    occ_law_bkd = PycOccurrenceDistribution.from_bkd(law_bkd)
+    assert type(occ_law_bkd) is type(occ_law)
+    assert occ_law_bkd.dict(exclude={"bkd"}) == occ_law.dict(exclude={"bkd"})
+
+
+@pytest.mark.parametrize("occ_law", [
+    EmpiricalOccDistribution(values=[1., 2.]),
+    MixedOccDistribution(components=[ExpOccDistribution(rate=1.)],
+                         weights=[1.]),
+])
+def test_backend_mapping_unsupported(occ_law):
+    pyc.CSystem("S")
+    with pytest.raises(NotImplementedError):
+        occ_law.to_bkd(add_component("C0"))
@@ -0,0 +1,107 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pyctools.comparison import result_diff, adjust_p_values, z_test, \
+    DIFF_COLUMNS
+
+
+def get_results(means, stddevs, instants):
+    names = [f"I{idx}" for idx in range(len(means))]
+    rows = []
+    for stat, stat_values in [("mean", means), ("stddev", stddevs)]:
+        for name, values in zip(names, stat_values):
+            rows.append(pd.DataFrame({"name": name, "stat": stat,
+                                      "instant": instants,
+                                      "values": values}))
+    return pd.concat(rows, axis=0, ignore_index=True)
+
+
+def get_result_pair(nb_indics=50, nb_instants=20, seed=0):
+    rng = np.random.default_rng(seed)
+    instants = np.arange(nb_instants, dtype=float)
+    means_b = rng.random((nb_indics, nb_instants))
+    stddevs = np.full((nb_indics, nb_instants), 0.5)
+    means_a = means_b + 0.5*0.5/np.sqrt(1000)*rng.standard_normal(
+        (nb_indics, nb_instants))
+    # Clear changes of indicator I3
+    means_a[3] += 0.2
+    return get_results(means_a, stddevs, instants), \
+        get_results(means_b, stddevs, instants)
+
+
+def test_result_diff_finds_changes():
+    results_a, results_b = get_result_pair()
+    diff = result_diff(results_a, results_b, nb_runs_a=1000, nb_runs_b=1000)
+
+    assert diff.changed_indicators() == ["I3"]
+    assert len(diff.changes) == 20
+    assert diff.nb_tests == 1000
+    assert diff.nb_only_a == diff.nb_only_b == diff.nb_untestable == 0
+    assert (diff.changes["p_adjusted"] <= 0.05).all()
+
+
+def test_result_diff_chunks():
+    results_a, results_b = get_result_pair()
+    diff = result_diff(results_a, results_b, nb_runs_a=1000, nb_runs_b=1000)
+    chunks = [results_a.iloc[start:start + 77]
+              for start in range(0, len(results_a), 77)]
+    diff_chunks = result_diff(chunks, results_b,
+                              nb_runs_a=1000, nb_runs_b=1000)
+
+    pd.testing.assert_frame_equal(diff.changes, diff_chunks.changes)
+
+
+def test_result_diff_missing_points():
+    results_a, results_b = get_result_pair()
+    results_a = results_a[results_a["name"] != "I0"]
+    results_b = results_b[~((results_b["name"] == "I1") &
+                            (results_b["stat"] == "stddev"))]
+    diff = result_diff(results_a, results_b, nb_runs_a=1000, nb_runs_b=1000)
+
+    assert diff.nb_only_b == 20
+    assert diff.nb_untestable == 20
+    assert diff.nb_tests == 960
+
+
+def test_adjust_p_values():
+    rng = np.random.default_rng(0)
+    p_all = rng.random(200)**3
+
+    # Reference Benjamini-Hochberg adjustment
+    order = np.argsort(p_all)
+    adjusted = p_all[order]*len(p_all)/np.arange(1, len(p_all) + 1)
+    adjusted = np.minimum(np.minimum.accumulate(adjusted[::-1])[::-1], 1)
+    p_ref = np.empty(len(p_all))
+    p_ref[order] = adjusted
+
+    np.testing.assert_allclose(adjust_p_values(p_all, p_all, "bh"), p_ref)
+    np.testing.assert_allclose(adjust_p_values(p_all, p_all, "bonferroni"),
+                               np.minimum(p_all*200, 1))
+    with pytest.raises(ValueError):
+        adjust_p_values(p_all, p_all, "holm")
+
+
+def test_z_test_without_noise():
+    z, p_value = z_test(np.array([1., 1.]), np.zeros(2), 10,
+                        np.array([1., 2.]), np.zeros(2), 10)
+    np.testing.assert_array_equal(p_value, [1., 0.])
+
+
+def test_result_diff_without_changes():
+    results_a, results_b = get_result_pair()
+    for results in [results_b, []]:
+        diff = result_diff(results, results_b,
+                           nb_runs_a=1000, nb_runs_b=1000)
+
+        assert len(diff.changes) == 0
+        assert list(diff.changes.columns) == DIFF_COLUMNS
+        assert all(pd.api.types.is_float_dtype(diff.changes[col])
+                   for col in DIFF_COLUMNS[1:])
+
+
+def test_result_diff_requires_frame_nb_runs():
+    results_a, results_b = get_result_pair()
+    with pytest.raises(ValueError, match="nb_runs_a"):
+        result_diff(results_a, results_b, nb_runs_b=1000)
+    with pytest.raises(ValueError, match="nb_runs_b"):
+        result_diff(results_a, results_b, nb_runs_a=1000)
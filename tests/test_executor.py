@@ -0,0 +1,149 @@
+import os
+import threading
+import time
+import numpy as np
+import pytest
+from pyctools import PycStudy, PycLocalExecutor, PycFileQueueExecutor
+from pyctools.executor import run_worker
+from pyctools import study as study_module
+from pyctools.automaton import ExpOccDistribution
+
+
+SIMU_PARAMS = {"nb_runs": 100, "schedule": [10., 20.], "seed": 3}
+
+
+@pytest.fixture
+def study():
+    study_module.SYSTEM_CACHE.clear()
+    yield PycStudy(name="study", system_factory="tests.models:build_system")
+    study_module.SYSTEM_CACHE.clear()
+
+
+def test_distributed_results_equal_local_results(study):
+    system = study.get_system()
+    system.simulate(executor=PycLocalExecutor(max_workers=2),
+                    batch_size=25, **SIMU_PARAMS)
+    means = {indic_name: indic.get_stat_values("mean")
+             for indic_name, indic in system.indicators.items()}
+
+    system.simulate(batch_size=25, **SIMU_PARAMS)
+    for indic_name, indic in system.indicators.items():
+        np.testing.assert_allclose(indic.get_stat_values("mean"),
+                                   means[indic_name])
+
+
+def test_distributed_modified_system(study):
+    system = study.get_system()
+    system.add_indicator_expr("nb_on", "sum('C.*', '^on$')")
+    with pytest.raises(ValueError):
+        system.simulate(executor=PycLocalExecutor(max_workers=2),
+                        **SIMU_PARAMS)
+
+    del system.indicators["nb_on"]
+    system.set_occ_laws({"C0.fail": ExpOccDistribution(rate=1.)})
+    with pytest.raises(ValueError):
+        system.simulate(executor=PycLocalExecutor(max_workers=2),
+                        **SIMU_PARAMS)
+
+
+def crash_twice(task):
+    """ Task 1 kills its worker the first two times, other tasks may
+    be running at that time """
+    idx, path = task
+    if idx == 1:
+        nb_crashes = len(os.listdir(path))
+        if nb_crashes < 2:
+            open(os.path.join(path, f"crash-{nb_crashes}"), "w").close()
+            os._exit(1)
+    time.sleep(0.5)
+    return idx
+
+
+def test_local_lost_worker_retries(tmp_path):
+    executor = PycLocalExecutor(max_workers=4, max_retries=1)
+    tasks = [(idx, str(tmp_path)) for idx in range(4)]
+    results = dict(executor.map_tasks(crash_twice, tasks))
+
+    assert results == {idx: idx for idx in range(4)}
+    # Tasks running when the pool broke are rerun one at a time: only
+    # the task which broke the pool on its own is charged a retry
+    assert executor.nb_retries == [0, 1, 0, 0]
+
+
+def test_file_queue_local_workers(study, tmp_path, monkeypatch):
+    # Local workers import the test models (and the stand-in backend)
+    tests_dir = os.path.dirname(__file__)
+    monkeypatch.setenv("PYTHONPATH", os.pathsep.join(
+        [os.path.dirname(tests_dir), os.path.join(tests_dir, "stub")]))
+
+    executor = PycFileQueueExecutor(str(tmp_path), poll_period=0.05,
+                                    global_timeout=60)
+    workers = executor.start_local_workers(2)
+    try:
+        system = study.get_system()
+        system.simulate(executor=executor, batch_size=25, **SIMU_PARAMS)
+        means = {indic_name: indic.get_stat_values("mean")
+                 for indic_name, indic in system.indicators.items()}
+    finally:
+        executor.stop_workers()
+        for worker in workers:
+            worker.wait(timeout=10)
+
+    system.simulate(batch_size=25, **SIMU_PARAMS)
+    for indic_name, indic in system.indicators.items():
+        np.testing.assert_allclose(indic.get_stat_values("mean"),
+                                   means[indic_name])
+    assert os.listdir(tmp_path/"tasks") == []
+    assert os.listdir(tmp_path/"running") == []
+
+
+def test_file_queue_no_worker(tmp_path):
+    executor = PycFileQueueExecutor(str(tmp_path), poll_period=0.05,
+                                    global_timeout=0.3)
+    with pytest.raises(TimeoutError):
+        list(executor.map_tasks(len, ["a", "b"]))
+    assert os.listdir(tmp_path/"tasks") == []
+
+
+SECOND_CLAIM_RELEASE = threading.Event()
+NB_CALLS = []
+
+
+def slow_first_call(task):
+    NB_CALLS.append(task)
+    if len(NB_CALLS) == 1:
+        time.sleep(0.6)
+        return "first"
+    SECOND_CLAIM_RELEASE.wait(10)
+    return "second"
+
+
+def test_file_queue_late_worker_keeps_new_claim(tmp_path):
+    # The first worker heartbeat is slower than the executor timeout:
+    # its claim is requeued and claimed again by the second worker
+    NB_CALLS.clear()
+    executor = PycFileQueueExecutor(str(tmp_path), timeout=0.2,
+                                    poll_period=0.05, global_timeout=10)
+    workers = [threading.Thread(target=run_worker,
+                                args=(str(tmp_path), timeout, 0.05))
+               for timeout in [100, 0.2]]
+    results = []
+    master = threading.Thread(target=lambda: results.extend(
+        executor.map_tasks(slow_first_call, [None])))
+    try:
+        master.start()
+        workers[0].start()
+        while not NB_CALLS:
+            time.sleep(0.01)
+        workers[1].start()
+        master.join(timeout=10)
+
+        # The late first worker did not remove the running second claim
+        assert results == [(0, "first")]
+        assert len(NB_CALLS) == 2
+        assert len(os.listdir(tmp_path/"running")) == 1
+    finally:
+        SECOND_CLAIM_RELEASE.set()
+        executor.stop_workers()
+        for worker in workers:
+            worker.join(timeout=10)
@@ -0,0 +1,104 @@
+import re
+import numpy as np
+import pytest
+from pyctools import PycSystem
+from pyctools.expression import PycExpression
+from .models import add_component
+
+
+VARIABLES = [("P1", "on"), ("P2", "on"), ("P3", "on"), ("P1", "flow")]
+AUTOMATA = {("P1", "aut"): {"ok": 0, "failed": 1}}
+
+
+def resolver(comp_pat, var_pat, exact):
+    if exact:
+        return [(comp, var) for comp, var in VARIABLES
+                if comp == comp_pat and var == var_pat]
+    return [(comp, var) for comp, var in VARIABLES
+            if re.fullmatch(comp_pat, comp) and re.search(var_pat, var)]
+
+
+def state_resolver(comp_name, aut_name, state_name):
+    return [(aut_key, states[state_name])
+            for aut_key, states in AUTOMATA.items()
+            if aut_key[0] == comp_name and
+            aut_name in [None, aut_key[1]] and state_name in states]
+
+
+def get_values(expr, **var_values):
+    return np.array([var_values[f"{comp}_{var}"]
+                     for comp, var in expr.variables], dtype=float)
+
+
+def test_boolean_expression():
+    expr = PycExpression("P1.on and not var('P2', 'on')", resolver)
+    assert expr.evaluate(get_values(expr, P1_on=1, P2_on=0))
+    assert not expr.evaluate(get_values(expr, P1_on=1, P2_on=1))
+
+
+def test_arithmetic_and_comparison():
+    expr = PycExpression("2*P1.flow + 1 >= 5", resolver)
+    assert expr.evaluate(get_values(expr, P1_flow=2))
+    assert not expr.evaluate(get_values(expr, P1_flow=1.5))
+
+
+def test_aggregations():
+    values = np.array([1, 0, 1], dtype=float)
+    assert PycExpression("sum('P.*', '^on$')", resolver).evaluate(values) == 2
+    assert PycExpression("mean('P.*', '^on$')", resolver)\
+        .evaluate(values) == pytest.approx(2/3)
+    assert PycExpression("count('P.*', '^on$')", resolver).evaluate(values) == 2
+    assert PycExpression("kofn(2, 'P.*', '^on$')", resolver).evaluate(values)
+    assert not PycExpression("kofn(3, 'P.*', '^on$')", resolver)\
+        .evaluate(values)
+
+
+def test_kofn_expression_members():
+    expr = PycExpression("kofn(2, P1.on, P2.on, P3.on)", resolver)
+    assert expr.evaluate(get_values(expr, P1_on=1, P2_on=0, P3_on=1))
+    assert not expr.evaluate(get_values(expr, P1_on=1, P2_on=0, P3_on=0))
+
+
+def test_batch_evaluation():
+    expr = PycExpression("any('P.*', '^on$')", resolver)
+    values = np.array([[0, 0, 0], [0, 1, 0], [1, 1, 1]], dtype=float)
+    np.testing.assert_array_equal(expr.evaluate(values), [False, True, True])
+
+
+def test_in_state():
+    expr = PycExpression("in_state('P1', 'failed') and P2.on",
+                         resolver, state_resolver=state_resolver)
+    assert expr.automata == [("P1", "aut")]
+    assert expr.evaluate([1], [1])
+    assert not expr.evaluate([1], [0])
+
+
+def test_errors():
+    with pytest.raises(ValueError):
+        PycExpression("__import__('os')", resolver)
+    with pytest.raises(ValueError):
+        PycExpression("P1.on.value", resolver)
+    with pytest.raises(ValueError):
+        PycExpression("P4.on", resolver)
+    with pytest.raises(ValueError):
+        PycExpression("in_state('P1', 'failed')", resolver)
+
+
+def test_exact_reference_must_be_unique():
+    def resolver_dup(comp_pat, var_pat, exact):
+        return [("P1", "on"), ("P1", "on_bis")]
+
+    with pytest.raises(ValueError):
+        PycExpression("P1.on", resolver_dup)
+    assert PycExpression("sum('P1', 'on')", resolver_dup)\
+        .evaluate([1, 1]) == 2
+
+
+def test_system_exact_reference_is_not_a_regex():
+    system = PycSystem("S")
+    for comp_name in ["C.1", "Cx1", "C.10"]:
+        add_component(comp_name)
+    expr = system.compile_expr("var('C.1', 'on') and not var('Cx1', 'on')")
+
+    assert [var.name() for var in expr.var_selection.var_bkd] == \
+        ["C.1.on", "Cx1.on"]
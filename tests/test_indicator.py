@@ -0,0 +1,46 @@
+import numpy as np
+from pyctools.indicator import PycIndicatorAccumulator, PycCompactSeries
+
+
+def test_accumulator_merge():
+    rng = np.random.default_rng(0)
+    samples = rng.random((100, 4))
+
+    acc = PycIndicatorAccumulator()
+    for part in [samples[:30], samples[30:]]:
+        acc_part = PycIndicatorAccumulator()
+        acc_part.update_stats(part.mean(axis=0), part.std(axis=0, ddof=1),
+                              len(part))
+        acc.merge(acc_part)
+
+    assert acc.count == 100
+    np.testing.assert_allclose(acc.mean(), samples.mean(axis=0))
+    np.testing.assert_allclose(acc.stddev(), samples.std(axis=0, ddof=1))
+
+
+def test_accumulator_merge_empty():
+    acc = PycIndicatorAccumulator()
+    acc.merge(PycIndicatorAccumulator())
+    assert acc.count == 0
+
+    acc.update_stats([1., 2.], [0., 0.], 1)
+    np.testing.assert_array_equal(acc.stddev(), [0., 0.])
+
+
+def test_compact_series_run_length():
+    values = np.repeat([1., 0., 1.], [500, 200, 300])
+    series = PycCompactSeries.from_array(values)
+
+    assert series.run_ends is not None
+    assert len(series.values) == 3
+    np.testing.assert_array_equal(series.to_array(), values)
+    assert series.nbytes() < values.astype(np.float32).nbytes
+
+
+def test_compact_series_dense():
+    values = np.random.default_rng(0).random(1000)
+    series = PycCompactSeries.from_array(values)
+
+    assert series.run_ends is None
+    np.testing.assert_array_equal(series.to_array(),
+                                  values.astype(np.float32))
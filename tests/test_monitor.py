@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from pyctools.monitor import PycMonitorPublisher, PycMonitorReader
+from .models import build_system
+
+
+SIMU_PARAMS = {"nb_runs": 100, "schedule": [10., 20., 30.], "seed": 1234}
+INDIC_NAMES = ["C0_on", "C1_on", "C2_on"]
+
+
+@pytest.mark.parametrize("batch_size", [None, 10])
+def test_monitoring_does_not_change_results(batch_size):
+    simu_params = dict(SIMU_PARAMS, batch_size=batch_size)
+    with PycMonitorPublisher(INDIC_NAMES, [10., 20., 30.],
+                             SIMU_PARAMS["nb_runs"], interval=0.) as monitor:
+        system = build_system()
+        system.simulate_monitored(monitor, **simu_params)
+
+        reader = PycMonitorReader(monitor.name)
+        data = reader.read()
+        reader.close()
+    assert data["finished"]
+    assert data["nb_runs"] == SIMU_PARAMS["nb_runs"]
+    # Batched simulations publish after each batch
+    assert len(data["records"]) == (10 if batch_size else 1)
+
+    system_ref = build_system()
+    system_ref.simulate(**simu_params)
+    for idx, indic_name in enumerate(INDIC_NAMES):
+        means = system_ref.indicators[indic_name].get_stat_values("mean")
+        np.testing.assert_array_equal(
+            system.indicators[indic_name].get_stat_values("mean"), means)
+        np.testing.assert_allclose(data["means"][idx], means)
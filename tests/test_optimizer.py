@@ -0,0 +1,79 @@
+import numpy as np
+from pyctools import PycStudy
+from pyctools.indicator import PycIndicatorAccumulator
+from pyctools.optimizer import dominates, pareto_ranks, \
+    PycDecisionVariable, PycOptimizer
+
+
+def test_dominates():
+    obj = np.array([1., 2., 2.])
+    cost = np.array([1., 1., 2.])
+    dom = dominates(obj, cost, obj, cost)
+
+    assert dom[1, 0] and dom[1, 2]
+    assert not dom[0, 2] and not dom[2, 0]
+    assert not dom.diagonal().any()
+
+
+def test_pareto_ranks():
+    # Objective maximized, cost minimized
+    obj = np.array([1., 2., 3., 1.5, 2.5, 0.5])
+    cost = np.array([1., 2., 3., 2.5, 3.5, 3.])
+    np.testing.assert_array_equal(pareto_ranks(obj, cost),
+                                  [0, 0, 0, 1, 1, 2])
+
+
+def build_optimizer(**specs):
+    study = PycStudy(name="study", system_factory="tests.models:build_system",
+                     simu_params={"schedule": [10.]})
+    return PycOptimizer(**dict(
+        dict(study=study,
+             variables=[PycDecisionVariable(name="level",
+                                            values=[0, 1, 2, 3, 4])],
+             indicator="C0_on",
+             cost=lambda candidate: float(candidate["level"])),
+        **specs))
+
+
+def test_racing_keeps_undominated_candidates(monkeypatch):
+    # Objective mean and stddev of each level
+    stats = {0: (1., 0.2), 1: (2., 0.2), 2: (2.05, 0.2),
+             3: (2.04, 0.2), 4: (1., 0.2)}
+
+    def evaluate(self, candidates, nb_runs, round_idx):
+        accumulators = []
+        for candidate in candidates:
+            mean, stddev = stats[candidate["level"]]
+            acc = PycIndicatorAccumulator()
+            acc.update_stats([mean], [stddev], nb_runs)
+            accumulators.append(acc)
+        return accumulators
+
+    monkeypatch.setattr(PycOptimizer, "evaluate", evaluate)
+    results_df = build_optimizer(nb_runs_min=100, nb_rounds=3).run()
+
+    # Level 4 is dominated with confidence by levels 1, 2 and 3. Level
+    # 3 is dominated by level 2 without confidence: it is raced until
+    # the last round but is not on the front
+    assert results_df["round"].tolist() == [2, 2, 2, 2, 0]
+    assert results_df["pareto"].tolist() == [True, True, True, False, False]
+
+
+def test_evaluation_cache_key():
+    optimizer = build_optimizer(
+        variables=[PycDecisionVariable(name="rate", values=[1e-3, 1e-2],
+                                       transition="C0.fail")])
+    candidates = optimizer.get_candidates()
+    optimizer.evaluate(candidates, 10, 0)
+    assert len(optimizer.evaluations) == 2
+    optimizer.evaluate(candidates, 10, 0)
+    assert len(optimizer.evaluations) == 2
+
+    # Other objective indicator or study: new evaluations
+    optimizer.indicator = "C1_on"
+    optimizer.evaluate(candidates, 10, 0)
+    assert len(optimizer.evaluations) == 4
+    optimizer.study = optimizer.study.copy(
+        update={"system_params": {"nb_comps": 4}})
+    optimizer.evaluate(candidates, 10, 0)
+    assert len(optimizer.evaluations) == 6
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+from pyctools.plotting import lttb_indices, minmax_indices, \
+    downsample_indices
+from .models import build_system
+
+
+def get_series(nb_data=10000):
+    x = np.linspace(0, 10, nb_data)
+    y = np.sin(x) + 0.1*np.random.default_rng(0).standard_normal(nb_data)
+    return x, y
+
+
+def test_lttb_indices():
+    x, y = get_series()
+    idx = lttb_indices(x, y, 100)
+
+    assert len(idx) == 100
+    assert idx[0] == 0 and idx[-1] == len(x) - 1
+    assert (np.diff(idx) > 0).all()
+
+
+def test_minmax_indices():
+    x, y = get_series()
+    idx = minmax_indices(x, y, 100)
+
+    assert len(idx) <= 102
+    assert y.argmin() in idx and y.argmax() in idx
+    assert (np.diff(idx) > 0).all()
+
+
+def test_downsample_indices_small_series():
+    x, y = get_series(50)
+    np.testing.assert_array_equal(lttb_indices(x, y, 100), np.arange(50))
+    np.testing.assert_array_equal(downsample_indices(x, y, None),
+                                  np.arange(50))
+    with pytest.raises(ValueError):
+        downsample_indices(x, y, 10, method="average")
+
+
+@pytest.mark.parametrize("result_mode", ["frame", "compact"])
+def test_stddev_band_without_stddev_stat(result_mode):
+    system = build_system()
+    system.add_indicator_var(component="C0", var="load")
+    system.simulate(nb_runs=10, schedule=[10., 20.], seed=1,
+                    result_mode=result_mode)
+    indic = system.indicators["C0_load"]
+    assert indic.stats == ["mean"]
+
+    fig = system.indic_plot(indicators=["C0_load"], stddev_band=True)
+    assert len(fig.data) == 2
+    np.testing.assert_allclose(indic.get_stat_values("stddev"),
+                               indic.bkd.stdDevs())
+
+
+def test_px_line_keeps_indicator_columns():
+    system = build_system()
+    system.add_indicator_var(component="C0", var="load", metadata={"sub": "a"})
+    system.simulate(nb_runs=10, schedule=[10., 20.], seed=1)
+
+    fig = system.indic_px_line(color="comp", facet_col="attr")
+    assert {trace.name for trace in fig.data} >= {"C0", "C1", "C2"}
+
+    fig = system.indic_px_line(indicators=["C0_load"], color="sub",
+                               hover_data=["measure", "unit"])
+    assert [trace.name for trace in fig.data] == ["a"]
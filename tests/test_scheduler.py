@@ -0,0 +1,37 @@
+import asyncio
+import math
+import numpy as np
+from pyctools.scheduler import PycSimulationScheduler
+from .models import build_system
+
+
+SIMU_PARAMS = {"nb_runs": 100, "schedule": [10., 20.], "seed": 7}
+
+
+def test_scheduler_shared_by_event_loops():
+    scheduler = PycSimulationScheduler(max_simulations=1)
+    systems = [build_system(), build_system()]
+
+    async def simulate_all():
+        # Concurrent simulations contend for the scheduler semaphore
+        await asyncio.gather(*[system.simulate_async(scheduler=scheduler,
+                                                     **SIMU_PARAMS)
+                               for system in systems])
+
+    asyncio.run(simulate_all())
+    asyncio.run(simulate_all())
+    scheduler.shutdown()
+
+
+def test_simulate_async_batches():
+    system = build_system()
+    asyncio.run(system.simulate_async(nb_progress=4, **SIMU_PARAMS))
+
+    system_ref = build_system()
+    system_ref.simulate(batch_size=math.ceil(SIMU_PARAMS["nb_runs"]/4),
+                        **SIMU_PARAMS)
+
+    for indic_name, indic in system.indicators.items():
+        np.testing.assert_allclose(
+            indic.get_stat_values("mean"),
+            system_ref.indicators[indic_name].get_stat_values("mean"))
@@ -0,0 +1,119 @@
+import numpy as np
+import pytest
+import Pycatshoo as pyc
+import pyctools.sensitivity as sensitivity
+from pyctools import PycSystem, PycStudy
+from pyctools import study as study_module
+from pyctools.automaton import ExpOccDistribution, DelayOccDistribution
+from pyctools.indicator import PycFunIndicator
+from .models import build_system, add_component
+
+stub_only = pytest.mark.skipif(
+    not hasattr(pyc, "CURRENT_SYSTEM"),
+    reason="Analytic values of the stand-in backend interactive mode")
+
+
+def test_fd_sensitivity_common_random_numbers(monkeypatch):
+    seeds = []
+
+    def record_sequences(system, exprs, instants, nb_runs, seed=None,
+                         trans_ids=[]):
+        seeds.append(seed)
+        return np.zeros((nb_runs, len(exprs), len(instants))), None, None
+
+    monkeypatch.setattr(sensitivity, "record_sequences", record_sequences)
+
+    system = build_system()
+    indicators = list(system.indicators.values())
+    sensitivity.fd_sensitivity(
+        system, indicators,
+        {"C0.rep": DelayOccDistribution(time=24.),
+         "C1.rep": DelayOccDistribution(time=24.)},
+        10., nb_runs=10)
+
+    assert len(seeds) == 5
+    assert seeds[0] is not None
+    assert len(set(seeds)) == 1
+
+
+def test_fd_sensitivity_restores_laws_on_error(monkeypatch):
+    calls = []
+
+    def record_sequences(system, exprs, instants, nb_runs, seed=None,
+                         trans_ids=[]):
+        calls.append(system.get_occ_laws()["C0.rep"].time)
+        if len(calls) > 1:
+            raise RuntimeError("Simulation failed")
+        return np.zeros((nb_runs, len(exprs), len(instants))), None, None
+
+    monkeypatch.setattr(sensitivity, "record_sequences", record_sequences)
+
+    system = build_system()
+    fingerprint = system.fingerprint()
+    with pytest.raises(RuntimeError):
+        sensitivity.fd_sensitivity(
+            system, list(system.indicators.values()),
+            {"C0.rep": DelayOccDistribution(time=24.)}, 10., nb_runs=10)
+
+    assert calls[1] == pytest.approx(24*1.1)
+    assert system.get_occ_laws()["C0.rep"].time == 24.
+    assert system.fingerprint() == fingerprint
+
+
+def test_unsupported_indicators():
+    system = build_system()
+    system.add_indicator_var(component="C0", var="^on$",
+                             measure="sojourn-time")
+    with pytest.raises(ValueError):
+        system.sensitivity(10., nb_runs=10, indicators=["C0_on_sojourn-time"])
+
+    system.add_indicator(PycFunIndicator(name="fun", fun=len))
+    with pytest.raises(ValueError):
+        system.sensitivity(10., nb_runs=10, indicators=["fun"])
+
+
+def test_sobol_sample_restores_study_system():
+    study_module.SYSTEM_CACHE.clear()
+    study = PycStudy(name="study", system_factory="tests.models:build_system",
+                     simu_params={"nb_runs": 10, "schedule": [10.],
+                                  "seed": 1})
+    sensitivity.eval_sobol_sample(study,
+                                  {"C0.fail": ExpOccDistribution(rate=1.)})
+
+    assert study.get_system().get_occ_laws()["C0.fail"].rate == 1e-3
+    study_module.SYSTEM_CACHE.clear()
+
+
+@stub_only
+def test_record_sequences_counts_and_exposures():
+    system = PycSystem("S")
+    add_component("C0", rate=0.05)
+    values, counts, exposures = sensitivity.record_sequences(
+        system, ["in_state('C0', 'ko')"], [10., 30.], 50, seed=1,
+        trans_ids=["C0.fail"])
+
+    # A failed component stays failed 24 time units
+    failed = values[:, 0, 0] == 1
+    np.testing.assert_array_equal(counts[:, 0, 0], failed)
+    assert (exposures[failed, 0, 0] < 10).all()
+    np.testing.assert_allclose(exposures[~failed, 0, 0], 10)
+    assert (np.diff(exposures[:, 0, :], axis=1) >= 0).all()
+
+
+@stub_only
+def test_lr_sensitivity_exponential():
+    rate, instant = 0.05, 10.
+    system = PycSystem("S")
+    add_component("C0", rate=rate)
+    system.add_indicator_expr("C0_ko", "in_state('C0', 'ko')")
+
+    sensi_df = sensitivity.lr_sensitivity(
+        system, list(system.indicators.values()),
+        {"C0.fail": ExpOccDistribution(rate=rate)}, instant,
+        nb_runs=4000, seed=0)
+
+    # No repair before instant: P(ko) = 1 - exp(-rate*t)
+    row = sensi_df.iloc[0]
+    assert row["mean"] == pytest.approx(1 - np.exp(-rate*instant), abs=0.03)
+    assert row["derivative"] == \
+        pytest.approx(instant*np.exp(-rate*instant), abs=4*row["stderr"])
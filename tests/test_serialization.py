@@ -0,0 +1,104 @@
+import pytest
+import Pycatshoo as pyc
+from pyctools import PycSystem
+from pyctools.automaton import ExpOccDistribution
+from pyctools import serialization
+from pyctools.indicator import PycFunIndicator
+from pyctools.serialization import dump_system, load_system, system_to_specs
+from .models import add_component, build_system, RepairableComponent
+
+
+def build_mixed_system():
+    system = PycSystem("S")
+    RepairableComponent("R0")
+    RepairableComponent("R1")
+    add_component("C0", rate=2e-3)
+    system.add_indicator_var(component=".*", var="^on$", stats=["mean"])
+    return system
+
+
+def test_round_trip_keeps_component_classes(tmp_path):
+    system = build_mixed_system()
+    system.set_occ_laws({"R1.fail": ExpOccDistribution(rate=5e-3)})
+    specs = system_to_specs(system)
+    fingerprint = system.fingerprint()
+    dump_system(system, tmp_path / "model.bin")
+
+    loaded = load_system(tmp_path / "model.bin")
+
+    comp_types = {comp.basename(): type(comp)
+                  for comp in loaded.getComponents("#.*", "#.*")}
+    assert comp_types == {"R0": RepairableComponent,
+                          "R1": RepairableComponent,
+                          "C0": pyc.CComponent}
+    assert system_to_specs(loaded) == specs
+    assert loaded.fingerprint() == fingerprint
+
+
+def test_round_trip_with_component_class_override(tmp_path):
+    system = build_mixed_system()
+    specs = system_to_specs(system)
+    dump_system(system, tmp_path / "model.bin")
+
+    loaded = load_system(tmp_path / "model.bin", comp_cls=pyc.CComponent)
+
+    assert all(type(comp) is pyc.CComponent
+               for comp in loaded.getComponents("#.*", "#.*"))
+    # Same structure, the component classes (Python behaviour) differ
+    specs_loaded = system_to_specs(loaded)
+    assert [comp[2:] for comp in specs_loaded["components"]] == \
+        [comp[2:] for comp in specs["components"]]
+    assert loaded.fingerprint() != system.fingerprint()
+
+
+def test_component_class_not_matching_stored_definition(tmp_path):
+    system = build_mixed_system()
+    comp = system.getComponents("#^R0$", "#.*")[0]
+    comp.addVariable("extra", pyc.TVarType.t_double, 0.)
+    dump_system(system, tmp_path / "model.bin")
+
+    with pytest.raises(ValueError):
+        load_system(tmp_path / "model.bin")
+
+
+def test_dump_multiple_target_transition(tmp_path):
+    system = build_mixed_system()
+    comp = system.getComponents("#^C0$", "#.*")[0]
+    aut = comp.getAutomata()[0]
+    trans = aut.states()[0].transitions()[0]
+    trans.addTarget(aut.states()[0])
+
+    with pytest.raises(ValueError, match="C0.fail has 2 targets"):
+        dump_system(system, tmp_path / "model.bin")
+    assert not (tmp_path / "model.bin").exists()
+
+
+def test_dump_indicator_function_reference(tmp_path):
+    system = build_mixed_system()
+    system.add_indicator(PycFunIndicator(name="fun_len", fun=len))
+    dump_system(system, tmp_path / "model.bin")
+    loaded = load_system(tmp_path / "model.bin")
+    assert loaded.indicators["fun_len"].fun is len
+
+    # Lambdas cannot be loaded back: dump fails, not load
+    system.add_indicator(PycFunIndicator(name="fun_lambda",
+                                         fun=lambda: 0.))
+    with pytest.raises(ValueError, match="fun_lambda"):
+        dump_system(system, tmp_path / "model_lambda.bin")
+    assert not (tmp_path / "model_lambda.bin").exists()
+
+
+def test_benchmark_load(tmp_path, monkeypatch):
+    dump_system(build_system(nb_comps=5), tmp_path / "model.bin")
+    loaded = []
+    monkeypatch.setattr(serialization, "load_system",
+                        lambda **kwargs: loaded.append(load_system(**kwargs)))
+
+    times = serialization.benchmark_load(tmp_path / "model.bin",
+                                         "tests.models:build_system",
+                                         {"nb_comps": 5}, nb_repeats=2)
+
+    assert set(times) == {"load", "factory"}
+    assert all(value > 0 for value in times.values())
+    assert len(loaded) == 2
+    assert system_to_specs(loaded[0]) == system_to_specs(build_system(nb_comps=5))
@@ -0,0 +1,87 @@
+import numpy as np
+import pytest
+import Pycatshoo as pyc
+from pyctools import PycSystem, PycInteractiveSession
+from .models import add_component
+
+stub_only = pytest.mark.skipif(
+    not hasattr(pyc, "CURRENT_SYSTEM"),
+    reason="Interactive mode of the stand-in backend")
+
+
+def start_session(**session_specs):
+    system = PycSystem("S")
+    add_component("C0", rate=0.5, repair_time=1.)
+    add_component("C1", rate=0.5, repair_time=1.)
+    system.setRNGSeed(1)
+    session = PycInteractiveSession(system=system, **session_specs)
+    session.run_session()
+    return session
+
+
+def step_times(session, nb_steps):
+    times = []
+    for _ in range(nb_steps):
+        session.step_forward()
+        times.append(session.system.currentTime())
+    return times
+
+
+@stub_only
+def test_restore_snapshot_continuation():
+    session = start_session()
+    step_times(session, 3)
+    session.save_snapshot("branch")
+    time_ref = session.system.currentTime()
+    states_ref = [aut.currentState().basename()
+                  for aut in session.system.get_state_index().aut_bkd]
+
+    times_1 = step_times(session, 5)
+    session.restore_snapshot("branch")
+    assert session.system.currentTime() == time_ref
+    assert [aut.currentState().basename()
+            for aut in session.system.get_state_index().aut_bkd] == states_ref
+
+    # Reseeded with the snapshot seed: same continuation at each restore
+    times_2 = step_times(session, 5)
+    session.restore_snapshot("branch")
+    assert step_times(session, 5) == times_2
+    assert times_1[0] == times_2[0]
+
+
+@stub_only
+def test_restore_unsupported(monkeypatch):
+    session = start_session(keep_history=True)
+    step_times(session, 2)
+    time_cur = session.system.currentTime()
+    monkeypatch.delattr(pyc.IAutomaton, "setCurrentState")
+
+    with pytest.raises(NotImplementedError, match="automaton.setCurrentState"):
+        session.system.restore(session.history[-1])
+    assert session.system.currentTime() == time_cur
+
+    # Back-stepping falls back on the backend when available
+    calls = []
+    monkeypatch.setattr(pyc.CSystem, "stepBackward",
+                        lambda system: calls.append(system), raising=False)
+    session.step_backward()
+    assert calls == [session.system]
+    assert len(session.history) == 1
+
+
+def test_handles_follow_structure_changes():
+    system = PycSystem("S")
+    comp = add_component("C0")
+    assert len(system.get_state_index().var_selection) == 2
+    assert len(system.select_variables("C.*", "on")) == 1
+    state = system.snapshot()
+
+    add_component("C1")
+    comp.addVariable("temp", pyc.TVarType.t_double, 20.)
+    assert len(system.get_state_index().var_selection) == 5
+    assert len(system.get_state_index().aut_bkd) == 2
+    assert len(system.select_variables("C.*", "on")) == 2
+    np.testing.assert_array_equal(system.get_values(("C0", "temp")), [20.])
+
+    with pytest.raises(ValueError):
+        system.restore(state)
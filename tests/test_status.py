@@ -0,0 +1,101 @@
+import pytest
+import Pycatshoo as pyc
+from pyctools import PycInteractiveSession, PycSystem
+from pyctools.status import STATUS_COLUMNS
+from .models import build_system, add_component
+
+stub_only = pytest.mark.skipif(
+    not hasattr(pyc, "CURRENT_SYSTEM"),
+    reason="Interactive mode of the stand-in backend")
+
+
+def test_components_status_df():
+    system = build_system()
+    session = PycInteractiveSession(system=system)
+    status_df = session.components_status_df()
+
+    assert list(status_df.columns) == STATUS_COLUMNS
+    assert len(status_df) == 3*3
+    # Components are identified as in PycComponent.from_bkd
+    comp_ids = {var.parent().name() for var in system.get_variables()}
+    assert set(status_df["Component"]) == comp_ids
+
+
+def test_components_status_page():
+    session = PycInteractiveSession(system=build_system())
+    status_df = session.components_status_df(
+        comp_pat="C[12]", types=["VAR"], sort_by="Name", page=1, page_size=2)
+
+    assert list(status_df["Name"]) == ["on", "on"]
+    assert list(status_df["Component"]) == ["C1", "C2"]
+    report = session.report_components_status(comp_pat="C0", page_size=2)
+    assert "rows 1-2 of 3, page 1/2" in report
+    assert report.splitlines()[1:] == \
+        session.components_status_df(comp_pat="C0", page_size=2)\
+               .to_string().splitlines()
+
+
+def test_components_status_grouped_by_component():
+    session = PycInteractiveSession(system=build_system(nb_comps=2))
+    status_df = session.components_status_df()
+
+    assert status_df[["Component", "Name", "Type"]].values.tolist() == [
+        ["C0", "on", "VAR"], ["C0", "load", "VAR"], ["C0", "aut", "ST"],
+        ["C1", "on", "VAR"], ["C1", "load", "VAR"], ["C1", "aut", "ST"]]
+    assert status_df["Current value"].tolist() == \
+        [True, 1.5, "ok", True, 1.5, "ok"]
+
+
+def test_components_status_patterns_searched():
+    session = PycInteractiveSession(system=build_system(nb_comps=12))
+    # Component and name patterns are both searched
+    status_df = session.components_status_df(comp_pat="1", name_pat="o")
+
+    assert status_df[["Component", "Name"]].values.tolist() == [
+        ["C1", "on"], ["C1", "load"],
+        ["C10", "on"], ["C10", "load"],
+        ["C11", "on"], ["C11", "load"]]
+
+
+def test_components_status_sort_by_value():
+    system = build_system(nb_comps=2)
+    system.set_values([3., 0.5], selector=("C.*", "load"))
+    aut = system.get_state_index().aut_bkd[0]
+    aut.setCurrentState(aut.states()[1])
+    session = PycInteractiveSession(system=system)
+
+    status_df = session.components_status_df(sort_by="Current value",
+                                             types=["VAR", "ST"],
+                                             name_pat="load|aut")
+    # Variables sorted by value, then automata by state name
+    assert status_df[["Component", "Current value"]].values.tolist() == [
+        ["C1", 0.5], ["C0", 3.], ["C0", "ko"], ["C1", "ok"]]
+
+    status_df = session.components_status_df(sort_by="Current value",
+                                             ascending=False,
+                                             name_pat="load|aut")
+    assert status_df[["Component", "Current value"]].values.tolist() == [
+        ["C0", 3.], ["C1", 0.5], ["C1", "ok"], ["C0", "ko"]]
+
+
+@stub_only
+@pytest.mark.parametrize("comp_tracked, changed_expected", [
+    ("C0", [["C0", "aut", "ko"]]),
+    ("C1", []),
+])
+def test_components_status_track_changes(comp_tracked, changed_expected):
+    system = PycSystem("S")
+    add_component("C0", rate=1e3)
+    add_component("C1", rate=1e-9)
+    session = PycInteractiveSession(system=system, track_changes=True,
+                                    track_specs={"comp_pat": comp_tracked})
+    session.run_session()
+    session.step_forward()
+    assert system.get_state_index().aut_bkd[0].currentState().basename() == "ko"
+
+    # Only the tracked component values are read before the step
+    assert [len(pos) for pos, _ in session.values_prev.values()] == [2, 1]
+
+    status_df = session.components_status_df(changed_only=True)
+    assert status_df[["Component", "Name", "Current value"]].values.tolist() \
+        == changed_expected
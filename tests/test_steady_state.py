@@ -0,0 +1,48 @@
+import numpy as np
+import pytest
+from pyctools.steady_state import PycSteadyStateParam, mser_truncation, \
+    batch_means, steady_state_estimate, t_quantile
+
+
+def get_trajectory(nb_values=2000, warm_up=200, seed=0):
+    rng = np.random.default_rng(seed)
+    values = 1 + 0.1*rng.standard_normal(nb_values)
+    values[:warm_up] += np.linspace(5, 0, warm_up)
+    return values
+
+
+def test_mser_truncation():
+    truncation = mser_truncation(get_trajectory(), batch_size=5)
+    assert 100 <= truncation <= 400
+    assert mser_truncation(np.ones(8), batch_size=5) == 0
+
+
+def test_batch_means():
+    np.testing.assert_allclose(batch_means(np.arange(12), 3),
+                               [1.5, 5.5, 9.5])
+    # Leading observations are dropped when not divisible
+    np.testing.assert_allclose(batch_means(np.arange(13), 3),
+                               [2.5, 6.5, 10.5])
+    with pytest.raises(ValueError):
+        batch_means(np.arange(2), 3)
+
+
+def test_steady_state_estimate():
+    trajectories = [get_trajectory(seed=seed) for seed in range(5)]
+    instants = np.arange(2000, dtype=float)
+
+    mean, half_width, warm_up = steady_state_estimate(
+        trajectories, instants, PycSteadyStateParam())
+
+    assert abs(mean - 1) < half_width + 0.01
+    assert half_width < 0.05
+    assert 100 <= warm_up <= 400
+
+
+@pytest.mark.parametrize("dof, prob, quantile", [
+    (1, 0.975, 12.7062), (2, 0.975, 4.3027), (3, 0.995, 5.8409),
+    (5, 0.975, 2.5706), (10, 0.975, 2.2281), (29, 0.95, 1.6991),
+    (30, 0.975, 2.0423), (60, 0.995, 2.6603), (120, 0.975, 1.9799)])
+def test_t_quantile(dof, prob, quantile):
+    assert t_quantile(prob, dof) == pytest.approx(quantile, abs=1e-4)
+    assert t_quantile(1 - prob, dof) == pytest.approx(-quantile, abs=1e-4)
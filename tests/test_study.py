@@ -0,0 +1,59 @@
+import functools
+import pytest
+from pyctools import PycStudy
+from pyctools import study as study_module
+from pyctools.common import get_obj_ref
+from .models import build_system
+
+
+SIMU_PARAMS = {"nb_runs": 10, "schedule": [10., 20.], "seed": 3}
+
+
+@pytest.fixture(autouse=True)
+def clear_system_cache():
+    study_module.SYSTEM_CACHE.clear()
+    yield
+    study_module.SYSTEM_CACHE.clear()
+
+
+def get_fail_rate(system, trans_id="C0.fail"):
+    return system.get_occ_laws()[trans_id].rate
+
+
+def test_studies_share_the_system_of_a_model():
+    study_a = PycStudy(name="a", system_factory="tests.models:build_system",
+                       simu_params=SIMU_PARAMS)
+    study_b = study_a.copy(update={"name": "b"})
+    assert study_a.get_system() is study_b.get_system()
+
+
+def test_hook_does_not_change_cached_system():
+    study_a = PycStudy(name="a", system_factory="tests.models:build_system",
+                       before_hook="tests.models:set_fast_failures",
+                       simu_params=SIMU_PARAMS)
+    study_b = PycStudy(name="b", system_factory="tests.models:build_system",
+                       simu_params=SIMU_PARAMS)
+    assert study_a.model_hash() == study_b.model_hash()
+
+    study_a.run_simu()
+    study_b.run_simu()
+
+    assert get_fail_rate(study_b.get_system()) == 1e-3
+    assert study_a.get_system() is not study_b.get_system()
+
+
+def test_obj_ref():
+    assert get_obj_ref(build_system) == "tests.models:build_system"
+    assert get_obj_ref("tests.models:build_system") == \
+        "tests.models:build_system"
+
+    def local_factory():
+        return build_system()
+
+    for obj in [lambda: build_system(), local_factory,
+                functools.partial(build_system, 2)]:
+        with pytest.raises(ValueError):
+            get_obj_ref(obj)
+    with pytest.raises(ValueError):
+        PycStudy(name="a", system_factory=lambda: build_system())\
+            .model_hash()
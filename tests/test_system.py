@@ -0,0 +1,219 @@
+import numpy as np
+import pandas as pd
+import pytest
+from pyctools import PycSystem
+from pyctools.automaton import ExpOccDistribution
+from pyctools.fingerprint import PycResultCache
+from .models import build_system, RepairableComponent
+
+
+SIMU_PARAMS = {"nb_runs": 100, "schedule": [10., 20., 30.], "seed": 1234}
+
+
+def get_means(system):
+    return {indic_name: indic.get_stat_values("mean")
+            for indic_name, indic in system.indicators.items()}
+
+
+def test_simulate_values():
+    system = build_system()
+    system.simulate(**SIMU_PARAMS)
+
+    results = system.indic_to_frame()
+    assert set(results["name"]) == {"C0_on", "C1_on", "C2_on"}
+    assert set(results["stat"]) == {"mean", "stddev"}
+    assert len(results) == 3*2*3
+
+
+def test_batched_simulation_resume(tmp_path):
+    checkpoint_path = str(tmp_path/"campaign.pkl")
+    system = build_system()
+    system.simulate(**dict(SIMU_PARAMS, nb_runs=90, batch_size=30,
+                           checkpoint_path=checkpoint_path))
+    means_ref = get_means(system)
+
+    # Extends the campaign by one batch
+    system_resumed = build_system()
+    system_resumed.resume(checkpoint_path, nb_runs=120)
+    system_new = build_system()
+    system_new.simulate(**dict(SIMU_PARAMS, nb_runs=120, batch_size=30))
+
+    for indic_name, means in get_means(system_new).items():
+        np.testing.assert_allclose(
+            system_resumed.indicators[indic_name].get_stat_values("mean"),
+            means)
+        assert not np.allclose(means, means_ref[indic_name])
+
+
+def test_resume_extends_incomplete_last_batch(tmp_path):
+    checkpoint_path = str(tmp_path/"campaign.pkl")
+    system = build_system()
+    system.simulate(**dict(SIMU_PARAMS, batch_size=30,
+                           checkpoint_path=checkpoint_path))
+    assert system.indicators["C0_on"].accumulator.count == 100
+
+    system_resumed = build_system()
+    system_resumed.resume(checkpoint_path, nb_runs=120)
+    for indic in system_resumed.indicators.values():
+        assert indic.accumulator.count == 120
+
+    with pytest.raises(ValueError):
+        build_system().resume(checkpoint_path, nb_runs=90)
+
+
+def test_resume_another_system(tmp_path):
+    checkpoint_path = str(tmp_path/"campaign.pkl")
+    system = build_system()
+    system.simulate(**dict(SIMU_PARAMS, batch_size=50,
+                           checkpoint_path=checkpoint_path))
+
+    system_other = build_system()
+    system_other.add_indicator_var(component="C0", var="^load$")
+    with pytest.raises(ValueError):
+        system_other.resume(checkpoint_path, nb_runs=200)
+
+    system_other = build_system()
+    system_other.set_occ_laws({"C0.fail": ExpOccDistribution(rate=1.)})
+    with pytest.raises(ValueError):
+        system_other.resume(checkpoint_path, nb_runs=200)
+
+
+def test_compact_results_equal_frame_results():
+    system = build_system()
+    system.simulate(**SIMU_PARAMS)
+    frame_df = system.indic_to_frame()
+
+    system_compact = build_system()
+    system_compact.simulate(result_mode="compact", **SIMU_PARAMS)
+    compact_df = system_compact.indic_to_frame()
+
+    pd.testing.assert_series_equal(
+        frame_df["values"].astype(np.float32), compact_df["values"],
+        check_dtype=False)
+    assert (system_compact.indic_memory_usage()["mode"] == "compact").all()
+
+
+def test_fingerprint_is_order_independent():
+    system_a = build_system()
+    system_b = build_system()
+    system_b.indicators = dict(reversed(list(system_b.indicators.items())))
+    assert system_a.fingerprint() == system_b.fingerprint()
+
+    system_b.add_indicator_expr("nb_on", "sum('C.*', '^on$')")
+    assert system_a.fingerprint() != system_b.fingerprint()
+
+
+def count_simulations(monkeypatch):
+    """ Counts the simulations prepared by PycSystem """
+    calls = []
+    prepare_simu = PycSystem.prepare_simu
+
+    def prepare_simu_spy(system, **params):
+        calls.append(params)
+        return prepare_simu(system, **params)
+
+    monkeypatch.setattr(PycSystem, "prepare_simu", prepare_simu_spy)
+    return calls
+
+
+def test_result_cache(tmp_path, monkeypatch):
+    calls = count_simulations(monkeypatch)
+    result_cache = PycResultCache(str(tmp_path))
+    system = build_system()
+    system.simulate(result_cache=result_cache, **SIMU_PARAMS)
+    assert len(calls) == 1
+
+    system.simulate(result_cache=result_cache, **SIMU_PARAMS)
+    assert len(calls) == 1
+    assert result_cache.size() > 0
+
+    system.simulate(result_cache=result_cache,
+                    **dict(SIMU_PARAMS, seed=4321))
+    assert len(calls) == 2
+
+
+def test_simulate_again_with_another_schedule():
+    system = build_system()
+    system.simulate(**SIMU_PARAMS)
+    system.simulate(**dict(SIMU_PARAMS, schedule=[5., 15.]))
+
+    results = system.indic_to_frame()
+    assert sorted(set(results["instant"])) == [5., 15.]
+    assert len(results) == 3*2*2
+
+    # Results at instants simulated before
+    system.simulate(**dict(SIMU_PARAMS, schedule=[10., 30.]))
+    results = system.indic_to_frame()
+    assert sorted(set(results["instant"])) == [10., 30.]
+
+
+def test_indicator_group():
+    system = build_system()
+    system.add_indicator_group("nb_ok", "kofn", comp_pat="C.*",
+                               var_pat="^on$", k=2,
+                               subgroups={"first": "C0"})
+
+    assert system.indicators["nb_ok"].expr == "kofn(2, 'C.*', '^on$')"
+    assert system.indicators["nb_ok_first"].metadata == \
+        {"group": "nb_ok", "subgroup": "first"}
+
+
+def test_fingerprint_follows_system_changes():
+    system = build_system()
+    fingerprint_ref = system.fingerprint()
+
+    system.set_occ_laws({"C1.fail": ExpOccDistribution(rate=2e-3)})
+    fingerprint_law = system.fingerprint()
+    assert fingerprint_law != fingerprint_ref
+
+    system.set_values([0.], selector=("C2", "^load$"), init=True)
+    assert system.fingerprint() != fingerprint_law
+
+    # Changes made directly on the backend
+    comp = system.getComponents("#^C0$", "#.*")[0]
+    comp.getVariables()[1].setInitValue(3.)
+    fingerprint_bkd = system.fingerprint()
+    assert system.fingerprint(refresh=True) != fingerprint_bkd
+
+
+def test_result_cache_after_law_change(tmp_path):
+    result_cache = PycResultCache(str(tmp_path))
+    system = build_system()
+    system.simulate(result_cache=result_cache, **SIMU_PARAMS)
+    key_ref = result_cache.get_key(system.fingerprint(), {})
+
+    system.set_occ_laws({"C1.fail": ExpOccDistribution(rate=2e-3)})
+    system.simulate(result_cache=result_cache, **SIMU_PARAMS)
+
+    assert result_cache.get_key(system.fingerprint(), {}) != key_ref
+    assert len(list(tmp_path.glob("*.pkl"))) == 2
+
+
+def test_result_cache_after_backend_change(tmp_path, monkeypatch):
+    calls = count_simulations(monkeypatch)
+    result_cache = PycResultCache(str(tmp_path))
+    system = build_system()
+    system.simulate(result_cache=result_cache, **SIMU_PARAMS)
+
+    trans = system.get_transitions()["C1.fail"]
+    trans.setDistLaw(ExpOccDistribution(rate=2e-3).to_bkd(trans.parent()))
+    system.simulate(result_cache=result_cache, **SIMU_PARAMS)
+    assert len(calls) == 2
+
+
+def test_fingerprint_components():
+    system = build_system()
+    fingerprint_ref = system.fingerprint(refresh=True)
+
+    # Second target of a transition
+    trans = system.get_transitions()["C0.fail"]
+    trans.addTarget(trans.startState())
+    assert system.fingerprint(refresh=True) != fingerprint_ref
+
+    # Component class
+    system_cls = PycSystem("S")
+    for idx in range(3):
+        RepairableComponent(f"C{idx}")
+    system_cls.add_indicator_var(component="C.*", var="^on$",
+                                 stats=["mean", "stddev"])
+    assert system_cls.fingerprint() != fingerprint_ref
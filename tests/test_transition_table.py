@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+import Pycatshoo as pyc
+from pyctools.automaton import PycAutomaton, ExpOccDistribution, \
+    DelayOccDistribution
+from pyctools.transition_table import PycTransitionTable, LAW_KINDS
+from .models import build_system
+
+
+def get_automaton(name, states, transitions):
+    return PycAutomaton(
+        name=name, comp_name="C", states=states, init_state=states[0],
+        transitions=[{"name": trans_name, "source": source,
+                      "target": target, "occ_law": occ_law}
+                     for trans_name, source, target, occ_law in transitions])
+
+
+def get_issues(automaton):
+    issues_df = PycTransitionTable([automaton]).check()
+    return set(zip(issues_df["kind"], issues_df["element"]))
+
+
+def test_repairable_automaton_has_no_issue():
+    aut = get_automaton("aut", ["ok", "ko"],
+                        [("fail", "ok", "ko", ExpOccDistribution(rate=1e-3)),
+                         ("rep", "ko", "ok", DelayOccDistribution(time=24))])
+    assert get_issues(aut) == set()
+
+
+def test_structural_issues():
+    aut = get_automaton(
+        "aut", ["ok", "ko", "lost", "spare"],
+        [("fail", "ok", "ko", ExpOccDistribution(rate=1e-3)),
+         ("rep", "ko", "ok", DelayOccDistribution(time=24)),
+         ("never", "ok", "spare", ExpOccDistribution(rate=0)),
+         ("loss", "ko", "lost", ExpOccDistribution(rate=1e-5))])
+    issues = get_issues(aut)
+
+    assert ("dead-transition", "never") in issues
+    assert ("unreachable-state", "spare") in issues
+    assert ("absorbing-state", "lost") in issues
+
+
+def test_trap_component():
+    aut = get_automaton(
+        "aut", ["ok", "degraded", "failed"],
+        [("degrade", "ok", "degraded", ExpOccDistribution(rate=1e-3)),
+         ("fail", "degraded", "failed", ExpOccDistribution(rate=1e-3)),
+         ("rep", "failed", "degraded", DelayOccDistribution(time=24))])
+    assert ("trap-component", "degraded, failed") in get_issues(aut)
+
+
+def test_table_arrays():
+    aut = get_automaton("aut", ["ok", "ko"],
+                        [("fail", "ok", "ko", ExpOccDistribution(rate=2.)),
+                         ("rep", "ko", "ok", DelayOccDistribution(time=24))])
+    table = PycTransitionTable([aut, aut.copy(update={"name": "aut2"})])
+
+    assert table.nb_states == 4
+    assert list(table.aut_init_state) == [0, 2]
+    assert list(table.trans_src) == [0, 1, 2, 3]
+    assert list(table.trans_dst) == [1, 0, 3, 2]
+    assert list(table.trans_params[:, 0]) == [2., 24., 2., 24.]
+
+
+@pytest.mark.skipif(not hasattr(pyc, "CURRENT_SYSTEM"),
+                    reason="Unsupported law built with the stand-in backend")
+def test_system_table_with_unsupported_law():
+    system = build_system()
+    comp = system.getComponents("#^C1$", "#.*")[0]
+    trans = comp.getAutomata()[0].states()[0].transitions()[0]
+    trans.setDistLaw(pyc.IDistLaw("gamma", [2., 10.]))
+
+    table = system.transition_table()
+    trans_idx = np.flatnonzero(
+        (table.trans_names == "fail") &
+        (table.aut_comp_names[table.trans_aut] == "C1"))[0]
+    assert table.trans_law[trans_idx] == LAW_KINDS.index("other")
+    assert np.isnan(table.trans_params[trans_idx]).all()
+    assert len(system.check_model()) == 0